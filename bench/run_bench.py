@@ -0,0 +1,318 @@
+"""
+Benchmark runner with regression gates.
+
+Times the hot paths on a synthetic QFX file and writes the results as
+JSON. Given a saved baseline, fails (exit 1) if any benchmark got slower
+than its allowed threshold.
+
+    python -m bench.run_bench --rows 100000 -o bench_results.json
+    python -m bench.run_bench --rows 100000 --save-baseline bench/baseline.json
+    python -m bench.run_bench --rows 100000 --baseline bench/baseline.json \
+        --threshold 0.25 --threshold-for classify_tx=0.5
+
+Independently of any baseline, benchmarks in DEFAULT_MIN_RATES (or given
+with --min-rate NAME=ROWS_PER_SEC) fail when slower than that many rows/s,
+and those in DEFAULT_MAX_SECONDS (or --max-seconds NAME=SECONDS) when they
+take longer than that.
+
+startup_months times a cold `sb months` subprocess; startup_months_imports
+is its total import time under -X importtime (see bench/startup.py).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from bench.startup import measure_startup
+from bench.synth_qfx import write_synthetic_qfx
+
+DEFAULT_THRESHOLD = 0.20      # allowed slowdown: 0.20 == 20% slower than baseline
+
+# Absolute floors (rows/s), checked with or without a baseline. Set one to 0
+# with --min-rate NAME=0 to skip it on a slow machine.
+DEFAULT_MIN_RATES = {
+    "upsert_batch_bulk": 30_000.0,
+}
+
+# Absolute ceilings (seconds) for benchmarks where rows/s means nothing:
+# a cold `sb months`. Override with --max-seconds NAME=SECONDS (0 skips).
+DEFAULT_MAX_SECONDS = {
+    "startup_months": 0.25,
+    "startup_months_imports": 0.15,
+}
+
+
+@dataclass
+class BenchResult:
+    name: str
+    rows: int
+    seconds: float            # best of `repeat` runs
+    rows_per_sec: float
+
+
+@dataclass
+class Regression:
+    name: str
+    baseline_seconds: float
+    seconds: float
+    threshold: float
+
+    @property
+    def slowdown(self) -> float:
+        return self.seconds / self.baseline_seconds - 1.0
+
+
+@dataclass
+class RateShortfall:
+    name: str
+    rows_per_sec: float
+    min_rate: float
+
+
+@dataclass
+class OverLimit:
+    name: str
+    seconds: float
+    max_seconds: float
+
+
+def _best_of(fn: Callable[[], object], repeat: int, setup: Optional[Callable[[], None]] = None) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def run_benchmarks(qfx_path: str, repeat: int = 3, only: Optional[List[str]] = None) -> List[BenchResult]:
+    """
+    Runs each benchmark against qfx_path (best of `repeat`). The DB
+    benchmarks work on a throwaway SQLite file in a temp directory.
+    """
+    from ingest.qfx.qfx_ingest import ingest_qfx, ingest_qfx_batch
+    from ingest.qfx.qfx_reader import parse_qfx_to_raw
+    from ledger.sqlite_store import SQLiteStore
+    from reports.basic_summary import summarize
+    from rules.rules_v1 import classify_tx
+
+    txs = ingest_qfx(qfx_path)
+    batch = ingest_qfx_batch(qfx_path)
+    months = sorted({t.posted_date[:7] for t in txs})
+    year, month = (int(x) for x in months[len(months) // 2].split("-"))
+
+    results: List[BenchResult] = []
+
+    def record(name: str, rows: int, secs: float) -> None:
+        results.append(BenchResult(name, rows, round(secs, 6), round(rows / secs, 1) if secs > 0 else 0.0))
+
+    def wanted(name: str) -> bool:
+        return not only or name in only
+
+    if wanted("parse_qfx_to_raw"):
+        record("parse_qfx_to_raw", len(txs), _best_of(lambda: parse_qfx_to_raw(qfx_path), repeat))
+
+    if wanted("ingest_qfx"):
+        record("ingest_qfx", len(txs), _best_of(lambda: ingest_qfx(qfx_path), repeat))
+
+    with tempfile.TemporaryDirectory(prefix="sb-bench-") as tmp:
+        db = Path(tmp) / "bench.db"
+
+        def fresh_db() -> None:
+            for p in Path(tmp).glob("bench.db*"):
+                p.unlink()
+            with SQLiteStore(str(db)) as s:
+                s.init_db()
+
+        if wanted("upsert_transactions"):
+            def upsert() -> None:
+                with SQLiteStore(str(db)) as s:
+                    s.upsert_transactions(txs, bulk=True)
+            record("upsert_transactions", len(txs), _best_of(upsert, repeat, setup=fresh_db))
+
+        # Whole file as one TransactionBatch, the way batch_import hands rows over
+        for name, bulk in (("upsert_batch", False), ("upsert_batch_bulk", True)):
+            if wanted(name):
+                def upsert_batch(bulk: bool = bulk) -> None:
+                    with SQLiteStore(str(db)) as s:
+                        s.upsert_batch(batch, bulk=bulk)
+                record(name, len(batch), _best_of(upsert_batch, repeat, setup=fresh_db))
+
+        if wanted("list_by_month") or wanted("summarize"):
+            fresh_db()
+            with SQLiteStore(str(db)) as store:
+                store.upsert_transactions(txs, bulk=True)
+                month_txs = store.list_by_month(year, month)
+
+                if wanted("list_by_month"):
+                    record("list_by_month", len(month_txs),
+                           _best_of(lambda: store.list_by_month(year, month), repeat))
+
+                if wanted("summarize"):
+                    record("summarize", len(month_txs), _best_of(lambda: summarize(month_txs), repeat))
+
+    if wanted("classify_tx"):
+        def classify_all() -> None:
+            for t in txs:
+                classify_tx(t)
+        record("classify_tx", len(txs), _best_of(classify_all, repeat))
+
+    if wanted("startup_months"):
+        # Cold `sb months` against a small DB: wall time, and import time per -X importtime
+        with tempfile.TemporaryDirectory(prefix="sb-bench-cli-") as tmp:
+            with SQLiteStore(str(Path(tmp) / "data" / "simplebook.db")) as s:
+                s.init_db()
+                s.upsert_transactions(txs[:1000])
+            wall, imports, _top = measure_startup(["months"], tmp, repeat=max(repeat, 5))
+        record("startup_months", 1, wall)
+        record("startup_months_imports", 1, imports)
+
+    return results
+
+
+def to_json(results: List[BenchResult], rows: int, seed: int) -> dict:
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "rows": rows,
+        "seed": seed,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": {r.name: asdict(r) for r in results},
+    }
+
+
+def compare(
+    current: dict,
+    baseline: dict,
+    threshold: float = DEFAULT_THRESHOLD,
+    per_bench: Optional[Dict[str, float]] = None,
+) -> List[Regression]:
+    """
+    Returns the benchmarks in `current` that are slower than the baseline
+    by more than their threshold. Benchmarks missing from either side are
+    ignored, so adding a benchmark never fails the gate.
+    """
+    per_bench = per_bench or {}
+    out: List[Regression] = []
+    for name, cur in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base or base["seconds"] <= 0:
+            continue
+        limit = per_bench.get(name, threshold)
+        if cur["seconds"] > base["seconds"] * (1.0 + limit):
+            out.append(Regression(name, base["seconds"], cur["seconds"], limit))
+    return out
+
+
+def below_min_rate(current: dict, min_rates: Dict[str, float]) -> List[RateShortfall]:
+    """
+    Returns the benchmarks in `current` slower than their rows/s floor.
+    Benchmarks without a floor (or not run) are ignored.
+    """
+    out: List[RateShortfall] = []
+    for name, cur in current["results"].items():
+        floor = min_rates.get(name, 0.0)
+        if cur["rows_per_sec"] < floor:
+            out.append(RateShortfall(name, cur["rows_per_sec"], floor))
+    return out
+
+
+def over_max_seconds(current: dict, max_seconds: Dict[str, float]) -> List[OverLimit]:
+    """
+    Returns the benchmarks in `current` that took longer than their
+    ceiling. Benchmarks without one (or with 0) are ignored.
+    """
+    out: List[OverLimit] = []
+    for name, cur in current["results"].items():
+        limit = max_seconds.get(name, 0.0)
+        if limit and cur["seconds"] > limit:
+            out.append(OverLimit(name, cur["seconds"], limit))
+    return out
+
+
+def _parse_name_values(items: List[str], flag: str, unit: str) -> Dict[str, float]:
+    out: Dict[str, float] = {}
+    for item in items:
+        name, _, value = item.partition("=")
+        if not value:
+            raise SystemExit(f"{flag} expects NAME={unit}, got {item!r}")
+        out[name] = float(value)
+    return out
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="SimpleBook benchmarks")
+    ap.add_argument("--rows", type=int, default=100_000)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--qfx", help="Benchmark this QFX instead of generating one")
+    ap.add_argument("--only", action="append", help="Run just this benchmark (repeatable)")
+    ap.add_argument("-o", "--output", help="Write results JSON here")
+    ap.add_argument("--baseline", help="Compare against this results JSON")
+    ap.add_argument("--save-baseline", help="Write results JSON as the new baseline")
+    ap.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                    help="Allowed slowdown as a fraction (default 0.20)")
+    ap.add_argument("--threshold-for", action="append", default=[], metavar="NAME=FRACTION",
+                    help="Per-benchmark threshold override (repeatable)")
+    ap.add_argument("--min-rate", action="append", default=[], metavar="NAME=ROWS_PER_SEC",
+                    help="Per-benchmark rows/s floor, on top of the defaults (repeatable)")
+    ap.add_argument("--max-seconds", action="append", default=[], metavar="NAME=SECONDS",
+                    help="Per-benchmark time ceiling, on top of the defaults (repeatable)")
+    a = ap.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="sb-bench-qfx-") as tmp:
+        qfx = a.qfx or write_synthetic_qfx(str(Path(tmp) / "synthetic.qfx"), a.rows, seed=a.seed)
+        results = run_benchmarks(qfx, repeat=a.repeat, only=a.only)
+
+    rows = results[0].rows if a.qfx and results else a.rows
+    doc = to_json(results, rows, a.seed)
+
+    print(f"{'benchmark':<22}{'rows':>10}{'seconds':>12}{'rows/s':>14}")
+    for r in results:
+        print(f"{r.name:<22}{r.rows:>10}{r.seconds:>12.4f}{r.rows_per_sec:>14,.0f}")
+
+    for path in (a.output, a.save_baseline):
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            Path(path).write_text(json.dumps(doc, indent=2) + "\n", encoding="utf-8")
+            print(f"Wrote {path}")
+
+    min_rates = dict(DEFAULT_MIN_RATES)
+    min_rates.update(_parse_name_values(a.min_rate, "--min-rate", "ROWS_PER_SEC"))
+    failed = False
+    for r in below_min_rate(doc, min_rates):
+        print(f"TOO SLOW {r.name}: {r.rows_per_sec:,.0f} rows/s (floor {r.min_rate:,.0f})")
+        failed = True
+    max_seconds = dict(DEFAULT_MAX_SECONDS)
+    max_seconds.update(_parse_name_values(a.max_seconds, "--max-seconds", "SECONDS"))
+    for r in over_max_seconds(doc, max_seconds):
+        print(f"TOO SLOW {r.name}: {r.seconds:.4f}s (ceiling {r.max_seconds:.4f}s)")
+        failed = True
+
+    if a.baseline:
+        baseline = json.loads(Path(a.baseline).read_text(encoding="utf-8"))
+        if baseline.get("rows") != doc["rows"]:
+            print(f"Warning: baseline has {baseline.get('rows')} rows, this run {doc['rows']}")
+        per_bench = _parse_name_values(a.threshold_for, "--threshold-for", "FRACTION")
+        regressions = compare(doc, baseline, a.threshold, per_bench)
+        for r in regressions:
+            print(f"REGRESSION {r.name}: {r.baseline_seconds:.4f}s -> {r.seconds:.4f}s "
+                  f"(+{r.slowdown:.0%}, limit +{r.threshold:.0%})")
+        if regressions:
+            failed = True
+        else:
+            print("No regressions.")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
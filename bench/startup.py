@@ -0,0 +1,72 @@
+"""
+CLI startup checks: wall time of a cold `sb <command>` subprocess and the
+import time Python reports for it under `-X importtime`.
+
+    python -m bench.startup months
+"""
+from __future__ import annotations
+
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+SB = Path(__file__).resolve().parent.parent / "sb.py"
+
+
+def parse_importtime(stderr: str) -> Tuple[float, List[Tuple[str, float]]]:
+    """
+    Returns (total import seconds, [(module, cumulative seconds)] for the
+    top-level imports, slowest first) from `-X importtime` output.
+    """
+    top: List[Tuple[str, float]] = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line.split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue            # header line
+        name = parts[2].rstrip()
+        # Nested imports are indented under their parent
+        if name.startswith(" ") and not name.startswith("  "):
+            top.append((name.strip(), int(parts[1]) / 1e6))
+    top.sort(key=lambda x: -x[1])
+    return sum(s for _, s in top), top
+
+
+def measure_startup(args: List[str], cwd: str, repeat: int = 5) -> Tuple[float, float, List[Tuple[str, float]]]:
+    """
+    Best-of-repeat wall seconds for `python sb.py *args` run in cwd, plus
+    total import seconds and the top-level imports from one -X importtime run.
+    """
+    cmd = [sys.executable, str(SB), *args]
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        subprocess.run(cmd, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        best = min(best, time.perf_counter() - t0)
+
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", str(SB), *args],
+        cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True,
+    )
+    total, top = parse_importtime(proc.stderr)
+    return best, total, top
+
+
+def main() -> None:
+    args = sys.argv[1:] or ["months"]
+    with tempfile.TemporaryDirectory(prefix="sb-startup-") as tmp:
+        # First run creates the (empty) DB so timed runs don't include that
+        subprocess.run([sys.executable, str(SB), *args], cwd=tmp, stdout=subprocess.DEVNULL, check=False)
+        wall, imports, top = measure_startup(args, tmp)
+
+    print(f"sb {' '.join(args)}: {wall * 1000:.1f} ms wall, {imports * 1000:.1f} ms importing")
+    for name, secs in top[:10]:
+        print(f"  {secs * 1000:8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
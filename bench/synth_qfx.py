@@ -0,0 +1,155 @@
+"""
+Synthetic QFX generator for benchmarks.
+
+Writes bank-statement-shaped QFX with realistic field mixes: mostly card
+debits, some checks (with CHECKNUM), transfers, deposits and payroll;
+repeating merchant names with store numbers; optional memos; a few rows
+without FITID (to exercise fallback ids). Streams to disk, so 10M rows is fine.
+
+    python -m bench.synth_qfx out.qfx --rows 100000 [--seed 1]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+from datetime import date, timedelta
+from pathlib import Path
+from typing import TextIO
+
+# (TRNTYPE, weight, sign) — sign -1 debit, +1 credit
+TRNTYPES = [
+    ("DEBIT", 52, -1),
+    ("POS", 14, -1),
+    ("CHECK", 8, -1),
+    ("XFER", 7, -1),
+    ("PAYMENT", 4, -1),
+    ("FEE", 1, -1),
+    ("CREDIT", 9, 1),
+    ("DEP", 4, 1),
+    ("DIRECTDEP", 1, 1),
+]
+
+MERCHANTS = [
+    "HOME DEPOT", "KROGER", "SHELL OIL", "AMAZON MKTPLACE", "WAL-MART", "LOWES",
+    "PUBLIX", "CHICK-FIL-A", "AT&amp;T", "GEORGIA POWER", "COMCAST", "TARGET",
+    "COSTCO WHSE", "MCDONALD'S", "STARBUCKS", "CVS/PHARMACY", "WAFFLE HOUSE",
+]
+CARD_PAYEES = ["AMERICAN EXPRESS", "CITI CARD", "AMEX EPAYMENT", "CAPITAL ONE"]
+INCOME = ["ZELLE FROM", "CASH APP TRANSFER FROM", "VENMO CASHOUT", "DEPOSIT", "PAYROLL ACME CORP"]
+TENANTS = ["J SMITH", "M JONES", "R BROWN", "L DAVIS", "K WILSON"]
+
+
+def _weighted(rng: random.Random, table):
+    total = sum(w for _, w, _ in table)
+    x = rng.uniform(0, total)
+    for item in table:
+        x -= item[1]
+        if x <= 0:
+            return item
+    return table[-1]
+
+
+def _amount(rng: random.Random, trntype: str) -> float:
+    if trntype in ("CHECK", "DEP", "DIRECTDEP", "CREDIT"):
+        base = rng.lognormvariate(6.3, 0.8)    # ~$550 median
+    elif trntype in ("XFER", "PAYMENT"):
+        base = rng.lognormvariate(5.8, 0.9)
+    elif trntype == "FEE":
+        base = rng.choice([5.0, 12.0, 35.0])
+    else:
+        base = rng.lognormvariate(3.5, 0.9)    # ~$33 median card spend
+    return round(base, 2)
+
+
+def _row(rng: random.Random, i: int, day: date, check_no: int) -> tuple[str, int]:
+    trntype, _w, sign = _weighted(rng, TRNTYPES)
+    amt = sign * _amount(rng, trntype)
+    memo = None
+    checknum = None
+
+    if trntype == "CHECK":
+        check_no += 1
+        checknum = str(check_no)
+        name = f"CHECK # {check_no}"
+    elif trntype == "XFER":
+        name = rng.choice(["ONLINE TRANSFER TO SAV", "TRANSFER TO CASH APP", "TRANSFER FROM CASH APP"])
+        memo = f"REF {rng.randrange(10**8):08d}"
+    elif trntype == "PAYMENT":
+        name = rng.choice(CARD_PAYEES)
+        memo = "EPAYMENT"
+    elif sign > 0:
+        name = rng.choice(INCOME)
+        if name.endswith("FROM"):
+            name = f"{name} {rng.choice(TENANTS)}"
+    elif trntype == "FEE":
+        name = "SERVICE CHARGE"
+    else:
+        m = rng.choice(MERCHANTS)
+        name = "DEBIT CARD PURCHASE" if rng.random() < 0.4 else f"POS {m}"
+        memo = f"{m} #{rng.randrange(1, 9999):04d}" if rng.random() < 0.8 else None
+
+    lines = [
+        "<STMTTRN>",
+        f"<TRNTYPE>{trntype}",
+        f"<DTPOSTED>{day:%Y%m%d}120000.000[-5:EST]",
+        f"<TRNAMT>{amt:.2f}",
+    ]
+    if rng.random() > 0.02:
+        lines.append(f"<FITID>SYN{i:010d}")
+    if checknum:
+        lines.append(f"<CHECKNUM>{checknum}")
+    lines.append(f"<NAME>{name[:32]}")
+    if memo:
+        lines.append(f"<MEMO>{memo}")
+    lines.append("</STMTTRN>")
+    return "\n".join(lines) + "\n", check_no
+
+
+def write_synthetic_qfx(
+    path: str,
+    rows: int,
+    seed: int = 1,
+    start: date = date(2023, 1, 1),
+    rows_per_day: int = 40,
+) -> str:
+    """
+    Writes `rows` synthetic transactions to `path`; deterministic per seed.
+    """
+    rng = random.Random(seed)
+    out = Path(path)
+    out.parent.mkdir(parents=True, exist_ok=True)
+
+    with out.open("w", encoding="utf-8") as f:
+        _write_header(f)
+        check_no = 1000
+        for i in range(rows):
+            day = start + timedelta(days=i // rows_per_day)
+            block, check_no = _row(rng, i, day, check_no)
+            f.write(block)
+        _write_footer(f)
+    return str(out)
+
+
+def _write_header(f: TextIO) -> None:
+    f.write(
+        "OFXHEADER:100\nDATA:OFXSGML\nVERSION:102\nSECURITY:NONE\nENCODING:USASCII\n\n"
+        "<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><CURDEF>USD<BANKTRANLIST>\n"
+    )
+
+
+def _write_footer(f: TextIO) -> None:
+    f.write("</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>\n")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Write a synthetic QFX file")
+    ap.add_argument("out")
+    ap.add_argument("--rows", type=int, default=100_000)
+    ap.add_argument("--seed", type=int, default=1)
+    a = ap.parse_args()
+    write_synthetic_qfx(a.out, a.rows, seed=a.seed)
+    print(f"Wrote {a.rows} rows -> {a.out}")
+
+
+if __name__ == "__main__":
+    main()
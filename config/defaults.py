@@ -3,6 +3,15 @@
 ASSUME_ALL_INCOME_IS_RENTAL = True
 REVIEW_AMOUNT_THRESHOLD = 500.0
 
+# Needs-review rules, checked in order (first match wins) as rows are stored.
+# Conditions are listed in rules/review_rules.py; all of a rule's must hold.
+REVIEW_RULES = [
+    {"id": "large_no_memo", "reason": "large amount, missing memo",
+     "min_abs_amount": "REVIEW_AMOUNT_THRESHOLD", "missing": ["memo"]},
+    {"id": "missing_name", "reason": "generic or missing name", "missing": ["name"]},
+    {"id": "generic_name", "reason": "generic or missing name", "name_in": ["POS", "ONLINE", "PAYMENT"]},
+]
+
 # (needle, category, confidence, note)
 VENDOR_RULES = [
     ("AMERICAN EXPRESS", "Credit Card Payment", "hard", None),
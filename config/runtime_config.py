@@ -13,6 +13,7 @@ def _defaults_dict() -> dict:
     return {
         "ASSUME_ALL_INCOME_IS_RENTAL": defaults.ASSUME_ALL_INCOME_IS_RENTAL,
         "REVIEW_AMOUNT_THRESHOLD": defaults.REVIEW_AMOUNT_THRESHOLD,
+        "REVIEW_RULES": defaults.REVIEW_RULES,
         "VENDOR_RULES": defaults.VENDOR_RULES,
     }
 
@@ -33,4 +34,30 @@ def load_config() -> dict:
     return cfg
 
 
-CFG = load_config()
+_cfg: dict | None = None
+
+
+def get_config() -> dict:
+    """
+    The effective config, read from disk on first use and cached after.
+    """
+    global _cfg
+    if _cfg is None:
+        _cfg = load_config()
+    return _cfg
+
+
+def reload_config() -> dict:
+    """
+    Drops the cached config and reads it again.
+    """
+    global _cfg
+    _cfg = None
+    return get_config()
+
+
+def __getattr__(name: str):
+    # `from config.runtime_config import CFG` still works, it just loads lazily
+    if name == "CFG":
+        return get_config()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
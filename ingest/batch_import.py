@@ -0,0 +1,333 @@
+from __future__ import annotations
+
+import glob
+import hashlib
+import multiprocessing
+import os
+import queue
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+import instrument
+from ingest.qfx.qfx_ingest import iter_qfx_batches
+from ledger.known_ids import KnownIdFilter, KnownIdStats
+from models.transaction_batch import TransactionBatch
+
+QFX_SUFFIXES = {".qfx", ".ofx"}
+
+
+@dataclass
+class FileImportStats:
+    path: str
+    rows: int = 0
+    inserted: int = 0
+    parse_seconds: float = 0.0
+    write_seconds: float = 0.0
+    error: Optional[str] = None
+    skipped: bool = False          # already in the import manifest
+
+    @property
+    def rows_per_sec(self) -> float:
+        secs = self.parse_seconds + self.write_seconds
+        return self.rows / secs if secs > 0 else 0.0
+
+
+@dataclass
+class ImportStats:
+    files: List[FileImportStats] = field(default_factory=list)
+    wall_seconds: float = 0.0
+    known_ids: Optional[KnownIdStats] = None     # duplicate prefilter, if used
+    known_ids_loaded: int = 0
+    known_ids_load_seconds: float = 0.0
+
+    @property
+    def rows(self) -> int:
+        return sum(f.rows for f in self.files)
+
+    @property
+    def inserted(self) -> int:
+        return sum(f.inserted for f in self.files)
+
+    @property
+    def skipped(self) -> int:
+        return sum(1 for f in self.files if f.skipped)
+
+    @property
+    def failed(self) -> int:
+        return sum(1 for f in self.files if f.error)
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.wall_seconds if self.wall_seconds > 0 else 0.0
+
+
+def expand_import_paths(args: Iterable[str]) -> List[str]:
+    """
+    Expands files, glob patterns and directories (searched recursively for
+    .qfx/.ofx) into a sorted, de-duplicated list of file paths.
+    """
+    found: list[Path] = []
+    for arg in args:
+        matches = glob.glob(arg, recursive=True) if glob.has_magic(arg) else [arg]
+        for m in matches:
+            p = Path(m)
+            if p.is_dir():
+                found.extend(
+                    c for c in p.rglob("*")
+                    if c.is_file() and c.suffix.lower() in QFX_SUFFIXES
+                )
+            elif p.is_file():
+                found.append(p)
+
+    seen: set[str] = set()
+    out: list[str] = []
+    for p in sorted(found):
+        key = str(p.resolve())
+        if key not in seen:
+            seen.add(key)
+            out.append(str(p))
+    return out
+
+
+def file_sha256(path: str, bufsize: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            buf = f.read(bufsize)
+            if not buf:
+                break
+            h.update(buf)
+    return h.hexdigest()
+
+
+@dataclass
+class _Source:
+    path: str
+    key: str               # resolved path recorded in the manifest
+    size: int
+    mtime: float
+    content_hash: Optional[str] = None
+
+
+def _check_manifest(path: str, store, force: bool) -> Tuple[_Source, bool]:
+    """
+    Returns (source, already_imported). An unchanged path/size/mtime is
+    trusted without hashing; otherwise the content hash decides, so a
+    copied or renamed file is still recognised.
+    """
+    st = os.stat(path)
+    src = _Source(path=path, key=str(Path(path).resolve()), size=st.st_size, mtime=st.st_mtime)
+    if not force and store.find_import(path=src.key, size=src.size, mtime=src.mtime):
+        return src, True
+
+    src.content_hash = file_sha256(path)
+    if not force and store.find_import(content_hash=src.content_hash):
+        return src, True
+    return src, False
+
+
+def _timed_batches(path: str, batch_size: int) -> Iterator[Tuple[TransactionBatch, float]]:
+    """
+    (chunk, seconds spent parsing it) for each chunk of the file.
+    """
+    it = iter_qfx_batches(path, batch_size)
+    while True:
+        t0 = time.perf_counter()
+        batch = next(it, None)
+        if batch is None:
+            return
+        yield batch, time.perf_counter() - t0
+
+
+# Pool workers send their chunks to the writer through this bounded queue,
+# and give up early once the writer sets _stop
+_chunk_queue = None
+_stop = None
+
+
+def _init_worker(chunks, stop) -> None:
+    global _chunk_queue, _stop
+    _chunk_queue = chunks
+    _stop = stop
+
+
+def _parse_file(path: str, batch_size: int) -> None:
+    """
+    Worker entry point: parses one file and puts (path, chunk, None) on the
+    queue per chunk, then (path, None, (rows, parse_seconds, error)).
+    The queue is bounded, so a worker ahead of the writer blocks instead
+    of buffering the file. Errors are reported, not raised, so one bad
+    file doesn't sink the batch. Returns early if the writer failed.
+    """
+    rows = 0
+    parse_secs = 0.0
+    error = None
+    try:
+        for batch, secs in _timed_batches(path, batch_size):
+            if _stop.is_set():
+                return
+            rows += len(batch)
+            parse_secs += secs
+            _chunk_queue.put((path, batch, None))
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    _chunk_queue.put((path, None, (rows, parse_secs, error)))
+
+
+def import_files(
+    paths: List[str],
+    store,
+    workers: Optional[int] = None,
+    batch_size: int = 5000,
+    on_file: Optional[Callable[[FileImportStats], None]] = None,
+    force: bool = False,
+    known: Optional[KnownIdFilter] = None,
+) -> ImportStats:
+    """
+    Parses files in a process pool and feeds a single writer (this process)
+    that upserts into the store in batches.
+
+    Files are streamed batch_size rows at a time end to end (workers hand
+    chunks over a bounded queue), so memory stays flat however large a
+    file is. A file that fails part-way keeps the chunks already written
+    but isn't recorded as imported.
+
+    Files already recorded in the store's import manifest are skipped
+    before parsing unless force=True; every successful import is recorded.
+    Rows whose ids the store already holds are dropped by a known-ID
+    filter before any serialisation or SQL: `known` if given (its stats
+    restart here), else the store's (store.load_known_ids()).
+    workers=1 parses in-process (no pool). on_file is called as each file
+    finishes (skipped files first), in completion order.
+    """
+    stats = ImportStats()
+    t0 = time.perf_counter()
+
+    def done(fs: FileImportStats) -> None:
+        stats.files.append(fs)
+        instrument.count("import.files_skipped" if fs.skipped else "import.files")
+        if on_file is not None:
+            on_file(fs)
+
+    sources: dict[str, _Source] = {}
+    hashes: set[str] = set()
+    for path in paths:
+        src, seen = _check_manifest(path, store, force)
+        # Identical copies within one run are imported once
+        if seen or src.content_hash in hashes:
+            done(FileImportStats(path=path, skipped=True))
+        else:
+            sources[path] = src
+            hashes.add(src.content_hash)
+
+    todo = list(sources)
+
+    if todo:
+        k0 = time.perf_counter()
+        if known is None:
+            known = store.load_known_ids()
+        else:
+            known.stats = KnownIdStats()
+        stats.known_ids = known.stats
+        stats.known_ids_loaded = len(known)
+        stats.known_ids_load_seconds = time.perf_counter() - k0
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(todo)))
+
+    files = {path: FileImportStats(path=path) for path in todo}
+
+    def write(path: str, batch: TransactionBatch) -> None:
+        fs = files[path]
+        w0 = time.perf_counter()
+        fs.inserted += store.upsert_batch(batch, bulk=True, chunk_size=batch_size, known=known)
+        fs.write_seconds += time.perf_counter() - w0
+
+    def finish(path: str, rows: int, parse_secs: float, error: Optional[str]) -> None:
+        fs = files[path]
+        fs.rows, fs.parse_seconds, fs.error = rows, parse_secs, error
+        if pooled:
+            # Worker spans stay in the worker; charge its wall time here instead
+            instrument.record("parse+build (worker)", parse_secs, rows)
+        if error is None:
+            src = sources[path]
+            w0 = time.perf_counter()
+            store.record_import(src.content_hash, src.key, src.size, src.mtime, fs.rows, fs.inserted)
+            fs.write_seconds += time.perf_counter() - w0
+        done(fs)
+
+    pooled = workers > 1
+    if not pooled:
+        for path in todo:
+            rows, parse_secs, error = 0, 0.0, None
+            chunks = _timed_batches(path, batch_size)
+            while True:
+                # Only parse errors are per-file; a failing write still raises
+                try:
+                    item = next(chunks, None)
+                except Exception as e:
+                    error = f"{type(e).__name__}: {e}"
+                    break
+                if item is None:
+                    break
+                batch, secs = item
+                rows += len(batch)
+                parse_secs += secs
+                write(path, batch)
+            finish(path, rows, parse_secs, error)
+    elif todo:
+        ctx = multiprocessing.get_context()
+        chunks = ctx.Queue(maxsize=2 * workers)
+        stop = ctx.Event()
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=ctx, initializer=_init_worker, initargs=(chunks, stop)
+        ) as pool:
+            futures = {path: pool.submit(_parse_file, path, batch_size) for path in todo}
+            try:
+                _drain_pool(chunks, futures, files, write, finish)
+            except BaseException:
+                # The writer failed: workers may be blocked on the full queue,
+                # and the pool's exit would wait on them forever. Stop them and
+                # keep draining until they have all returned.
+                stop.set()
+                for fut in futures.values():
+                    fut.cancel()
+                while not all(fut.done() for fut in futures.values()):
+                    try:
+                        chunks.get(timeout=0.1)
+                    except queue.Empty:
+                        pass
+                raise
+
+    stats.wall_seconds = time.perf_counter() - t0
+    return stats
+
+
+def _drain_pool(chunks, futures: dict, files: dict, write, finish) -> None:
+    """
+    Writer side of a pooled import: takes chunks off the queue until
+    every file has reported its end (or its worker died).
+    """
+    pending = set(futures)
+    while pending:
+        try:
+            path, batch, end = chunks.get(timeout=0.5)
+        except queue.Empty:
+            # A worker that died (e.g. killed) never reports its file
+            for path in list(pending):
+                fut = futures[path]
+                if fut.done() and fut.exception() is not None:
+                    pending.discard(path)
+                    e = fut.exception()
+                    finish(path, files[path].rows, 0.0, f"{type(e).__name__}: {e}")
+            continue
+        if batch is not None:
+            files[path].rows += len(batch)
+            write(path, batch)
+        elif path in pending:
+            pending.discard(path)
+            finish(path, *end)
@@ -1,16 +1,57 @@
 from __future__ import annotations
 
-from typing import List
+from itertools import islice
+from typing import Iterator, List
 from pathlib import Path
 
-from ingest.qfx.qfx_reader import parse_qfx_to_raw
+import instrument
+from ingest.qfx.qfx_reader import parse_qfx_iter
 from models.transaction import Transaction
+from models.transaction_batch import TransactionBatch
+
+
+def iter_qfx(filepath: str) -> Iterator[Transaction]:
+    """
+    Streams canonical Transaction objects out of a QFX file.
+    """
+    filepath = str(Path(filepath))
+    for raw in instrument.timed_iter("parse", parse_qfx_iter(filepath)):
+        yield Transaction.from_parser(raw, source_file=filepath)
 
 
 def ingest_qfx(filepath: str) -> List[Transaction]:
     """
     Reads a QFX file and returns canonical Transaction objects.
     """
+    with instrument.span("model_build") as sp:
+        txs = list(iter_qfx(filepath))
+        sp.rows = len(txs)
+    return txs
+
+
+def ingest_qfx_batch(filepath: str) -> TransactionBatch:
+    """
+    Reads a QFX file into a tuple-backed TransactionBatch (bulk paths).
+    """
+    filepath = str(Path(filepath))
+    with instrument.span("model_build") as sp:
+        raws = instrument.timed_iter("parse", parse_qfx_iter(filepath))
+        batch = TransactionBatch.from_parser(raws, source_file=filepath)
+        sp.rows = len(batch)
+    return batch
+
+
+def iter_qfx_batches(filepath: str, size: int = 5000) -> Iterator[TransactionBatch]:
+    """
+    Reads a QFX file as TransactionBatch chunks of at most `size` rows, so
+    a file of any size is never held in memory whole.
+    """
     filepath = str(Path(filepath))
-    raw_txs = parse_qfx_to_raw(filepath)
-    return [Transaction.from_qfx_dict(raw, source_file=filepath) for raw in raw_txs]
+    raws = instrument.timed_iter("parse", parse_qfx_iter(filepath))
+    while True:
+        with instrument.span("model_build") as sp:
+            batch = TransactionBatch.from_parser(islice(raws, size), source_file=filepath)
+            sp.rows = len(batch)
+        if not batch.rows:
+            return
+        yield batch
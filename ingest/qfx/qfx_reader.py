@@ -1,56 +1,96 @@
 from __future__ import annotations
 
+import mmap
 import re
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional
 
+# One scan over the file: every <TAG>value (or </TAG>) token, value runs to the next '<'
+_TOKEN_RE = re.compile(rb"<(/?)([A-Za-z0-9._]+)>([^<]*)")
 
-def parse_qfx_to_raw(filepath: str) -> List[Dict[str, Any]]:
+# QFX tag -> raw dict key (only these are kept per transaction)
+_TX_TAGS = {
+    b"TRNTYPE": "type",
+    b"DTPOSTED": "posted_raw",
+    b"TRNAMT": "amount_raw",
+    b"FITID": "fitid",
+    b"CHECKNUM": "checknum",
+    b"NAME": "name",
+    b"MEMO": "memo",
+}
+
+_STMTTRN = b"STMTTRN"
+
+_DATE_RE = re.compile(r"(\d{8})")
+
+
+def parse_qfx_iter(filepath: str) -> Iterator[Dict[str, Any]]:
     """
-    Reads a QFX file and returns a list of raw transaction dicts.
-    This stays close to the original QFX fields for traceability.
+    Streams raw transaction dicts out of a QFX file in a single pass.
+
+    The file is memory-mapped and tokenized once, so memory stays flat
+    no matter how large the export is. Yields the same dicts as
+    parse_qfx_to_raw, in file order.
     """
     path = Path(filepath)
-    text = path.read_text(errors="ignore")
+    with path.open("rb") as f:
+        if path.stat().st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            fields: Optional[Dict[str, str]] = None
 
-    blocks = re.findall(r"<STMTTRN>(.*?)</STMTTRN>", text, flags=re.DOTALL)
+            for m in _TOKEN_RE.finditer(mm):
+                closing, tag, value = m.groups()
 
-    raw_txs: List[Dict[str, Any]] = []
+                if tag == _STMTTRN:
+                    if closing:
+                        if fields is not None:
+                            yield _raw_from_fields(fields)
+                        fields = None
+                    elif fields is None:
+                        fields = {}
+                    continue
 
-    for block in blocks:
-        tx_type = _extract_tag(block, "TRNTYPE")
-        posted_raw = _extract_tag(block, "DTPOSTED")
-        amount_raw = _extract_tag(block, "TRNAMT")
-        fitid = _extract_tag(block, "FITID")
-        checknum = _extract_tag(block, "CHECKNUM")
-        name = _extract_tag(block, "NAME")
-        memo = _extract_tag(block, "MEMO")
+                if fields is None or closing:
+                    continue
 
-        posted_date = _normalize_qfx_date(posted_raw)
+                key = _TX_TAGS.get(tag)
+                # First occurrence wins, same as the old per-tag regex search
+                if key is not None and key not in fields:
+                    fields[key] = value.decode("utf-8", errors="ignore").strip()
 
-        try:
-            amount = float(amount_raw) if amount_raw else 0.0
-        except Exception:
-            amount = 0.0
 
-        raw_txs.append({
-            "type": tx_type,
-            "posted_raw": posted_raw,
-            "posted_date": posted_date,
-            "amount": amount,
-            "fitid": fitid,
-            "checknum": checknum,
-            "name": name,
-            "memo": memo,
-        })
+def parse_qfx_to_raw(filepath: str) -> List[Dict[str, Any]]:
+    """
+    Reads a QFX file and returns a list of raw transaction dicts.
+    This stays close to the original QFX fields for traceability.
+    """
+    return list(parse_qfx_iter(filepath))
 
-    return raw_txs
 
+def _raw_from_fields(fields: Dict[str, str]) -> Dict[str, Any]:
+    posted_raw = fields.get("posted_raw")
+    amount_raw = fields.get("amount_raw")
 
-def _extract_tag(block: str, tag: str) -> Optional[str]:
-    match = re.search(rf"<{tag}>(.*?)(?=<|$)", block, flags=re.DOTALL)
-    return match.group(1).strip() if match else None
+    posted_date = _normalize_qfx_date(posted_raw)
+
+    try:
+        amount = float(amount_raw) if amount_raw else 0.0
+    except Exception:
+        amount = 0.0
+
+    return {
+        "type": fields.get("type"),
+        "posted_raw": posted_raw,
+        "posted_date": posted_date,
+        "amount": amount,
+        "fitid": fields.get("fitid"),
+        "checknum": fields.get("checknum"),
+        "name": fields.get("name"),
+        "memo": fields.get("memo"),
+    }
 
 
 def _normalize_qfx_date(raw: Optional[str]) -> Optional[str]:
@@ -60,10 +100,15 @@ def _normalize_qfx_date(raw: Optional[str]) -> Optional[str]:
     if not raw:
         return None
 
-    m = re.match(r"(\d{8})", raw)
+    m = _DATE_RE.match(raw)
     if not m:
         return None
 
-    yyyymmdd = m.group(1)
+    return _iso_from_yyyymmdd(m.group(1))
+
+
+@lru_cache(maxsize=8192)
+def _iso_from_yyyymmdd(yyyymmdd: str) -> str:
+    # Statements repeat the same few hundred dates; validate each only once
     dt = datetime.strptime(yyyymmdd, "%Y%m%d")
     return dt.strftime("%Y-%m-%d")
@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ingest.batch_import import QFX_SUFFIXES, FileImportStats, import_files
+
+try:  # optional: event-driven watching on Linux
+    from inotify_simple import INotify, flags as inotify_flags
+except ImportError:  # pragma: no cover - depends on the environment
+    INotify = None
+    inotify_flags = None
+
+
+@dataclass
+class _Pending:
+    sig: Tuple[int, int]        # (size, mtime_ns) at the last change seen
+    first_seen: float
+    last_change: float
+
+
+@dataclass
+class ReadyFile:
+    path: str
+    first_seen: float           # when the watcher first noticed this version
+    ready_at: float             # when it had been stable for settle_seconds
+
+
+def _is_qfx(path: str) -> bool:
+    return Path(path).suffix.lower() in QFX_SUFFIXES
+
+
+def _signature(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+class FolderWatcher:
+    """
+    Reports .qfx/.ofx files under root that are new or changed, once each
+    version has stopped changing (same size and mtime) for settle_seconds,
+    so half-copied files are never handed out.
+
+    Uses inotify (via the optional inotify_simple package) when available,
+    otherwise rescans the tree every poll_interval seconds.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        settle_seconds: float = 2.0,
+        poll_interval: float = 1.0,
+        use_inotify: Optional[bool] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.root = str(root)
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+        self._clock = clock
+        self._pending: Dict[str, _Pending] = {}
+        self._done: Dict[str, Tuple[int, int]] = {}
+
+        if use_inotify is None:
+            use_inotify = INotify is not None
+        self._inotify = None
+        self._watches: Dict[int, str] = {}
+        if use_inotify:
+            if INotify is None:
+                raise RuntimeError("inotify requested but inotify_simple is not installed")
+            self._inotify = INotify()
+            self._mask = (
+                inotify_flags.CLOSE_WRITE | inotify_flags.MOVED_TO
+                | inotify_flags.CREATE | inotify_flags.MODIFY
+            )
+
+        # Everything already there counts as new; the import manifest skips
+        # files that were ingested before
+        self._scan()
+
+    @property
+    def mode(self) -> str:
+        return "inotify" if self._inotify is not None else "polling"
+
+    def close(self) -> None:
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def _add_watch(self, d: str) -> None:
+        wd = self._inotify.add_watch(d, self._mask)
+        self._watches[wd] = d
+
+    def _scan(self) -> None:
+        for dirpath, _dirnames, filenames in os.walk(self.root):
+            if self._inotify is not None and dirpath not in self._watches.values():
+                self._add_watch(dirpath)
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                if _is_qfx(path):
+                    self._touch(path)
+
+    def _touch(self, path: str) -> None:
+        """
+        Records the file's current size/mtime; any change restarts its settle timer.
+        """
+        sig = _signature(path)
+        if sig is None:
+            self._pending.pop(path, None)      # gone (or moved away) again
+            return
+        if self._done.get(path) == sig:
+            return
+        now = self._clock()
+        p = self._pending.get(path)
+        if p is None:
+            self._pending[path] = _Pending(sig, now, now)
+        elif p.sig != sig:
+            p.sig = sig
+            p.last_change = now
+
+    def _read_events(self, timeout: float) -> None:
+        for ev in self._inotify.read(timeout=int(timeout * 1000)):
+            d = self._watches.get(ev.wd)
+            if d is None or not ev.name:
+                continue
+            path = os.path.join(d, ev.name)
+            if ev.mask & inotify_flags.ISDIR:
+                if ev.mask & (inotify_flags.CREATE | inotify_flags.MOVED_TO):
+                    # New subdirectory: watch it and pick up whatever is already inside
+                    for dirpath, _dirnames, filenames in os.walk(path):
+                        if dirpath not in self._watches.values():
+                            self._add_watch(dirpath)
+                        for name in filenames:
+                            if _is_qfx(name):
+                                self._touch(os.path.join(dirpath, name))
+            elif _is_qfx(path):
+                self._touch(path)
+
+    def _wait(self) -> None:
+        """
+        Blocks until there may be something new: the next poll tick, the
+        next inotify event, or the moment the next pending file could settle.
+        """
+        timeout = self.poll_interval
+        if self._pending:
+            now = self._clock()
+            soonest = min(p.last_change for p in self._pending.values()) + self.settle_seconds
+            timeout = max(0.0, min(timeout, soonest - now))
+
+        if self._inotify is not None:
+            self._read_events(timeout)
+        else:
+            time.sleep(timeout)
+            self._scan()
+
+    def ready(self) -> List[ReadyFile]:
+        """
+        Files whose current version has settled, oldest first. Each version
+        is reported once; a later change reports the file again.
+        """
+        now = self._clock()
+        out: List[ReadyFile] = []
+        for path, p in list(self._pending.items()):
+            # Re-stat: inotify can miss a final write, and polling may be mid-settle
+            sig = _signature(path)
+            if sig is None:
+                del self._pending[path]
+                continue
+            if sig != p.sig:
+                p.sig = sig
+                p.last_change = now
+                continue
+            if now - p.last_change >= self.settle_seconds:
+                del self._pending[path]
+                self._done[path] = sig
+                out.append(ReadyFile(path, p.first_seen, now))
+        out.sort(key=lambda r: r.first_seen)
+        return out
+
+    def poll(self) -> List[ReadyFile]:
+        """
+        One tick: waits for activity (at most poll_interval), then returns
+        whatever has settled.
+        """
+        self._wait()
+        return self.ready()
+
+
+def watch_folder(
+    root: str,
+    store,
+    settle_seconds: float = 2.0,
+    poll_interval: float = 1.0,
+    max_queue: int = 16,
+    use_inotify: Optional[bool] = None,
+    on_file: Optional[Callable[[FileImportStats, ReadyFile, float], None]] = None,
+    stop: Optional[threading.Event] = None,
+    retry_seconds: float = 5.0,
+) -> None:
+    """
+    Imports new/changed QFX files under root as they settle, until stop is
+    set (or KeyboardInterrupt).
+
+    A watcher thread feeds a bounded queue; this thread imports from it one
+    file at a time through import_files(), whose manifest makes each file
+    version land exactly once, even across restarts. When imports fall
+    behind, the queue fills and the watcher blocks (back-pressure) instead
+    of piling up work. on_file gets (stats, ready_file, finished_at).
+
+    A file whose import fails on the database (e.g. locked by another
+    writer) is reported with the error and tried again retry_seconds
+    later; the manifest keeps a retry from importing it twice.
+
+    One known-ID filter lives as long as the watcher: it is loaded once
+    here and learns each file's inserted ids, so no import rescans the table.
+    """
+    stop = stop or threading.Event()
+    known = store.load_known_ids()
+    watcher = FolderWatcher(root, settle_seconds, poll_interval, use_inotify)
+    todo: "queue.Queue[ReadyFile]" = queue.Queue(maxsize=max_queue)
+    retry: List[Tuple[float, ReadyFile]] = []       # (due, item), oldest first
+
+    def detect() -> None:
+        try:
+            while not stop.is_set():
+                for item in watcher.poll():
+                    while not stop.is_set():
+                        try:
+                            todo.put(item, timeout=0.5)
+                            break
+                        except queue.Full:
+                            continue
+        finally:
+            watcher.close()
+
+    t = threading.Thread(target=detect, name="sb-watch", daemon=True)
+    t.start()
+    try:
+        while not stop.is_set():
+            if retry and retry[0][0] <= time.monotonic():
+                item = retry.pop(0)[1]
+            else:
+                wait = 0.5
+                if retry:
+                    wait = max(0.0, min(wait, retry[0][0] - time.monotonic()))
+                try:
+                    item = todo.get(timeout=wait)
+                except queue.Empty:
+                    if not t.is_alive() and not retry:
+                        break        # watcher died (e.g. root removed)
+                    continue
+            try:
+                stats = import_files([item.path], store, workers=1, known=known)
+                fs = stats.files[0]
+            except OSError as e:
+                fs = FileImportStats(path=item.path, error=f"{type(e).__name__}: {e}")
+            except sqlite3.Error as e:
+                # Nothing was recorded in the manifest, so trying again is safe
+                fs = FileImportStats(path=item.path, error=f"{type(e).__name__}: {e}")
+                retry.append((time.monotonic() + retry_seconds, item))
+            if on_file is not None:
+                on_file(fs, item, time.monotonic())
+    finally:
+        stop.set()
+        t.join(timeout=5)
@@ -0,0 +1,249 @@
+"""
+Lightweight stage timing and counters.
+
+Disabled by default: span() then hands back one shared no-op context and
+timed_iter() returns its argument untouched, so instrumented code pays a
+global lookup per call and nothing per row.
+
+    import instrument
+    instrument.enable(trace_memory=True)
+    with instrument.span("db_read") as sp:
+        rows = ...
+        sp.rows = len(rows)
+    print(instrument.format_report())
+
+Spans nest: each stage records inclusive seconds and self seconds (time
+not spent in a nested span), so "model_build" around a "parse" iterator
+shows only the model-building share. Single-threaded by design; worker
+processes report their time back through record().
+"""
+from __future__ import annotations
+
+import time
+from typing import Iterable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+ENABLED = False
+
+
+class StageStats:
+    # Plain class, not a dataclass: sb imports this module on every run
+    __slots__ = ("calls", "seconds", "self_seconds", "rows")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.seconds = 0.0
+        self.self_seconds = 0.0
+        self.rows = 0
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+
+_stages: dict[str, StageStats] = {}
+_counters: dict[str, int] = {}
+_stack: list["_Span"] = []
+_started = 0.0
+_tracing = False
+
+
+class _NullSpan:
+    __slots__ = ()
+    rows = 0
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+    # Accept (and drop) `sp.rows = n` when disabled
+    def __setattr__(self, name: str, value) -> None:
+        pass
+
+
+_NULL = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("name", "rows", "t0", "child")
+
+    def __init__(self, name: str, rows: int):
+        self.name = name
+        self.rows = rows
+        self.child = 0.0
+
+    def __enter__(self) -> "_Span":
+        _stack.append(self)
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        elapsed = time.perf_counter() - self.t0
+        _stack.pop()
+        _add(self.name, elapsed, elapsed - self.child, self.rows)
+        if _stack:
+            _stack[-1].child += elapsed
+
+
+def _add(name: str, seconds: float, self_seconds: float, rows: int, calls: int = 1) -> None:
+    s = _stages.get(name)
+    if s is None:
+        s = _stages[name] = StageStats()
+    s.calls += calls
+    s.seconds += seconds
+    s.self_seconds += self_seconds
+    s.rows += rows
+
+
+def enable(trace_memory: bool = False) -> None:
+    """
+    Starts collecting (and resets anything collected so far). trace_memory
+    also starts tracemalloc for a peak-memory figure; it slows allocation
+    heavy code noticeably, so it is opt-in.
+    """
+    global ENABLED, _started, _tracing
+    import tracemalloc
+
+    reset()
+    ENABLED = True
+    _started = time.perf_counter()
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _tracing = True
+
+
+def disable() -> None:
+    global ENABLED, _tracing
+    ENABLED = False
+    if _tracing:
+        import tracemalloc
+
+        tracemalloc.stop()
+        _tracing = False
+
+
+def reset() -> None:
+    global _started
+    _stages.clear()
+    _counters.clear()
+    _stack.clear()
+    _started = time.perf_counter()
+    if _tracing:
+        import tracemalloc
+
+        tracemalloc.reset_peak()
+
+
+def span(name: str, rows: int = 0):
+    """
+    Context manager timing one stage. Set .rows on it to report throughput.
+    """
+    if not ENABLED:
+        return _NULL
+    return _Span(name, rows)
+
+
+def timed_iter(name: str, items: Iterable[T]) -> Iterable[T]:
+    """
+    Charges the time spent producing each item to stage `name` (one row per
+    item). Returns items unchanged when disabled.
+    """
+    if not ENABLED:
+        return items
+    return _timed_iter(name, iter(items))
+
+
+def _timed_iter(name: str, it: Iterator[T]) -> Iterator[T]:
+    total = 0.0
+    rows = 0
+    try:
+        while True:
+            t0 = time.perf_counter()
+            try:
+                item = next(it)
+            except StopIteration:
+                return
+            finally:
+                dt = time.perf_counter() - t0
+                total += dt
+                # Time spent producing items is not the enclosing span's own time
+                if _stack:
+                    _stack[-1].child += dt
+            rows += 1
+            yield item
+    finally:
+        _add(name, total, total, rows)
+
+
+def record(name: str, seconds: float, rows: int = 0, calls: int = 1) -> None:
+    """
+    Adds externally measured time (e.g. from a worker process) to a stage.
+    """
+    if ENABLED:
+        _add(name, seconds, seconds, rows, calls)
+
+
+def count(name: str, n: int = 1) -> None:
+    if ENABLED:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def snapshot() -> dict:
+    """
+    Everything collected so far, JSON-ready.
+    """
+    peak = None
+    if _tracing:
+        import tracemalloc
+
+        peak = tracemalloc.get_traced_memory()[1]
+    return {
+        "wall_seconds": round(time.perf_counter() - _started, 6),
+        "peak_memory_bytes": peak,
+        "stages": {
+            name: {
+                "calls": s.calls,
+                "seconds": round(s.seconds, 6),
+                "self_seconds": round(s.self_seconds, 6),
+                "rows": s.rows,
+                "rows_per_sec": round(s.rows_per_sec, 1),
+            }
+            for name, s in _stages.items()
+        },
+        "counters": dict(_counters),
+    }
+
+
+def write_json(path: str, extra: Optional[dict] = None) -> None:
+    import json
+    from pathlib import Path
+
+    doc = snapshot()
+    if extra:
+        doc.update(extra)
+    p = Path(path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    p.write_text(json.dumps(doc, indent=2) + "\n", encoding="utf-8")
+
+
+def format_report() -> str:
+    snap = snapshot()
+    lines = [
+        "",
+        "Profile:",
+        f"  {'stage':<20}{'calls':>7}{'total s':>10}{'self s':>10}{'rows':>10}{'rows/s':>12}",
+    ]
+    for name, s in sorted(snap["stages"].items(), key=lambda kv: -kv[1]["self_seconds"]):
+        lines.append(
+            f"  {name:<20}{s['calls']:>7}{s['seconds']:>10.3f}{s['self_seconds']:>10.3f}"
+            f"{s['rows']:>10}{s['rows_per_sec']:>12,.0f}"
+        )
+    for name, n in sorted(snap["counters"].items()):
+        lines.append(f"  {name:<20}{n:>7}")
+    lines.append(f"  wall: {snap['wall_seconds']:.3f}s")
+    if snap["peak_memory_bytes"] is not None:
+        lines.append(f"  peak memory (tracemalloc): {snap['peak_memory_bytes'] / 1e6:,.1f} MB")
+    return "\n".join(lines)
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import csv
+import gzip
+import io
+import json
+import sys
+from contextlib import contextmanager
+from datetime import date, timedelta
+from typing import IO, Iterable, Iterator, Optional, Sequence, Tuple
+
+from ledger.sqlite_store import EXPORT_COLUMNS, SQLiteStore
+
+EXPORT_FORMATS = ("csv", "jsonl")
+
+# Stored as JSON text; JSONL output embeds them as-is instead of re-encoding
+_JSON_COLUMNS = {"raw_json": "raw", "tags_json": "tags"}
+
+_dumps = json.JSONEncoder(ensure_ascii=False).encode
+
+
+def export_bounds(from_s: Optional[str], to_s: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Inclusive --from/--to ('YYYY-MM-DD' or 'YYYY-MM') -> half-open
+    (start, end) posted_date bounds. A month --to covers the whole month.
+    """
+    start = end = None
+    if from_s:
+        start = _parse_day(from_s, "--from").isoformat()
+    if to_s:
+        last = _parse_day(to_s, "--to")
+        if len(to_s) == 7:
+            nxt = (last.replace(day=28) + timedelta(days=4)).replace(day=1)
+        else:
+            nxt = last + timedelta(days=1)
+        end = nxt.isoformat()
+    if start and end and start >= end:
+        raise ValueError(f"Empty range {from_s}..{to_s}")
+    return start, end
+
+
+def _parse_day(s: str, flag: str) -> date:
+    try:
+        if len(s) == 7:
+            return date.fromisoformat(f"{s}-01")
+        return date.fromisoformat(s)
+    except ValueError:
+        raise ValueError(f"Bad {flag} '{s}' (expected YYYY-MM-DD or YYYY-MM)") from None
+
+
+@contextmanager
+def open_output(path: Optional[str], gz: bool) -> Iterator[IO[str]]:
+    """
+    Text stream for path ('-' or None = stdout), gzip-compressed if gz.
+    Closing it never closes stdout itself.
+    """
+    if path not in (None, "-"):
+        if gz:
+            f = gzip.open(path, "wt", encoding="utf-8", newline="", compresslevel=6)
+        else:
+            f = open(path, "w", encoding="utf-8", newline="", buffering=1 << 20)
+        with f:
+            yield f
+        return
+
+    sys.stdout.flush()
+    raw = gzip.GzipFile(fileobj=sys.stdout.buffer, mode="wb", compresslevel=6) if gz else sys.stdout.buffer
+    out = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+    try:
+        yield out
+    finally:
+        out.flush()
+        out.detach()
+        if gz:
+            raw.close()      # writes the gzip trailer; leaves stdout open
+
+
+def write_csv(out: IO[str], columns: Sequence[str], batches: Iterable[list]) -> int:
+    w = csv.writer(out)
+    w.writerow(columns)
+    n = 0
+    for rows in batches:
+        w.writerows(rows)
+        n += len(rows)
+    return n
+
+
+def write_jsonl(out: IO[str], columns: Sequence[str], batches: Iterable[list]) -> int:
+    # Pre-encode each '"key": ' once; JSON columns are spliced in verbatim
+    keys = [_dumps(_JSON_COLUMNS.get(c, c)) + ": " for c in columns]
+    is_json = [c in _JSON_COLUMNS for c in columns]
+
+    n = 0
+    if not any(is_json):
+        for rows in batches:
+            out.writelines(_dumps(dict(zip(columns, r))) + "\n" for r in rows)
+            n += len(rows)
+        return n
+
+    enc = [(lambda v: v or "null") if j else _dumps for j in is_json]
+    for rows in batches:
+        out.writelines(
+            "{" + ", ".join(k + e(v) for k, e, v in zip(keys, enc, r)) + "}\n"
+            for r in rows
+        )
+        n += len(rows)
+    return n
+
+
+def export_transactions(
+    store: SQLiteStore,
+    out: IO[str],
+    fmt: str = "csv",
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    columns: Optional[Sequence[str]] = None,
+    batch_size: int = 5000,
+) -> int:
+    """
+    Streams transactions over start <= posted_date < end (oldest first) to
+    out as CSV or JSON lines; memory stays at one fetchmany batch.
+    Returns rows written.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt} (expected one of {', '.join(EXPORT_FORMATS)})")
+    cols = tuple(EXPORT_COLUMNS if columns is None else columns)
+    # Checked here too so a bad column fails before any header is written
+    bad = [c for c in cols if c not in EXPORT_COLUMNS]
+    if bad:
+        raise ValueError(f"Unknown transaction column: {bad[0]} (expected some of {', '.join(EXPORT_COLUMNS)})")
+    batches = store.iter_row_batches(start, end, columns=cols, batch_size=batch_size)
+    if fmt == "csv":
+        return write_csv(out, cols, batches)
+    return write_jsonl(out, cols, batches)
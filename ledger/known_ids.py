@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Iterable
+
+# Ids added since the last merge are kept in a set of at least this size
+_MIN_PENDING = 4096
+# Offsets table: at most 2**16 buckets (512 KB)
+_MAX_BUCKET_BITS = 16
+
+
+@dataclass
+class KnownIdStats:
+    checked: int = 0
+    hits: int = 0               # filter said "already stored"
+    misses: int = 0             # filter said "new" (always right)
+    false_positives: int = 0    # hits that turned out to be new after all
+
+    @property
+    def skipped(self) -> int:
+        return self.hits - self.false_positives
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.checked if self.checked else 0.0
+
+
+class KnownIdFilter:
+    """
+    Compact membership filter over transaction ids already in the store.
+
+    Keeps only a 64-bit hash per id (no id strings), so it has no false
+    negatives but can, very rarely, collide; the store confirms hits
+    against the table before dropping a row. Hashes use Python's per-process
+    string hash, so a filter is only valid inside the process that built it.
+
+    The hashes live in a sorted array('q') (8 bytes per id), found by
+    bisecting the slice a small offsets table picks out by the top bits.
+    Ids added later sit in a set until enough pile up to merge them in.
+    """
+
+    def __init__(self, ids: Iterable[str] = ()):
+        self._sorted = array("q", sorted(array("q", map(hash, ids))))
+        self._pending: set[int] = set()
+        self._index()
+        self.stats = KnownIdStats()
+
+    def __len__(self) -> int:
+        return len(self._sorted) + len(self._pending)
+
+    def add(self, tx_id: str) -> None:
+        h = hash(tx_id)
+        if h in self._pending or self._contains_sorted(h):
+            return
+        self._pending.add(h)
+        # A set costs ~10x the array per entry: fold it in at 1/8 of the array
+        if len(self._pending) > max(_MIN_PENDING, len(self._sorted) >> 3):
+            # Two sorted runs: timsort merges them in one linear pass
+            self._sorted = array("q", sorted(self._sorted + array("q", sorted(self._pending))))
+            self._pending = set()
+            self._index()
+
+    def might_contain(self, tx_id: str) -> bool:
+        h = hash(tx_id)
+        return h in self._pending or self._contains_sorted(h)
+
+    def _index(self) -> None:
+        # offsets[b] is where bucket b (hashes sharing their top `bits`) starts;
+        # ~16 ids per bucket, so a lookup bisects a handful instead of all
+        hashes = self._sorted
+        bits = min(_MAX_BUCKET_BITS, max(1, len(hashes).bit_length() - 4))
+        self._shift = 64 - bits
+        self._bias = 1 << (bits - 1)
+        self._offsets = array("q", (
+            bisect_left(hashes, (b - self._bias) << self._shift) for b in range((1 << bits) + 1)
+        ))
+
+    def _contains_sorted(self, h: int) -> bool:
+        hashes = self._sorted
+        b = (h >> self._shift) + self._bias
+        i = bisect_left(hashes, h, self._offsets[b], self._offsets[b + 1])
+        return i < len(hashes) and hashes[i] == h
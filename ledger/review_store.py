@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+import heapq
 import json
+import os
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable, Optional
 
 
 def _safe_str(x: Any) -> str:
@@ -25,24 +27,45 @@ def make_review_id(t: Any) -> str:
     return f"{posted}|{amt}|{name}"
 
 
-def load_review_items(ym: str) -> dict[str, dict[str, Any]]:
-    path = review_path_for_month(ym)
+def _read_journal(path: Path) -> tuple[dict[str, dict[str, Any]], int]:
+    """
+    Replays a review file: later lines for the same id replace earlier ones.
+    Returns (items, number of lines). A torn final line (crash mid-append)
+    is ignored.
+    """
     items: dict[str, dict[str, Any]] = {}
     if not path.exists():
-        return items
+        return items, 0
 
-    for line in path.read_text(encoding="utf-8").splitlines():
+    lines = path.read_text(encoding="utf-8").splitlines()
+    count = 0
+    for i, line in enumerate(lines):
         line = line.strip()
         if not line:
             continue
-        obj = json.loads(line)
+        try:
+            obj = json.loads(line)
+        except json.JSONDecodeError:
+            if i == len(lines) - 1:
+                break
+            raise
+        count += 1
         rid = str(obj.get("id", "")).strip()
         if rid:
             items[rid] = obj
-    return items
+    return items, count
+
+
+def load_review_items(ym: str) -> dict[str, dict[str, Any]]:
+    return _read_journal(review_path_for_month(ym))[0]
 
 
 def save_review_items(ym: str, items: dict[str, dict[str, Any]]) -> None:
+    """
+    Writes a compacted file (one line per item, sorted by id). The new file
+    is written aside and swapped in atomically, so a crash leaves either the
+    old or the new file, never a partial one.
+    """
     path = review_path_for_month(ym)
     path.parent.mkdir(parents=True, exist_ok=True)
 
@@ -50,7 +73,69 @@ def save_review_items(ym: str, items: dict[str, dict[str, Any]]) -> None:
     for rid in sorted(items.keys()):
         lines.append(json.dumps(items[rid], ensure_ascii=False))
 
-    path.write_text("\n".join(lines) + ("\n" if lines else ""), encoding="utf-8")
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + ("\n" if lines else ""))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _end_torn_line(f: Any) -> None:
+    """
+    Makes sure the journal open in f ("a+b") ends with a newline before
+    anything is appended. A torn final line (crash mid-append) is cut off;
+    a complete entry that only lacks its newline gets one.
+    """
+    end = f.seek(0, os.SEEK_END)
+    if end == 0:
+        return
+    f.seek(end - 1)
+    if f.read(1) == b"\n":
+        return
+
+    start = pos = end
+    while pos > 0:
+        step = min(4096, pos)
+        pos -= step
+        f.seek(pos)
+        i = f.read(step).rfind(b"\n")
+        if i >= 0:
+            start = pos + i + 1
+            break
+    else:
+        start = 0
+
+    f.seek(start)
+    try:
+        json.loads(f.read())
+    except ValueError:
+        f.truncate(start)
+    else:
+        f.write(b"\n")
+
+
+def append_review_items(ym: str, items: Iterable[dict[str, Any]]) -> int:
+    """
+    Appends each item's latest state to the month's review journal in one
+    write and one fsync. load_review_items() replays the journal, so the
+    last write wins. Returns the number of lines written.
+    """
+    lines = [json.dumps(item, ensure_ascii=False) + "\n" for item in items]
+    if not lines:
+        return 0
+    path = review_path_for_month(ym)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a+b") as f:
+        _end_torn_line(f)
+        f.write("".join(lines).encode("utf-8"))
+        f.flush()
+        os.fsync(f.fileno())
+    return len(lines)
+
+
+def append_review_item(ym: str, item: dict[str, Any]) -> None:
+    append_review_items(ym, [item])
 
 
 def upsert_review_item(
@@ -79,8 +164,150 @@ def upsert_review_item(
 
 
 def find_next_open(items: dict[str, dict[str, Any]]) -> dict[str, Any] | None:
-    for rid in sorted(items.keys()):
-        if items[rid].get("status", "open") == "open":
-            return items[rid]
-    return None
+    open_ids = [rid for rid, obj in items.items() if obj.get("status", "open") == "open"]
+    return items[min(open_ids)] if open_ids else None
+
+
+class ReviewLog:
+    """
+    A month's review items backed by an append-only journal.
+
+    Every upsert appends one line (O(1) I/O, fsync'd) instead of rewriting
+    the file; the journal is compacted back to one line per item once it
+    grows past compact_ratio x the live item count. Open items are kept in
+    a heap ordered by id, so next_open() is O(log n) amortised.
+    """
+
+    def __init__(self, ym: str, compact_ratio: float = 2.0, min_compact_lines: int = 64):
+        self.ym = ym
+        self.compact_ratio = compact_ratio
+        self.min_compact_lines = min_compact_lines
+        self.items, self._journal_lines = _read_journal(review_path_for_month(ym))
+        self._open = [rid for rid, obj in self.items.items() if _is_open(obj)]
+        heapq.heapify(self._open)
+        self._in_heap = set(self._open)
+
+    def upsert(self, review_id: str, base: dict[str, Any]) -> dict[str, Any]:
+        """
+        upsert_review_item() + persist. Keeps user-set status/category/vendor/note.
+        """
+        upsert_review_item(self.items, review_id, base)
+        return self._write([review_id])[0]
+
+    def upsert_many(self, entries: Iterable[tuple[str, dict[str, Any]]]) -> int:
+        """
+        upsert() for many (review_id, base) pairs, persisted with a single
+        append (one fsync). Returns the number of items written.
+        """
+        ids = []
+        for review_id, base in entries:
+            upsert_review_item(self.items, review_id, base)
+            ids.append(review_id)
+        return len(self._write(ids))
+
+    def update(self, review_id: str, **fields: Any) -> dict[str, Any]:
+        """
+        Sets fields (e.g. status="done", category=...) on an existing item.
+        """
+        self.items[review_id].update(fields)
+        return self._write([review_id])[0]
+
+    def next_open(self) -> dict[str, Any] | None:
+        # Lazy deletion: ids closed since they were pushed are dropped here
+        while self._open:
+            obj = self.items.get(self._open[0])
+            if obj is not None and _is_open(obj):
+                return obj
+            self._in_heap.discard(heapq.heappop(self._open))
+        return None
+
+    def compact(self) -> None:
+        save_review_items(self.ym, self.items)
+        self._journal_lines = len(self.items)
+
+    def _write(self, review_ids: list[str]) -> list[dict[str, Any]]:
+        objs = []
+        for review_id in review_ids:
+            obj = self.items[review_id]
+            obj.setdefault("id", review_id)
+            objs.append(obj)
+            if _is_open(obj) and review_id not in self._in_heap:
+                heapq.heappush(self._open, review_id)
+                self._in_heap.add(review_id)
+        self._journal_lines += append_review_items(self.ym, objs)
+
+        limit = max(self.min_compact_lines, self.compact_ratio * len(self.items))
+        if self._journal_lines > limit:
+            self.compact()
+        return objs
+
+
+def feed_review_log(log: ReviewLog, flagged: Iterable[tuple[Any, str, str]]) -> int:
+    """
+    Upserts (transaction, rule_id, reason) rows from the store's review
+    flags into the log, in one append. Items already there with the same
+    rule and reason are left alone, so re-running a report appends
+    nothing. Returns the number of items written.
+    """
+    entries = []
+    for t, rule_id, reason in flagged:
+        rid = make_review_id(t)
+        cur = log.items.get(rid)
+        if cur is not None and cur.get("rule") == rule_id and cur.get("reason") == reason:
+            continue
+        entries.append((rid, {
+            "id": rid,
+            "posted_date": t.posted_date,
+            "amount": t.amount,
+            "name": t.name,
+            "memo": t.memo,
+            "rule": rule_id,
+            "reason": reason,
+        }))
+    return log.upsert_many(entries)
+
+
+def open_review_flags(
+    flagged: Iterable[tuple[Any, str, str]],
+    items_by_month: Optional[dict[str, dict[str, dict[str, Any]]]] = None,
+) -> list[tuple[Any, str, str]]:
+    """
+    The flagged rows whose review item is still open (not marked done) in
+    its month's journal; rows not in a journal yet count as open.
+    items_by_month supplies already-loaded months (e.g. a ReviewLog's items).
+    """
+    loaded = dict(items_by_month or {})
+    out = []
+    for row in flagged:
+        t = row[0]
+        ym = t.posted_date[:7]
+        items = loaded.get(ym)
+        if items is None:
+            items = loaded[ym] = load_review_items(ym)
+        if _is_open(items.get(make_review_id(t), {})):
+            out.append(row)
+    return out
+
+
+def count_open_review_flags(store) -> list[tuple[str, int]]:
+    """
+    store.count_review_flags() without the items marked done, so the
+    counts agree with open_review_flags(). Only months whose journal has
+    done items read their flagged rows back; months left empty drop out.
+    """
+    from ledger.sqlite_store import month_bounds
+
+    out = []
+    for ym, n in store.count_review_flags():
+        items = load_review_items(ym)
+        if not all(_is_open(obj) for obj in items.values()):
+            flagged = store.list_review_flags(*month_bounds(int(ym[:4]), int(ym[5:])))
+            n = len(open_review_flags(flagged, {ym: items}))
+        if n:
+            out.append((ym, n))
+    return out
+
+
+def _is_open(obj: dict[str, Any]) -> bool:
+    return obj.get("status", "open") == "open"
 
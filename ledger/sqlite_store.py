@@ -1,81 +1,1090 @@
 from __future__ import annotations
 
+import html
+import json
 import sqlite3
+import threading
+from datetime import datetime
+from itertools import islice
+from operator import attrgetter, itemgetter
 from pathlib import Path
-from typing import Iterable, List, Optional
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Optional
 
-from models.transaction import Transaction
+import instrument
+from models.transaction import StoredTransaction, Transaction, classify_kind, from_cents, to_cents
+from models.transaction_batch import TransactionBatch
+
+if TYPE_CHECKING:  # imported where used: `sb months` and friends never need it
+    from ledger.known_ids import KnownIdFilter
+
+_TX_COLUMNS = (
+    "id", "posted_date", "amount", "direction", "name", "memo", "type",
+    "checknum", "source_file", "raw_json", "tags_json", "notes",
+)
+
+# Written on insert but derived from the model (kind may be read back as
+# StoredTransaction.kind)
+_INSERT_COLUMNS = _TX_COLUMNS + ("amount_cents", "kind")
+
+# Columns a projected read may select
+_READ_COLUMNS = _TX_COLUMNS + ("kind",)
+
+_INSERT_TX_SQL = (
+    f"INSERT OR IGNORE INTO transactions ({', '.join(_INSERT_COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in _INSERT_COLUMNS)})"
+)
+
+# Stay under SQLite's default host-parameter limit for IN (...) lists
+_MAX_IN_PARAMS = 900
+
+# Columns every rehydrated Transaction needs (non-optional fields)
+_REQUIRED_COLUMNS = ("id", "posted_date", "amount", "direction")
+
+# Everything summaries/rules/kind reports read; skips raw/tags payloads entirely
+REPORT_COLUMNS = _REQUIRED_COLUMNS + ("name", "memo", "type", "checknum", "kind")
+
+# Columns iter_row_batches() (and so `sb export`) can return
+EXPORT_COLUMNS = _INSERT_COLUMNS
+
+_dumps = json.JSONEncoder(ensure_ascii=False).encode
+if json.encoder.c_make_encoder is not None:
+    # Same output as _dumps, but one C encoder for every row: encode()
+    # builds a fresh one per call, which is most of raw_json's cost
+    _c_encode = json.encoder.c_make_encoder(
+        None, json.JSONEncoder().default, json.encoder.encode_basestring,
+        None, ": ", ", ", False, False, True,
+    )
+
+    def _dumps(obj) -> str:
+        return "".join(_c_encode(obj, 0))
+
+_get_id = attrgetter("id")
+_first = itemgetter(0)
+
+
+def _tx_row(tx: Transaction) -> tuple:
+    tags = tx.tags
+    amount = tx.amount
+    return (
+        tx.id,
+        tx.posted_date,
+        tx.amount,
+        tx.direction,
+        tx.name,
+        tx.memo,
+        tx.type,
+        tx.checknum,
+        tx.source_file,
+        _dumps(tx.raw),
+        _dumps(list(tags)) if tags else "[]",
+        tx.notes,
+        to_cents(amount),
+        classify_kind(amount, tx.name, tx.memo, tx.type, tx.checknum),
+    )
+
+
+def _batch_row(r: tuple) -> tuple:
+    # TransactionBatch tuple (Transaction field order) -> insert row
+    tags = r[10]
+    return r[:9] + (
+        _dumps(r[9]), _dumps(list(tags)) if tags else "[]", r[11], to_cents(r[2]),
+        classify_kind(r[2], r[4], r[5], r[6], r[7]),
+    )
+
+
+def _insert_rows(conn: sqlite3.Connection, rows: list[tuple]) -> int:
+    before = conn.total_changes
+    conn.executemany(_INSERT_TX_SQL, rows)
+    # total_changes only counts rows actually written, so ignored duplicates drop out
+    return conn.total_changes - before
+
+
+def _chunked(items: Iterable, size: int) -> Iterator[list]:
+    it = iter(items)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# Per-month aggregates over a set of transaction rows (credit: amount > 0, like summarize()).
+# Totals are exact integer cents.
+_ROLLUP_SELECT = """
+    SELECT ym,
+           COUNT(*),
+           SUM(amount_cents > 0),
+           SUM(amount_cents <= 0),
+           COALESCE(SUM(CASE WHEN amount_cents > 0 THEN amount_cents END), 0),
+           COALESCE(SUM(CASE WHEN amount_cents <= 0 THEN amount_cents END), 0)
+    FROM transactions
+"""
+
+_ROLLUP_COLUMNS = "ym, count, credits_count, debits_count, credits_cents, debits_cents"
+
+_ROLLUP_ADD_SQL = f"""
+    INSERT INTO monthly_rollups ({_ROLLUP_COLUMNS})
+    {_ROLLUP_SELECT}
+    WHERE rowid > ?
+    GROUP BY ym
+    ON CONFLICT(ym) DO UPDATE SET
+        count = count + excluded.count,
+        credits_count = credits_count + excluded.credits_count,
+        debits_count = debits_count + excluded.debits_count,
+        credits_cents = credits_cents + excluded.credits_cents,
+        debits_cents = debits_cents + excluded.debits_cents
+"""
+
+
+def _rebuild_rollups(conn: sqlite3.Connection) -> None:
+    conn.execute("DELETE FROM monthly_rollups")
+    conn.execute(f"INSERT INTO monthly_rollups ({_ROLLUP_COLUMNS}) {_ROLLUP_SELECT} GROUP BY ym")
+
+
+# Full-text index over payee/memo/check number; external content, so the
+# text itself stays in transactions and tx_fts holds only the index
+_FTS_CREATE_SQL = """
+    CREATE VIRTUAL TABLE tx_fts USING fts5(
+        name, memo, checknum, content='transactions', content_rowid='rowid'
+    )
+"""
+
+_FTS_ADD_SQL = """
+    INSERT INTO tx_fts (rowid, name, memo, checknum)
+    SELECT rowid, name, memo, checknum FROM transactions WHERE rowid > ?
+"""
+
+
+def _has_fts(conn: sqlite3.Connection) -> bool:
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tx_fts'"
+    ).fetchone() is not None
+
+
+def _fts_query(text: str) -> str:
+    """
+    User text -> FTS5 query: every whitespace-separated term must match,
+    each as a quoted prefix ("home depot" -> "home"* AND "depot"*), so
+    punctuation like AT&T or #1234 can't break the query syntax. Terms
+    with &, < or > also match their HTML-escaped form, as QFX names often
+    arrive that way (AT&amp;T).
+    """
+    def quoted(t: str) -> str:
+        return '"' + t.replace('"', '""') + '"*'
+
+    parts = []
+    for t in text.split():
+        escaped = html.escape(t, quote=False)
+        parts.append(quoted(t) if escaped == t else f"({quoted(t)} OR {quoted(escaped)})")
+    return " AND ".join(parts)
+
+
+def _review_flags_sql(review) -> tuple[str, tuple]:
+    """
+    INSERT flagging rows with rowid > ? (bound last) by the first review
+    rule they match, plus its leading parameters.
+    """
+    values = ", ".join("(?, ?, ?)" for _ in review.rules)
+    # MATERIALIZED: evaluate the CASE once per row. Flattened, the planner
+    # scans the new rows once per rule and re-evaluates it each time.
+    sql = f"""
+        WITH rules (idx, rule_id, reason) AS (VALUES {values}),
+        m AS MATERIALIZED (
+            SELECT id, posted_date, {review.case_sql} AS idx
+            FROM transactions WHERE rowid > ?
+        )
+        INSERT OR REPLACE INTO review_flags (tx_id, posted_date, rule_id, reason)
+        SELECT m.id, m.posted_date, rules.rule_id, rules.reason
+        FROM m JOIN rules ON rules.idx = m.idx
+    """
+    params: list = []
+    for idx, rule in enumerate(review.rules):
+        params += [idx, rule.id, rule.reason]
+    return sql, tuple(params) + review.params
+
+
+def _apply_new_rows(conn: sqlite3.Connection, watermark: int, review_sql: Optional[tuple] = None) -> None:
+    """
+    Folds rows inserted after `watermark` (a rowid) into the derived tables.
+    Runs inside the inserting transaction so they never drift apart.
+    review_sql (from _review_flags_sql) flags the new rows for review.
+    """
+    conn.execute(_ROLLUP_ADD_SQL, (watermark,))
+    if _has_fts(conn):
+        conn.execute(_FTS_ADD_SQL, (watermark,))
+    if review_sql is not None:
+        sql, params = review_sql
+        conn.execute(sql, params + (watermark,))
+
+
+# SQL twins of reports.basic_summary's Python logic, for pushdown queries.
+# Vendor key == (memo or name or "Unknown").strip() or "Unknown"
+_WS = "' ' || char(9, 10, 13)"
+VENDOR_KEY_SQL = f"""
+    COALESCE(NULLIF(TRIM(
+        CASE WHEN memo IS NOT NULL AND memo != '' THEN memo
+             WHEN name IS NOT NULL AND name != '' THEN name
+             ELSE 'Unknown' END, {_WS}), ''), 'Unknown')
+"""
+
+def _range_where(start: Optional[str], end: Optional[str], where: Optional[list] = None) -> tuple[str, list]:
+    """
+    Builds a WHERE clause for start <= posted_date < end (bounds optional),
+    plus any extra conditions already in `where`.
+    """
+    where = list(where or [])
+    params: list = []
+    if start is not None:
+        where.append("posted_date >= ?")
+        params.append(start)
+    if end is not None:
+        where.append("posted_date < ?")
+        params.append(end)
+    return (("WHERE " + " AND ".join(where)) if where else ""), params
+
+
+def _is_month_start(d: Optional[str]) -> bool:
+    return d is None or (len(d) == 10 and d.endswith("-01"))
+
+
+def _with_totals(r: dict) -> dict:
+    r["credits_total"] = from_cents(r["credits_cents"])
+    r["debits_total"] = from_cents(r["debits_cents"])
+    return r
+
+
+def _projection(columns: Optional[Iterable[str]]) -> tuple[str, ...]:
+    if columns is None:
+        return _TX_COLUMNS
+    cols = list(_REQUIRED_COLUMNS)
+    for c in columns:
+        if c not in _READ_COLUMNS:
+            raise ValueError(f"Unknown transaction column: {c}")
+        if c not in cols:
+            cols.append(c)
+    return tuple(cols)
+
+
+def month_bounds(year: int, month: int) -> tuple[str, str]:
+    """
+    Half-open [start, end) posted_date bounds for one month.
+    """
+    if not (1 <= month <= 12):
+        raise ValueError("month must be 1..12")
+    start = f"{year:04d}-{month:02d}-01"
+    end = f"{year + 1:04d}-01-01" if month == 12 else f"{year:04d}-{month + 1:02d}-01"
+    return start, end
+
+
+def _enter_bulk_mode(conn: sqlite3.Connection) -> int:
+    # Only the fsyncs are relaxed: the on-disk journal stays, so a killed
+    # process still rolls back cleanly on the next open
+    saved = conn.execute("PRAGMA synchronous").fetchone()[0]
+    conn.execute("PRAGMA synchronous = NORMAL")
+    return saved
+
+
+def _exit_bulk_mode(conn: sqlite3.Connection, saved: int) -> None:
+    conn.execute(f"PRAGMA synchronous = {int(saved)}")
+
+
+def _migrate_v1(conn: sqlite3.Connection) -> None:
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS transactions (
+            id TEXT PRIMARY KEY,
+            posted_date TEXT NOT NULL,
+            amount REAL NOT NULL,
+            direction TEXT NOT NULL,
+            name TEXT,
+            memo TEXT,
+            type TEXT,
+            checknum TEXT,
+            source_file TEXT,
+            raw_json TEXT,
+            tags_json TEXT,
+            notes TEXT
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tx_posted_date ON transactions(posted_date)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tx_amount ON transactions(amount)")
+
+
+def _migrate_v2(conn: sqlite3.Connection) -> None:
+    # A STORED generated column can't be added with ALTER TABLE, so rebuild the table
+    cols = (
+        "id, posted_date, amount, direction, name, memo, type, checknum, "
+        "source_file, raw_json, tags_json, notes"
+    )
+    conn.execute("""
+        CREATE TABLE transactions_v2 (
+            id TEXT PRIMARY KEY,
+            posted_date TEXT NOT NULL,
+            amount REAL NOT NULL,
+            direction TEXT NOT NULL,
+            name TEXT,
+            memo TEXT,
+            type TEXT,
+            checknum TEXT,
+            source_file TEXT,
+            raw_json TEXT,
+            tags_json TEXT,
+            notes TEXT,
+            ym TEXT GENERATED ALWAYS AS (SUBSTR(posted_date, 1, 7)) STORED
+        )
+    """)
+    conn.execute(f"INSERT INTO transactions_v2 ({cols}) SELECT {cols} FROM transactions ORDER BY rowid")
+    conn.execute("DROP TABLE transactions")
+    conn.execute("ALTER TABLE transactions_v2 RENAME TO transactions")
+
+    # Serves half-open date ranges *and* the report ordering without a sort step
+    conn.execute("CREATE INDEX idx_tx_date_absamt ON transactions(posted_date, ABS(amount))")
+    conn.execute("CREATE INDEX idx_tx_amount ON transactions(amount)")
+
+
+def _migrate_v3(conn: sqlite3.Connection) -> None:
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS monthly_rollups (
+            ym TEXT PRIMARY KEY,
+            count INTEGER NOT NULL DEFAULT 0,
+            credits_count INTEGER NOT NULL DEFAULT 0,
+            debits_count INTEGER NOT NULL DEFAULT 0,
+            credits_total REAL NOT NULL DEFAULT 0,
+            debits_total REAL NOT NULL DEFAULT 0
+        )
+    """)
+    # Replaced by integer-cents rollups in v6
+    conn.execute("""
+        INSERT INTO monthly_rollups (ym, count, credits_count, debits_count, credits_total, debits_total)
+        SELECT ym, COUNT(*), SUM(amount > 0), SUM(amount <= 0),
+               TOTAL(CASE WHEN amount > 0 THEN amount END),
+               TOTAL(CASE WHEN amount <= 0 THEN amount END)
+        FROM transactions GROUP BY ym
+    """)
+
+
+def _migrate_v4(conn: sqlite3.Connection) -> None:
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS tx_classifications (
+            tx_id TEXT PRIMARY KEY,
+            fingerprint TEXT NOT NULL,
+            category TEXT,
+            confidence TEXT,
+            note TEXT
+        )
+    """)
+
+
+def _migrate_v5(conn: sqlite3.Connection) -> None:
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS imports (
+            content_hash TEXT PRIMARY KEY,
+            path TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            mtime REAL NOT NULL,
+            row_count INTEGER NOT NULL,
+            inserted INTEGER NOT NULL,
+            imported_at TEXT NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_imports_path ON imports(path, size, mtime)")
+
+
+def _migrate_v6(conn: sqlite3.Connection) -> None:
+    # Exact integer cents alongside the legacy REAL amount
+    conn.execute("ALTER TABLE transactions ADD COLUMN amount_cents INTEGER NOT NULL DEFAULT 0")
+    # Through to_cents() itself: SQL ROUND(amount * 100) disagrees with it on
+    # some half cents (1.005 * 100 == 100.4999...)
+    conn.create_function("to_cents", 1, to_cents, deterministic=True)
+    conn.execute("UPDATE transactions SET amount_cents = to_cents(amount)")
+
+    conn.execute("DROP INDEX IF EXISTS idx_tx_amount")
+    conn.execute("DROP INDEX IF EXISTS idx_tx_date_absamt")
+    conn.execute("CREATE INDEX idx_tx_date_abscents ON transactions(posted_date, ABS(amount_cents))")
+
+    conn.execute("DROP TABLE IF EXISTS monthly_rollups")
+    conn.execute("""
+        CREATE TABLE monthly_rollups (
+            ym TEXT PRIMARY KEY,
+            count INTEGER NOT NULL DEFAULT 0,
+            credits_count INTEGER NOT NULL DEFAULT 0,
+            debits_count INTEGER NOT NULL DEFAULT 0,
+            credits_cents INTEGER NOT NULL DEFAULT 0,
+            debits_cents INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    _rebuild_rollups(conn)
+
+
+def _migrate_v7(conn: sqlite3.Connection) -> None:
+    # Builds without FTS5 skip the index; search_transactions() then uses LIKE
+    try:
+        conn.execute("""
+            CREATE VIRTUAL TABLE tx_fts USING fts5(
+                name, memo, checknum, content='transactions', content_rowid='rowid'
+            )
+        """)
+    except sqlite3.OperationalError as e:
+        if "fts5" not in str(e):
+            raise
+        return
+    conn.execute("INSERT INTO tx_fts (tx_fts) VALUES ('rebuild')")
+
+
+def _migrate_v8(conn: sqlite3.Connection) -> None:
+    # Needs-review flags (first matching REVIEW_RULES entry per transaction).
+    # Left empty here: review_flags_state has no fingerprint yet, so the store
+    # fills it from the configured rules on first use.
+    conn.execute("""
+        CREATE TABLE review_flags (
+            tx_id TEXT PRIMARY KEY,
+            posted_date TEXT NOT NULL,
+            rule_id TEXT NOT NULL,
+            reason TEXT NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX idx_review_flags_date ON review_flags(posted_date)")
+    conn.execute("""
+        CREATE TABLE review_flags_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            fingerprint TEXT NOT NULL
+        )
+    """)
+
+
+def _migrate_v9(conn: sqlite3.Connection) -> None:
+    # Canonical kind (models.transaction.classify_kind), written on insert
+    # from here on. The backfill is a frozen SQL copy of the classifier.
+    conn.execute("ALTER TABLE transactions ADD COLUMN kind TEXT")
+    conn.execute("""
+        UPDATE transactions SET kind = CASE
+            WHEN (checknum IS NOT NULL AND checknum != '')
+                 OR UPPER(COALESCE(type, '')) = 'CHECK'
+                 OR INSTR(UPPER(COALESCE(name, '')), 'CHECK') > 0 THEN 'CHECK'
+            WHEN amount > 0 THEN 'CREDIT'
+            WHEN UPPER(COALESCE(type, '')) IN ('XFER', 'TRANSFER')
+                 OR INSTR(UPPER(COALESCE(name, '')), 'TRANSFER') > 0
+                 OR INSTR(UPPER(COALESCE(memo, '')), 'TRANSFER') > 0 THEN 'TRANSFER'
+            WHEN UPPER(COALESCE(type, '')) = 'PAYMENT'
+                 OR INSTR(UPPER(COALESCE(name, '')), 'EPAYMENT') > 0
+                 OR INSTR(UPPER(COALESCE(memo, '')), 'EPAYMENT') > 0
+                 OR INSTR(UPPER(COALESCE(name, '')), 'CARD PAYMENT') > 0
+                 OR INSTR(UPPER(COALESCE(memo, '')), 'CARD PAYMENT') > 0
+                 OR INSTR(UPPER(COALESCE(name, '')), 'CARD PMT') > 0
+                 OR INSTR(UPPER(COALESCE(memo, '')), 'CARD PMT') > 0 THEN 'CARD_PAYMENT'
+            ELSE 'OTHER_DEBIT' END
+    """)
+    conn.execute("CREATE INDEX idx_tx_kind ON transactions(kind, posted_date)")
+
+
+# (version, migration) in order; PRAGMA user_version records the last one applied
+_MIGRATIONS = [
+    (1, _migrate_v1),
+    (2, _migrate_v2),
+    (3, _migrate_v3),
+    (4, _migrate_v4),
+    (5, _migrate_v5),
+    (6, _migrate_v6),
+    (7, _migrate_v7),
+    (8, _migrate_v8),
+    (9, _migrate_v9),
+]
+
+SCHEMA_VERSION = _MIGRATIONS[-1][0]
 
 
 class SQLiteStore:
-    def __init__(self, db_path: str = "data/simplebook.db"):
+    """
+    SQLite-backed ledger.
+
+    Holds one long-lived connection per thread (so threaded callers each get
+    their own), reused by every method. Use as a context manager, or call
+    close(), to release them.
+    """
+
+    def __init__(self, db_path: str = "data/simplebook.db", review_rules=None):
+        """
+        review_rules: compiled rules (rules.review_rules.compile_review_rules)
+        to flag rows with; by default the configured REVIEW_RULES, loaded on
+        the first write or review query (a bad setting warns and falls back
+        to the defaults, so it never fails that write).
+        """
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._conns: list[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._schema_ready = False
+        self._review = review_rules
+        self._review_sql: Optional[tuple] = None
+        self._review_synced = False
+        self._known: Optional[KnownIdFilter] = None
+
+    def __enter__(self) -> "SQLiteStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
 
     def connect(self) -> sqlite3.Connection:
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+        """
+        Returns this thread's connection, opening it on first use.
+        Safe to use as `with store.connect() as conn:` (commits, does not close).
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # check_same_thread=False only so close() can release every thread's
+            # connection; each connection is still used by its own thread alone
+            conn = sqlite3.connect(self.db_path, cached_statements=256, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+            with self._lock:
+                self._conns.append(conn)
         return conn
 
+    def close(self) -> None:
+        with self._lock:
+            conns, self._conns = self._conns, []
+            self._local = threading.local()
+        for conn in conns:
+            conn.close()
+
+    def change_token(self) -> tuple[int, int]:
+        """
+        Cheap value that changes whenever the database content may have:
+        PRAGMA data_version moves on other connections' commits,
+        total_changes on this connection's own writes. Cache keys use it.
+        """
+        conn = self.connect()
+        return conn.execute("PRAGMA data_version").fetchone()[0], conn.total_changes
+
+    def schema_version(self) -> int:
+        return int(self.connect().execute("PRAGMA user_version").fetchone()[0])
+
     def init_db(self) -> None:
-        with self.connect() as conn:
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS transactions (
-                    id TEXT PRIMARY KEY,
-                    posted_date TEXT NOT NULL,
-                    amount REAL NOT NULL,
-                    direction TEXT NOT NULL,
-                    name TEXT,
-                    memo TEXT,
-                    type TEXT,
-                    checknum TEXT,
-                    source_file TEXT,
-                    raw_json TEXT,
-                    tags_json TEXT,
-                    notes TEXT
-                )
-            """)
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_tx_posted_date ON transactions(posted_date)")
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_tx_amount ON transactions(amount)")
-            conn.commit()
+        """
+        Brings the schema up to SCHEMA_VERSION. Runs the DDL only when the
+        database is behind; after that it is a no-op for this store.
+        """
+        if self._schema_ready:
+            return
+
+        conn = self.connect()
+        if self.schema_version() < SCHEMA_VERSION:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Re-read under the write lock in case another process migrated first
+                current = self.schema_version()
+                for version, migrate in _MIGRATIONS:
+                    if version > current:
+                        migrate(conn)
+                        conn.execute(f"PRAGMA user_version = {version}")
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
 
-    def upsert_transactions(self, txs: Iterable[Transaction]) -> int:
+        self._schema_ready = True
+
+    def upsert_transactions(
+        self,
+        txs: Iterable[Transaction],
+        bulk: bool = False,
+        chunk_size: int = 5000,
+        known: Optional[KnownIdFilter] = None,
+    ) -> int:
         """
         Inserts transactions; skips duplicates by primary key (id).
         Returns count inserted (not total seen).
+
+        Rows go in with executemany, one transaction per chunk_size rows.
+        bulk=True instead writes the whole call as one transaction, updates
+        the derived tables once at the end, and sets synchronous=NORMAL
+        meanwhile (for large imports). A failure or killed process loses
+        the whole call; the rollback journal is kept, so the database is
+        never left corrupt, short of a power loss at the wrong moment on a
+        filesystem without ordered writes.
+
+        known (from load_known_ids) drops rows the store already has before
+        they are serialised or sent to SQL; its stats record hits/misses.
+        The ids inserted here are added to it (and to the store's cached
+        filter, if one was loaded).
+        """
+        return self._upsert(txs, _get_id, _tx_row, bulk, chunk_size, known)
+
+    def upsert_batch(
+        self,
+        batch: TransactionBatch,
+        bulk: bool = False,
+        chunk_size: int = 5000,
+        known: Optional[KnownIdFilter] = None,
+    ) -> int:
+        """
+        upsert_transactions() for a TransactionBatch, straight from its
+        tuples without building Transaction objects.
+        """
+        return self._upsert(batch.rows, _first, _batch_row, bulk, chunk_size, known)
+
+    def _upsert(self, items: Iterable, get_id, to_row, bulk: bool, chunk_size: int, known) -> int:
+        conn = self.connect()
+        learners = [f for f in (known, self._known) if f is not None]
+        if len(learners) == 2 and learners[0] is learners[1]:
+            del learners[1]
+        saved = _enter_bulk_mode(conn) if bulk else None
+        try:
+            # `with conn` commits or rolls back before the PRAGMAs are restored:
+            # synchronous can't change inside a transaction
+            with instrument.span("db_write") as sp, conn:
+                inserted = 0
+                watermark = None
+                for chunk in _chunked(items, chunk_size):
+                    sp.rows += len(chunk)
+                    if known is not None:
+                        chunk = self._prefilter(conn, chunk, get_id, known)
+                        if not chunk:
+                            continue
+                    rows = [to_row(x) for x in chunk]
+                    if bulk:
+                        # One transaction for the whole call; the derived tables
+                        # catch up once at the end instead of per chunk
+                        if watermark is None:
+                            watermark, review_sql = self._begin_write(conn)
+                        inserted += _insert_rows(conn, rows)
+                    else:
+                        inserted += self._write_chunk(conn, rows)
+                        conn.commit()
+                    for f in learners:
+                        for x in chunk:
+                            f.add(get_id(x))
+                if inserted and watermark is not None:
+                    _apply_new_rows(conn, watermark, review_sql)
+                instrument.count("db.inserted", inserted)
+                return inserted
+        finally:
+            if saved is not None:
+                if conn.in_transaction:
+                    conn.rollback()
+                _exit_bulk_mode(conn, saved)
+
+    def load_known_ids(self) -> KnownIdFilter:
+        """
+        The store's KnownIdFilter over every stored transaction id. The first
+        call builds it (one index scan); after that it is reused, kept
+        current by every insert through this store. Stats restart per call.
+
+        Rows written by another process or store object aren't in it; that
+        only means they reach SQL, where INSERT OR IGNORE still drops them.
+        """
+        from ledger.known_ids import KnownIdFilter, KnownIdStats
+
+        if self._known is None:
+            cur = self.connect().execute("SELECT id FROM transactions")
+            self._known = KnownIdFilter(r[0] for r in cur)
+        self._known.stats = KnownIdStats()
+        return self._known
+
+    def _prefilter(self, conn: sqlite3.Connection, chunk: list, get_id, known: KnownIdFilter) -> list:
+        stats = known.stats
+        stats.checked += len(chunk)
+
+        hits = [i for i in map(get_id, chunk) if known.might_contain(i)]
+        stats.hits += len(hits)
+        stats.misses += len(chunk) - len(hits)
+        if not hits:
+            return chunk
+
+        # Hashes can collide: only drop ids the table really has
+        stored: set[str] = set()
+        for ids in _chunked(hits, _MAX_IN_PARAMS):
+            marks = ", ".join("?" for _ in ids)
+            stored.update(r[0] for r in conn.execute(f"SELECT id FROM transactions WHERE id IN ({marks})", ids))
+        stats.false_positives += sum(1 for i in hits if i not in stored)
+
+        return [x for x in chunk if get_id(x) not in stored]
+
+    def _write_chunk(self, conn: sqlite3.Connection, rows: list[tuple]) -> int:
+        """
+        Inserts one chunk and updates derived tables in a single write
+        transaction (left open for the caller to commit). Returns rows inserted.
+        """
+        watermark, review_sql = self._begin_write(conn)
+        inserted = _insert_rows(conn, rows)
+        if inserted:
+            _apply_new_rows(conn, watermark, review_sql)
+        return inserted
+
+    def _begin_write(self, conn: sqlite3.Connection) -> tuple[int, Optional[tuple]]:
+        """
+        Opens the write transaction (if needed) and returns the rowid
+        watermark plus the review INSERT for _apply_new_rows().
+        """
+        if not conn.in_transaction:
+            # Take the write lock up front so the rowid watermark can't race another writer
+            conn.execute("BEGIN IMMEDIATE")
+        review_sql = self._sync_review_flags(conn)
+        watermark = conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM transactions").fetchone()[0]
+        return watermark, review_sql
+
+    def rebuild_rollups(self) -> int:
+        """
+        Recomputes monthly_rollups from scratch. Returns number of months.
+        """
+        with self.connect() as conn:
+            _rebuild_rollups(conn)
+        return len(self.list_months())
+
+    def get_rollup(self, ym: str) -> Optional[dict]:
+        """
+        Returns the stored aggregates for one 'YYYY-MM' (or None if empty):
+        count, credits_count, debits_count, credits_cents, debits_cents and
+        credits_total/debits_total (the cents as amounts).
+        """
+        with instrument.span("db_read"):
+            row = self.connect().execute(
+                "SELECT * FROM monthly_rollups WHERE ym = ?", (ym,)
+            ).fetchone()
+        return _with_totals(dict(row)) if row else None
+
+    def aggregate_totals(self, start: Optional[str] = None, end: Optional[str] = None) -> dict:
+        """
+        count/credits_count/debits_count/credits_cents/debits_cents (plus
+        credits_total/debits_total) over start <= posted_date < end.
+        Month-aligned ranges are answered from monthly_rollups; anything
+        else aggregates the transactions directly. Sums are exact cents.
+        """
+        keys = ("count", "credits_count", "debits_count", "credits_cents", "debits_cents")
+
+        if _is_month_start(start) and _is_month_start(end):
+            where = []
+            params: list = []
+            if start is not None:
+                where.append("ym >= ?")
+                params.append(start[:7])
+            if end is not None:
+                where.append("ym < ?")
+                params.append(end[:7])
+            where_sql = ("WHERE " + " AND ".join(where)) if where else ""
+            sql = f"""
+                SELECT COALESCE(SUM(count), 0), COALESCE(SUM(credits_count), 0),
+                       COALESCE(SUM(debits_count), 0), COALESCE(SUM(credits_cents), 0),
+                       COALESCE(SUM(debits_cents), 0)
+                FROM monthly_rollups {where_sql}
+            """
+        else:
+            where_sql, params = _range_where(start, end)
+            sql = f"""
+                SELECT COUNT(*), COALESCE(SUM(amount_cents > 0), 0), COALESCE(SUM(amount_cents <= 0), 0),
+                       COALESCE(SUM(CASE WHEN amount_cents > 0 THEN amount_cents END), 0),
+                       COALESCE(SUM(CASE WHEN amount_cents <= 0 THEN amount_cents END), 0)
+                FROM transactions {where_sql}
+            """
+
+        with instrument.span("db_read"):
+            row = self.connect().execute(sql, params).fetchone()
+        return _with_totals(dict(zip(keys, row)))
+
+    def top_spend(
+        self,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        n: int = 10,
+    ) -> list[tuple[str, float]]:
+        """
+        Top-N (vendor, total spend) over debits in the range, largest first.
+        """
+        where_sql, params = _range_where(start, end, ["amount_cents < 0"])
+        sql = f"""
+            SELECT {VENDOR_KEY_SQL} AS vendor, SUM(-amount_cents) AS total
+            FROM transactions {where_sql}
+            GROUP BY vendor
+            ORDER BY total DESC, vendor
+            LIMIT ?
+        """
+        with instrument.span("db_read"):
+            rows = self.connect().execute(sql, params + [n]).fetchall()
+        return [(r[0], from_cents(r[1])) for r in rows]
+
+    def top_spend_by_kind(
+        self,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        n: int = 10,
+    ) -> dict[str, list[tuple[str, float]]]:
         """
-        import json
+        Top-N (vendor, total spend) per kind over debits in the range.
+        Only kinds with spend appear in the result.
+        """
+        where_sql, params = _range_where(start, end, ["amount_cents < 0"])
+        sql = f"""
+            SELECT kind, vendor, total FROM (
+                SELECT kind, vendor, total,
+                       ROW_NUMBER() OVER (PARTITION BY kind ORDER BY total DESC, vendor) AS rn
+                FROM (
+                    SELECT kind, {VENDOR_KEY_SQL} AS vendor, SUM(-amount_cents) AS total
+                    FROM transactions {where_sql}
+                    GROUP BY kind, vendor
+                )
+            )
+            WHERE rn <= ?
+            ORDER BY kind, rn
+        """
+        out: dict[str, list[tuple[str, float]]] = {}
+        with instrument.span("db_read"):
+            rows = self.connect().execute(sql, params + [n]).fetchall()
+        for kind, vendor, total in rows:
+            out.setdefault(kind, []).append((vendor, from_cents(total)))
+        return out
 
-        inserted = 0
+    def rebuild_search_index(self) -> bool:
+        """
+        Rebuilds the full-text index from the transactions table, creating it
+        if this SQLite has FTS5 and the table is missing. Returns False when
+        FTS5 isn't available (search stays on the LIKE fallback).
+        """
         with self.connect() as conn:
-            cur = conn.cursor()
-            for tx in txs:
+            if not _has_fts(conn):
                 try:
-                    cur.execute("""
-                        INSERT OR IGNORE INTO transactions
-                        (id, posted_date, amount, direction, name, memo, type, checknum, source_file, raw_json, tags_json, notes)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        tx.id,
-                        tx.posted_date,
-                        tx.amount,
-                        tx.direction,
-                        tx.name,
-                        tx.memo,
-                        tx.type,
-                        tx.checknum,
-                        tx.source_file,
-                        json.dumps(tx.raw, ensure_ascii=False),
-                        json.dumps(list(tx.tags), ensure_ascii=False),
-                        tx.notes,
-                    ))
-                    if cur.rowcount == 1:
-                        inserted += 1
-                except sqlite3.IntegrityError:
-                    # should be covered by OR IGNORE, but keep safe
-                    pass
-            conn.commit()
-        return inserted
+                    conn.execute(_FTS_CREATE_SQL)
+                except sqlite3.OperationalError as e:
+                    if "fts5" not in str(e):
+                        raise
+                    return False
+            conn.execute("INSERT INTO tx_fts (tx_fts) VALUES ('rebuild')")
+        return True
+
+    def search_transactions(
+        self,
+        text: str,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        limit: int = 50,
+        columns: Optional[Iterable[str]] = None,
+    ) -> List[Transaction]:
+        """
+        Transactions whose name, memo or check number contain every term of
+        `text` (as word prefixes), over start <= posted_date < end.
+
+        Ranked best match first (bm25, then newest) via the tx_fts index;
+        without FTS5 falls back to a LIKE scan, newest first.
+        """
+        terms = text.split()
+        if not terms:
+            return []
+
+        cols = _projection(columns)
+        conn = self.connect()
+        if _has_fts(conn):
+            where_sql, params = _range_where(start, end, ["tx_fts MATCH ?"])
+            sql = f"""
+                SELECT {', '.join('t.' + c for c in cols)}
+                FROM tx_fts JOIN transactions t ON t.rowid = tx_fts.rowid
+                {where_sql}
+                ORDER BY bm25(tx_fts), t.posted_date DESC
+                LIMIT ?
+            """
+            params = [_fts_query(text)] + params
+        else:
+            match = []
+            like: list = []
+            for term in terms:
+                pat = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+                match.append(
+                    "(name LIKE ? ESCAPE '\\' OR memo LIKE ? ESCAPE '\\' OR checknum LIKE ? ESCAPE '\\')"
+                )
+                like += [pat, pat, pat]
+            where_sql, params = _range_where(start, end, match)
+            params = like + params
+            sql = f"""
+                SELECT {', '.join(cols)} FROM transactions {where_sql}
+                ORDER BY posted_date DESC
+                LIMIT ?
+            """
+        params.append(limit)
+
+        with instrument.span("db_read") as sp:
+            rows = conn.execute(sql, params).fetchall()
+            sp.rows = len(rows)
+        from_row = StoredTransaction.from_store_row
+        return [from_row(cols, r) for r in rows]
+
+    def _review_rules(self):
+        if self._review is None:
+            from rules.review_rules import configured_review_rules
+
+            self._review = configured_review_rules()
+        return self._review
+
+    def _sync_review_flags(self, conn: sqlite3.Connection) -> Optional[tuple]:
+        """
+        Returns the review INSERT for new rows (None if there are no rules).
+        The first time per store, flags computed under different rules (or
+        never computed) are rebuilt; the caller commits.
+        """
+        review = self._review_rules()
+        if self._review_sql is None and review.rules:
+            self._review_sql = _review_flags_sql(review)
+        if not self._review_synced:
+            row = conn.execute("SELECT fingerprint FROM review_flags_state WHERE id = 1").fetchone()
+            if row is None or row[0] != review.fingerprint:
+                self._rebuild_review_flags(conn)
+            self._review_synced = True
+        return self._review_sql
+
+    def _rebuild_review_flags(self, conn: sqlite3.Connection) -> None:
+        review = self._review_rules()
+        if self._review_sql is None and review.rules:
+            self._review_sql = _review_flags_sql(review)
+        conn.execute("DELETE FROM review_flags")
+        if self._review_sql is not None:
+            sql, params = self._review_sql
+            conn.execute(sql, params + (0,))
+        conn.execute(
+            "INSERT OR REPLACE INTO review_flags_state (id, fingerprint) VALUES (1, ?)",
+            (review.fingerprint,),
+        )
+
+    def rebuild_review_flags(self) -> int:
+        """
+        Re-evaluates the review rules over every transaction. Returns the
+        number of flagged rows.
+        """
+        with self.connect() as conn:
+            self._rebuild_review_flags(conn)
+            self._review_synced = True
+            return conn.execute("SELECT COUNT(*) FROM review_flags").fetchone()[0]
+
+    def list_review_flags(
+        self,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        limit: int = -1,
+        columns: Optional[Iterable[str]] = None,
+    ) -> list[tuple[Transaction, str, str]]:
+        """
+        (transaction, rule_id, reason) for rows flagged for review with
+        start <= posted_date < end, newest first (largest amounts first
+        within a day). Served from the review_flags index.
+        """
+        conn = self.connect()
+        with conn:
+            self._sync_review_flags(conn)
+
+        cols = _projection(columns)
+        where = []
+        params: list = []
+        if start is not None:
+            where.append("f.posted_date >= ?")
+            params.append(start)
+        if end is not None:
+            where.append("f.posted_date < ?")
+            params.append(end)
+        where_sql = ("WHERE " + " AND ".join(where)) if where else ""
+        sql = f"""
+            SELECT {', '.join('t.' + c for c in cols)}, f.rule_id, f.reason
+            FROM review_flags f JOIN transactions t ON t.id = f.tx_id
+            {where_sql}
+            ORDER BY f.posted_date DESC, ABS(t.amount_cents) DESC
+            LIMIT ?
+        """
+        params.append(limit)
+
+        with instrument.span("db_read") as sp:
+            rows = conn.execute(sql, params).fetchall()
+            sp.rows = len(rows)
+        n = len(cols)
+        from_row = StoredTransaction.from_store_row
+        return [(from_row(cols, r[:n]), r[n], r[n + 1]) for r in rows]
+
+    def count_review_flags(self) -> list[tuple[str, int]]:
+        """
+        (YYYY-MM, flagged count) for every month with flags, newest first.
+        """
+        conn = self.connect()
+        with conn:
+            self._sync_review_flags(conn)
+        rows = conn.execute("""
+            SELECT substr(posted_date, 1, 7) AS ym, COUNT(*) FROM review_flags
+            GROUP BY ym ORDER BY ym DESC
+        """).fetchall()
+        return [(r[0], int(r[1])) for r in rows]
+
+    def get_classifications(self, ids: Iterable[str], fingerprint: str) -> dict[str, tuple]:
+        """
+        Cached (category, confidence, note) per tx id, only where the entry
+        was made under `fingerprint` (i.e. the current rule set).
+        """
+        out: dict[str, tuple] = {}
+        conn = self.connect()
+        for chunk in _chunked(ids, _MAX_IN_PARAMS):
+            marks = ", ".join("?" for _ in chunk)
+            sql = f"""
+                SELECT tx_id, category, confidence, note FROM tx_classifications
+                WHERE fingerprint = ? AND tx_id IN ({marks})
+            """
+            for r in conn.execute(sql, [fingerprint] + chunk):
+                out[r[0]] = (r[1], r[2], r[3])
+        return out
+
+    def put_classifications(self, fingerprint: str, items: Iterable[tuple]) -> None:
+        """
+        Stores (tx_id, category, confidence, note) rows under `fingerprint`,
+        replacing whatever was cached for those ids.
+        """
+        with self.connect() as conn:
+            conn.executemany(
+                """
+                INSERT OR REPLACE INTO tx_classifications (tx_id, fingerprint, category, confidence, note)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                ((tx_id, fingerprint, cat, conf, note) for tx_id, cat, conf, note in items),
+            )
+
+    def find_import(
+        self,
+        content_hash: Optional[str] = None,
+        path: Optional[str] = None,
+        size: Optional[int] = None,
+        mtime: Optional[float] = None,
+    ) -> Optional[dict]:
+        """
+        Looks up the import manifest by content hash, or by (path, size, mtime)
+        for a cheap check before hashing. Returns the manifest row or None.
+        """
+        conn = self.connect()
+        if content_hash is not None:
+            row = conn.execute("SELECT * FROM imports WHERE content_hash = ?", (content_hash,)).fetchone()
+        else:
+            row = conn.execute(
+                "SELECT * FROM imports WHERE path = ? AND size = ? AND mtime = ?",
+                (path, size, mtime),
+            ).fetchone()
+        return dict(row) if row else None
+
+    def record_import(
+        self,
+        content_hash: str,
+        path: str,
+        size: int,
+        mtime: float,
+        row_count: int,
+        inserted: int,
+    ) -> None:
+        with self.connect() as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO imports
+                (content_hash, path, size, mtime, row_count, inserted, imported_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (content_hash, path, size, mtime, row_count, inserted,
+                 datetime.now().isoformat(timespec="seconds")),
+            )
+
+    def list_imports(self) -> list[dict]:
+        """
+        Import manifest rows, most recent first.
+        """
+        rows = self.connect().execute("SELECT * FROM imports ORDER BY imported_at DESC, path").fetchall()
+        return [dict(r) for r in rows]
 
     def count_transactions(self) -> int:
         with self.connect() as conn:
@@ -86,67 +1095,127 @@ class SQLiteStore:
         self,
         year: Optional[int] = None,
         month: Optional[int] = None,
-        limit: int = 50
+        limit: int = 50,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        columns: Optional[Iterable[str]] = None,
+        kind: Optional[str] = None,
     ) -> List[Transaction]:
         """
-        Returns newest-first by posted_date.
-        """
-        import json
+        Returns newest-first by posted_date (then largest amounts first).
 
-        where = []
-        params = []
+        Filter by year+month, or by a half-open posted_date range
+        start <= posted_date < end (either bound optional, 'YYYY-MM-DD'),
+        and optionally to one kind (models.transaction.KINDS; indexed).
+
+        columns limits the SELECT to those columns (id/posted_date/amount/
+        direction are always included); see REPORT_COLUMNS. Rows come back
+        as StoredTransaction, which decodes raw/tags only when touched.
+        """
+        cols = _projection(columns)
 
         if year is not None and month is not None:
-            prefix = f"{year:04d}-{month:02d}-"
-            where.append("posted_date LIKE ?")
-            params.append(prefix + "%")
+            start, end = month_bounds(year, month)
 
-        where_sql = ("WHERE " + " AND ".join(where)) if where else ""
+        where_sql, params = _range_where(start, end, ["kind = ?"] if kind is not None else None)
+        if kind is not None:
+            params.insert(0, kind)
         sql = f"""
-            SELECT * FROM transactions
+            SELECT {', '.join(cols)} FROM transactions
             {where_sql}
-            ORDER BY posted_date DESC, ABS(amount) DESC
+            ORDER BY posted_date DESC, ABS(amount_cents) DESC
             LIMIT ?
         """
         params.append(limit)
 
-        out: List[Transaction] = []
-        with self.connect() as conn:
+        with instrument.span("db_read") as sp, self.connect() as conn:
             rows = conn.execute(sql, params).fetchall()
-            for r in rows:
-                raw = json.loads(r["raw_json"]) if r["raw_json"] else {}
-                tags = tuple(json.loads(r["tags_json"])) if r["tags_json"] else tuple()
-                out.append(Transaction(
-                    id=r["id"],
-                    posted_date=r["posted_date"],
-                    amount=float(r["amount"]),
-                    direction=r["direction"],
-                    name=r["name"],
-                    memo=r["memo"],
-                    type=r["type"],
-                    checknum=r["checknum"],
-                    source_file=r["source_file"],
-                    raw=raw,
-                    tags=tags,
-                    notes=r["notes"],
-                ))
-        return out
+            sp.rows = len(rows)
+        from_row = StoredTransaction.from_store_row
+        with instrument.span("rehydrate", len(rows)):
+            return [from_row(cols, r) for r in rows]
+
+    def list_by_month(
+        self,
+        year: int,
+        month: int,
+        limit: int = 5000,
+        columns: Optional[Iterable[str]] = None,
+    ) -> List[Transaction]:
+        return self.list_transactions(year=year, month=month, limit=limit, columns=columns)
+
+    def iter_transactions(
+        self,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        columns: Optional[Iterable[str]] = None,
+        batch_size: int = 1000,
+    ) -> Iterator[Transaction]:
+        """
+        Streams transactions oldest-first over start <= posted_date < end,
+        fetching batch_size rows at a time, so memory stays bounded however
+        large the range is.
+        """
+        cols = _projection(columns)
+        where_sql, params = _range_where(start, end)
+        sql = f"SELECT {', '.join(cols)} FROM transactions {where_sql} ORDER BY posted_date"
+
+        from_row = StoredTransaction.from_store_row
+        cur = self.connect().execute(sql, params)
+        try:
+            while True:
+                with instrument.span("db_read") as sp:
+                    rows = cur.fetchmany(batch_size)
+                    sp.rows = len(rows)
+                if not rows:
+                    return
+                with instrument.span("rehydrate", len(rows)):
+                    txs = [from_row(cols, r) for r in rows]
+                yield from txs
+        finally:
+            cur.close()
 
-    def list_by_month(self, year: int, month: int, limit: int = 5000) -> List[Transaction]:
-        if not (1 <= month <= 12):
-            raise ValueError("month must be 1..12")
+    def iter_row_batches(
+        self,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        columns: Optional[Iterable[str]] = None,
+        batch_size: int = 5000,
+    ) -> Iterator[list[tuple]]:
+        """
+        Streams plain row tuples oldest-first over start <= posted_date < end,
+        one fetchmany batch at a time; no Transaction objects are built.
+        columns are exactly the columns returned, in that order (default:
+        every EXPORT_COLUMNS entry).
+        """
+        cols = tuple(EXPORT_COLUMNS if columns is None else columns)
+        for c in cols:
+            if c not in EXPORT_COLUMNS:
+                raise ValueError(f"Unknown transaction column: {c}")
 
-        return self.list_transactions(year=year, month=month, limit=limit)
+        where_sql, params = _range_where(start, end)
+        cur = self.connect().cursor()
+        cur.row_factory = None      # plain tuples, not sqlite3.Row
+        cur.execute(f"SELECT {', '.join(cols)} FROM transactions {where_sql} ORDER BY posted_date", params)
+        try:
+            while True:
+                with instrument.span("db_read") as sp:
+                    rows = cur.fetchmany(batch_size)
+                    sp.rows = len(rows)
+                if not rows:
+                    return
+                yield rows
+        finally:
+            cur.close()
 
     def list_months(self) -> list[tuple[str, int]]:
         """
         Returns a list of (YYYY-MM, count) sorted newest-first.
         """
         sql = """
-            SELECT SUBSTR(posted_date, 1, 7) AS ym, COUNT(*) AS c
-            FROM transactions
-            WHERE posted_date IS NOT NULL AND posted_date != ''
-            GROUP BY ym
+            SELECT ym, count AS c
+            FROM monthly_rollups
+            WHERE count > 0 AND ym IS NOT NULL AND ym != ''
             ORDER BY ym DESC
         """
         with self.connect() as conn:
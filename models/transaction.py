@@ -1,9 +1,10 @@
 from __future__ import annotations
 
+import json
 from dataclasses import dataclass, field
 from datetime import datetime
 from hashlib import sha1
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Sequence
 
 
 def _clean_str(s: Optional[str]) -> Optional[str]:
@@ -13,6 +14,57 @@ def _clean_str(s: Optional[str]) -> Optional[str]:
     return s2 if s2 else None
 
 
+def to_cents(amount: float) -> int:
+    """
+    Amount -> exact integer cents (what the store sums and indexes).
+    Half cents round away from zero (ROUND_HALF_UP on the decimal value).
+    """
+    cents = amount * 100
+    nearest = round(cents)
+    if abs(cents - nearest) < 0.25:
+        # Nowhere near a half cent: every rounding rule agrees
+        return nearest
+    from decimal import ROUND_HALF_UP, Decimal
+
+    return int((Decimal(repr(amount)) * 100).to_integral_value(ROUND_HALF_UP))
+
+
+def from_cents(cents: int) -> float:
+    return cents / 100
+
+
+# Canonical transaction kinds (stored in the transactions.kind column)
+KINDS = ("CHECK", "TRANSFER", "CARD_PAYMENT", "OTHER_DEBIT", "CREDIT")
+
+_TRANSFER_TYPES = ("XFER", "TRANSFER")
+
+
+def classify_kind(
+    amount: float,
+    name: Optional[str],
+    memo: Optional[str],
+    tx_type: Optional[str],
+    checknum: Optional[str],
+) -> str:
+    """
+    The one kind classifier. Precedence: CHECK (either sign), CREDIT
+    (amount > 0), TRANSFER, CARD_PAYMENT, else OTHER_DEBIT.
+    """
+    t = tx_type.upper() if tx_type else ""
+    n = name.upper() if name else ""
+    if checknum or t == "CHECK" or "CHECK" in n:
+        return "CHECK"
+    if amount > 0:
+        return "CREDIT"
+    # One haystack for name and memo; the newline keeps matches from spanning both
+    text = n + "\n" + memo.upper() if memo else n
+    if t in _TRANSFER_TYPES or "TRANSFER" in text:
+        return "TRANSFER"
+    if t == "PAYMENT" or "EPAYMENT" in text or "CARD PAYMENT" in text or "CARD PMT" in text:
+        return "CARD_PAYMENT"
+    return "OTHER_DEBIT"
+
+
 def _stable_fallback_id(
     posted_date: Optional[str],
     amount: float,
@@ -113,6 +165,25 @@ class Transaction:
             raw=raw_copy,
         )
 
+    @staticmethod
+    def from_parser(raw_tx: Dict[str, Any], source_file: Optional[str] = None) -> "Transaction":
+        """
+        Trusted fast path for dicts straight out of ingest.qfx.qfx_reader.
+
+        The parser already stripped strings, validated and normalised the
+        date and converted the amount, so none of that is redone here; the
+        raw dict is owned by us and kept as-is (no copy).
+        """
+        return Transaction(*trusted_fields(raw_tx, source_file))
+
+    @property
+    def amount_cents(self) -> int:
+        return to_cents(self.amount)
+
+    @property
+    def kind(self) -> str:
+        return classify_kind(self.amount, self.name, self.memo, self.type, self.checknum)
+
     def to_dict(self) -> Dict[str, Any]:
         return {
             "id": self.id,
@@ -128,3 +199,142 @@ class Transaction:
             "notes": self.notes,
             "raw": self.raw,
         }
+
+
+def trusted_fields(raw_tx: Dict[str, Any], source_file: Optional[str] = None) -> tuple:
+    """
+    Transaction field values (in field order, through raw) for a parser dict,
+    without re-validation. Same results as from_qfx_dict on parser output.
+    """
+    posted_date = raw_tx.get("posted_date")
+    if not posted_date:
+        raise ValueError(f"Missing posted_date in raw_tx: {raw_tx}")
+
+    amount = raw_tx.get("amount") or 0.0
+    name = raw_tx.get("name") or None
+    memo = raw_tx.get("memo") or None
+    checknum = raw_tx.get("checknum") or None
+
+    tx_id = raw_tx.get("fitid") or _stable_fallback_id(posted_date, amount, name, memo, checknum)
+
+    if source_file is not None:
+        raw_tx.setdefault("_source_file", source_file)
+
+    return (
+        tx_id,
+        posted_date,
+        amount,
+        "credit" if amount > 0 else "debit",
+        name,
+        memo,
+        raw_tx.get("type") or None,
+        checknum,
+        source_file,
+        raw_tx,
+    )
+
+
+# Base-class slot descriptors for the lazily decoded fields
+_RAW_SLOT = Transaction.raw
+_TAGS_SLOT = Transaction.tags
+
+# Columns a store row may carry -> attribute they populate
+_COLUMN_ATTRS = {
+    "id": "id",
+    "posted_date": "posted_date",
+    "amount": "amount",
+    "direction": "direction",
+    "name": "name",
+    "memo": "memo",
+    "type": "type",
+    "checknum": "checknum",
+    "source_file": "source_file",
+    "raw_json": "_raw_json",
+    "tags_json": "_tags_json",
+    "notes": "notes",
+    "kind": "_kind",
+}
+
+_FIELD_NAMES = tuple(Transaction.__dataclass_fields__)
+
+
+def _field_values(t: Transaction) -> tuple:
+    return tuple(getattr(t, f) for f in _FIELD_NAMES)
+
+
+_OPTIONAL_ATTRS = ("name", "memo", "type", "checknum", "source_file", "_raw_json", "_tags_json", "notes", "_kind")
+
+
+class StoredTransaction(Transaction):
+    """
+    A Transaction rehydrated from the store.
+
+    raw and tags stay as their stored JSON text until first accessed, so
+    callers that never look at them never pay for json.loads. Columns left
+    out of a projected query read as None (raw/tags as empty). kind comes
+    from the stored column when it was selected.
+    """
+
+    __slots__ = ("_raw_json", "_tags_json", "_kind")
+
+    def _get_raw(self) -> Dict[str, Any]:
+        try:
+            return _RAW_SLOT.__get__(self)
+        except AttributeError:
+            text = self._raw_json
+            value = json.loads(text) if text else {}
+            _RAW_SLOT.__set__(self, value)
+            return value
+
+    def _set_raw(self, value: Dict[str, Any]) -> None:
+        # Only reachable via object.__setattr__ (dataclass __init__/replace); still frozen otherwise
+        _RAW_SLOT.__set__(self, value)
+
+    def _get_tags(self) -> tuple[str, ...]:
+        try:
+            return _TAGS_SLOT.__get__(self)
+        except AttributeError:
+            text = self._tags_json
+            value = tuple(json.loads(text)) if text else tuple()
+            _TAGS_SLOT.__set__(self, value)
+            return value
+
+    def _set_tags(self, value: tuple[str, ...]) -> None:
+        _TAGS_SLOT.__set__(self, value)
+
+    raw = property(_get_raw, _set_raw)
+    tags = property(_get_tags, _set_tags)
+
+    @property
+    def kind(self) -> str:
+        # Unset after dataclasses.replace(): classify from the fields instead
+        kind = getattr(self, "_kind", None)
+        return kind if kind is not None else Transaction.kind.fget(self)
+
+    def __eq__(self, other):
+        # The dataclass __eq__ only matches the exact class: compare field
+        # values instead, so a stored row equals the Transaction it came from
+        if not isinstance(other, Transaction):
+            return NotImplemented
+        return _field_values(self) == _field_values(other)
+
+    # Defining __eq__ would otherwise drop the inherited hash
+    __hash__ = Transaction.__hash__
+
+    def __reduce__(self):
+        # Pickle as a plain, fully decoded Transaction
+        return (Transaction, _field_values(self))
+
+    @classmethod
+    def from_store_row(cls, columns: Sequence[str], values: Sequence[Any]) -> "StoredTransaction":
+        """
+        Trusted constructor for rows read back from SQLiteStore: no
+        validation or cleaning, values are assumed to be what we stored.
+        """
+        obj = object.__new__(cls)
+        set_ = object.__setattr__
+        for attr in _OPTIONAL_ATTRS:
+            set_(obj, attr, None)
+        for col, value in zip(columns, values):
+            set_(obj, _COLUMN_ATTRS[col], value)
+        return obj
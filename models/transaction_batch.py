@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from models.transaction import Transaction, trusted_fields
+
+# Transaction fields after `raw`, filled with their defaults for every row
+_TAIL_DEFAULTS = ((), None)     # tags, notes
+
+
+class TransactionBatch:
+    """
+    Compact bulk form of many Transactions: one plain tuple per row, in
+    Transaction field order (id, posted_date, ..., raw, tags, notes).
+
+    Cheaper to build and to pickle between processes than a list of
+    dataclass instances. Iterating materialises Transaction objects on demand.
+    """
+
+    __slots__ = ("rows",)
+
+    def __init__(self, rows: Optional[List[tuple]] = None):
+        self.rows: List[tuple] = rows if rows is not None else []
+
+    @classmethod
+    def from_parser(cls, raw_txs: Iterable[Dict[str, Any]], source_file: Optional[str] = None) -> "TransactionBatch":
+        """
+        Builds a batch from qfx_reader output (trusted, see Transaction.from_parser).
+        """
+        tail = _TAIL_DEFAULTS
+        return cls([trusted_fields(raw, source_file) + tail for raw in raw_txs])
+
+    @classmethod
+    def from_transactions(cls, txs: Iterable[Transaction]) -> "TransactionBatch":
+        return cls([
+            (t.id, t.posted_date, t.amount, t.direction, t.name, t.memo, t.type,
+             t.checknum, t.source_file, t.raw, t.tags, t.notes)
+            for t in txs
+        ])
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __iter__(self) -> Iterator[Transaction]:
+        for r in self.rows:
+            yield Transaction(*r)
+
+    def __getitem__(self, i: int) -> Transaction:
+        return Transaction(*self.rows[i])
+
+    def ids(self) -> List[str]:
+        return [r[0] for r in self.rows]
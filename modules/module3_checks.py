@@ -1,19 +1,12 @@
 from __future__ import annotations
-from typing import Iterable
+from typing import Optional
 
-def detect_checks(txs: Iterable[object]) -> list[object]:
+def detect_checks(store, start: Optional[str] = None, end: Optional[str] = None, limit: int = -1) -> list[object]:
     """
-    Returns transactions that look like checks.
+    Returns transactions of kind CHECK over start <= posted_date < end,
+    newest first. An index lookup on the stored kind column, not a scan.
     """
-    checks: list[object] = []
-    for t in txs:
-        t_type = ((getattr(t, "type", "") or "")).upper()
-        name = ((getattr(t, "name", "") or "")).upper()
-        checknum = getattr(t, "checknum", None)
-
-        if checknum or (t_type == "CHECK") or ("CHECK" in name):
-            checks.append(t)
-    return checks
+    return store.list_transactions(start=start, end=end, limit=limit, kind="CHECK")
 
 
 def print_check_debug_sample(checks: list[object]) -> None:
@@ -25,7 +18,6 @@ def print_check_debug_sample(checks: list[object]) -> None:
 
     sample = checks[0]
 
-    print(f"\nDetected checks: {len(checks)}")
     print("\nSample check transaction raw:")
     print("name:", getattr(sample, "name", None))
     print("memo:", getattr(sample, "memo", None))
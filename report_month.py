@@ -1,5 +1,5 @@
-from ledger.sqlite_store import SQLiteStore
-from reports.basic_summary import summarize, top_spend_vendors, top_spend_by_kind_safe
+from ledger.sqlite_store import SQLiteStore, month_bounds
+from reports.pushdown import summarize_range, top_spend_vendors_range, top_spend_by_kind_range
 
 store = SQLiteStore("data/simplebook.db")
 store.init_db()
@@ -7,8 +7,11 @@ store.init_db()
 YEAR = 2025
 MONTH = 11
 
-txs = store.list_transactions(year=YEAR, month=MONTH, limit=10000)
-s = summarize(txs)
+# "sql" pushes the aggregation into SQLite; "python" loads rows and uses reports.basic_summary
+ENGINE = "sql"
+
+start, end = month_bounds(YEAR, MONTH)
+s = summarize_range(store, start, end, engine=ENGINE)
 
 print(f"Month: {YEAR}-{MONTH:02d}")
 print("Count:", s.count)
@@ -17,11 +20,11 @@ print("Debits :", s.debits_count, "Total:", s.debits_total)
 print("Net    :", s.net_total)
 
 print("\nTop spend vendors:")
-for name, total in top_spend_vendors(txs, n=10):
+for name, total in top_spend_vendors_range(store, start, end, n=10, engine=ENGINE):
     print(f"{total:10.2f}  {name}")
 
 print("\nTop spend by kind:")
-buckets = top_spend_by_kind_safe(txs, n=10)
+buckets = top_spend_by_kind_range(store, start, end, n=10, engine=ENGINE)
 for kind, items in buckets.items():
     print(f"\n{kind}:")
     for name, total in items:
@@ -4,9 +4,10 @@ from collections import Counter
 import re
 
 from dataclasses import dataclass
-from typing import Iterable
+from typing import Any, Iterable, Mapping, Optional
 
-from models.transaction import Transaction
+import instrument
+from models.transaction import Transaction, classify_kind, from_cents
 
 
 
@@ -27,15 +28,17 @@ def summarize(txs: Iterable[Transaction]) -> Summary:
     debits_count = 0
     count = 0
 
-    for t in txs:
-        count += 1
-        amt = float(getattr(t, "amount", 0) or 0)
-        if amt > 0:
-            credits_total += amt
-            credits_count += 1
-        else:
-            debits_total += amt  # negative
-            debits_count += 1
+    with instrument.span("summarize") as sp:
+        for t in txs:
+            count += 1
+            amt = float(getattr(t, "amount", 0) or 0)
+            if amt > 0:
+                credits_total += amt
+                credits_count += 1
+            else:
+                debits_total += amt  # negative
+                debits_count += 1
+        sp.rows = count
 
     net = credits_total + debits_total
     return Summary(
@@ -48,6 +51,26 @@ def summarize(txs: Iterable[Transaction]) -> Summary:
     )
 
 
+def summary_from_rollup(r: Optional[Mapping[str, Any]]) -> Summary:
+    """
+    Builds a Summary from rollup-shaped aggregates (SQLiteStore.get_rollup
+    or aggregate_totals), matching what summarize() returns for those rows.
+    """
+    if not r:
+        return Summary(0, 0, 0, 0.0, 0.0, 0.0)
+    # Rollups keep exact integer cents: no float accumulation to round away
+    credits_cents = int(r["credits_cents"])
+    debits_cents = int(r["debits_cents"])
+    return Summary(
+        count=int(r["count"]),
+        credits_count=int(r["credits_count"]),
+        debits_count=int(r["debits_count"]),
+        credits_total=from_cents(credits_cents),
+        debits_total=from_cents(debits_cents),
+        net_total=from_cents(credits_cents + debits_cents),
+    )
+
+
 def top_spend_vendors(txs: Iterable[Transaction], n: int = 10):
     """
     Returns a simple top-N list of spend "vendors" across ALL debit txs.
@@ -63,18 +86,34 @@ def top_spend_vendors(txs: Iterable[Transaction], n: int = 10):
     return [(name, round(total, 2)) for name, total in c.most_common(n)]
 
 
+def top_spend_categories(txs: Iterable[Transaction], results: Iterable[Any], n: int = 10):
+    """
+    Top-N spend by rule category across debit txs, where results[i] is the
+    RuleResult for txs[i]. Debits the rules leave open are "Uncategorized".
+    """
+    c = Counter()
+    for t, r in zip(txs, results):
+        amt = float(getattr(t, "amount", 0) or 0)
+        if amt >= 0:
+            continue
+        c[r.category or "Uncategorized"] += abs(amt)
+    return [(cat, round(total, 2)) for cat, total in c.most_common(n)]
+
+
 # Optional: categorized top spend by kind (safe; won’t KeyError)
 def tx_kind(t: Transaction) -> str:
-    tx_type = (getattr(t, "type", "") or "").upper()
-    name = (getattr(t, "name", "") or "").upper()
-    memo = (getattr(t, "memo", "") or "").upper()
-    checknum = getattr(t, "checknum", None)
-
-    if checknum or tx_type == "CHECK" or "CHECK" in name:
-        return "CHECK"
-    if "TRANSFER" in name or "TRANSFER" in memo or tx_type in ("XFER", "TRANSFER"):
-        return "TRANSFER"
-    return "OTHER_DEBIT"
+    # Stored rows carry the kind precomputed; anything else is classified
+    # from its fields with the same models.transaction.classify_kind
+    kind = getattr(t, "kind", None)
+    if kind is not None:
+        return kind
+    return classify_kind(
+        float(getattr(t, "amount", 0) or 0),
+        getattr(t, "name", None),
+        getattr(t, "memo", None),
+        getattr(t, "type", None),
+        getattr(t, "checknum", None),
+    )
 
 
 def top_spend_by_kind_safe(txs: Iterable[Transaction], n: int = 10):
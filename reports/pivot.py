@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import groupby
+from typing import Iterator, List, Optional, Tuple
+
+from ledger.sqlite_store import REPORT_COLUMNS, SQLiteStore
+from models.transaction import from_cents, to_cents
+from reports.basic_summary import Summary, summarize, top_spend_vendors, tx_kind
+from reports.pushdown import KIND_BUCKETS
+
+
+@dataclass
+class MonthPivot:
+    ym: str
+    summary: Summary
+    spend_by_kind: dict[str, float] = field(default_factory=dict)   # debit spend per kind (positive)
+    top_vendors: List[Tuple[str, float]] = field(default_factory=list)
+
+
+def parse_period(arg: str) -> Tuple[str, str]:
+    """
+    'YYYY' | 'YYYY-MM' | 'YYYY-MM..YYYY-MM' -> inclusive (first_ym, last_ym).
+    """
+    if ".." in arg:
+        first, last = arg.split("..", 1)
+    elif len(arg) == 4:
+        first, last = f"{arg}-01", f"{arg}-12"
+    else:
+        first = last = arg
+
+    for ym in (first, last):
+        y, _, m = ym.partition("-")
+        if not (len(y) == 4 and y.isdigit() and m.isdigit() and 1 <= int(m) <= 12):
+            raise ValueError(f"Bad month '{ym}' (expected YYYY-MM)")
+    first, last = _norm_ym(first), _norm_ym(last)
+    if first > last:
+        raise ValueError(f"Empty period {first}..{last}")
+    return first, last
+
+
+def _norm_ym(ym: str) -> str:
+    y, m = ym.split("-", 1)
+    return f"{int(y):04d}-{int(m):02d}"
+
+
+def _next_ym(ym: str) -> str:
+    y, m = int(ym[:4]), int(ym[5:7])
+    return f"{y + 1:04d}-01" if m == 12 else f"{y:04d}-{m + 1:02d}"
+
+
+def months_between(first_ym: str, last_ym: str) -> List[str]:
+    out = [first_ym]
+    while out[-1] < last_ym:
+        out.append(_next_ym(out[-1]))
+    return out
+
+
+def month_pivot(ym: str, txs, top_n: int = 5) -> MonthPivot:
+    """
+    One month's pivot row, built with the reports.basic_summary functions.
+    """
+    txs = list(txs)
+    spend = Counter()
+    for t in txs:
+        if t.amount < 0:
+            kind = tx_kind(t)
+            spend[kind if kind in KIND_BUCKETS else "OTHER_DEBIT"] += to_cents(-t.amount)
+    return MonthPivot(
+        ym=ym,
+        summary=summarize(txs),
+        spend_by_kind={k: from_cents(spend[k]) for k in KIND_BUCKETS},
+        top_vendors=top_spend_vendors(txs, n=top_n),
+    )
+
+
+def iter_month_pivots(
+    store: SQLiteStore,
+    first_ym: str,
+    last_ym: str,
+    top_n: int = 5,
+) -> Iterator[MonthPivot]:
+    """
+    Streams one MonthPivot per month in [first_ym, last_ym], oldest first,
+    from a single ordered scan of the range. Each month is yielded as soon
+    as its rows are consumed; months with no rows yield an empty pivot.
+    """
+    rows = store.iter_transactions(
+        start=f"{first_ym}-01", end=f"{_next_ym(last_ym)}-01", columns=REPORT_COLUMNS
+    )
+    by_month = groupby(rows, key=lambda t: t.posted_date[:7])
+
+    pending = next(by_month, None)
+    for ym in months_between(first_ym, last_ym):
+        if pending is not None and pending[0] == ym:
+            yield month_pivot(ym, pending[1], top_n)
+            pending = next(by_month, None)
+        else:
+            yield month_pivot(ym, [], top_n)
+
+
+def _month_pivot_from_db(db_path: str, ym: str, top_n: int) -> MonthPivot:
+    # Process-pool worker: each process opens its own store
+    with SQLiteStore(db_path) as store:
+        return next(iter_month_pivots(store, ym, ym, top_n))
+
+
+def iter_month_pivots_parallel(
+    db_path: str,
+    first_ym: str,
+    last_ym: str,
+    top_n: int = 5,
+    workers: Optional[int] = None,
+) -> Iterator[MonthPivot]:
+    """
+    Same output as iter_month_pivots, but each month partition is computed
+    in its own worker process. Still yielded in month order.
+    """
+    months = months_between(first_ym, last_ym)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(_month_pivot_from_db, [db_path] * len(months), months, [top_n] * len(months))
+
+
+def total_of(pivots: List[MonthPivot]) -> Summary:
+    """
+    Folds month summaries into one for the whole period.
+    """
+    credits = sum(to_cents(p.summary.credits_total) for p in pivots)
+    debits = sum(to_cents(p.summary.debits_total) for p in pivots)
+    return Summary(
+        count=sum(p.summary.count for p in pivots),
+        credits_count=sum(p.summary.credits_count for p in pivots),
+        debits_count=sum(p.summary.debits_count for p in pivots),
+        credits_total=from_cents(credits),
+        debits_total=from_cents(debits),
+        net_total=from_cents(credits + debits),
+    )
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from typing import Optional
+
+from ledger.sqlite_store import REPORT_COLUMNS, SQLiteStore
+from reports.basic_summary import (
+    Summary,
+    summarize,
+    summary_from_rollup,
+    top_spend_by_kind_safe,
+    top_spend_vendors,
+)
+
+# Same buckets (and order) top_spend_by_kind_safe returns
+KIND_BUCKETS = ("CHECK", "TRANSFER", "CARD_PAYMENT", "OTHER_DEBIT")
+
+ENGINES = ("sql", "python")
+
+
+def _load(store: SQLiteStore, start: Optional[str], end: Optional[str]):
+    # LIMIT -1 == no limit in SQLite
+    return store.list_transactions(start=start, end=end, limit=-1, columns=REPORT_COLUMNS)
+
+
+def summarize_range(
+    store: SQLiteStore,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    engine: str = "sql",
+) -> Summary:
+    """
+    Summary over start <= posted_date < end.
+    engine="sql" aggregates in SQLite; engine="python" loads rows and runs summarize().
+    """
+    if engine == "python":
+        return summarize(_load(store, start, end))
+
+    return summary_from_rollup(store.aggregate_totals(start, end))
+
+
+def top_spend_vendors_range(
+    store: SQLiteStore,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    n: int = 10,
+    engine: str = "sql",
+):
+    if engine == "python":
+        return top_spend_vendors(_load(store, start, end), n=n)
+
+    return store.top_spend(start, end, n=n)
+
+
+def top_spend_by_kind_range(
+    store: SQLiteStore,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    n: int = 10,
+    engine: str = "sql",
+):
+    if engine == "python":
+        return top_spend_by_kind_safe(_load(store, start, end), n=n)
+
+    by_kind = store.top_spend_by_kind(start, end, n=n)
+    return {k: by_kind.get(k, []) for k in KIND_BUCKETS}
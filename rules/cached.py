@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from typing import List, Sequence
+
+import instrument
+from rules.rules_v1 import RuleResult, classify_many, rules_fingerprint
+
+
+def classify_with_cache(store, txs: Sequence[object]) -> List[RuleResult]:
+    """
+    classify_many(), backed by the store's tx_classifications table.
+
+    Rows already classified under the current rules fingerprint are read
+    back as-is; only new rows or rows cached under older rules are
+    classified, and those results are written back for next time.
+    """
+    fp = rules_fingerprint()
+    cached = store.get_classifications([t.id for t in txs], fp)
+
+    pending = [t for t in txs if t.id not in cached]
+    instrument.count("classify.cache_hits", len(txs) - len(pending))
+    instrument.count("classify.cache_misses", len(pending))
+    if pending:
+        fresh = classify_many(pending)
+        store.put_classifications(
+            fp, ((t.id, r.category, r.confidence, r.note) for t, r in zip(pending, fresh))
+        )
+        for t, r in zip(pending, fresh):
+            cached[t.id] = (r.category, r.confidence, r.note)
+
+    return [RuleResult(*cached[t.id]) for t in txs]
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+from collections import deque
+from typing import Optional, Sequence
+
+
+class NeedleMatcher:
+    """
+    Aho-Corasick automaton over a list of substring needles.
+
+    first_match(text) returns the index of the earliest needle in the list
+    that occurs anywhere in text (so list order still decides precedence),
+    scanning text once regardless of how many needles there are.
+    """
+
+    def __init__(self, needles: Sequence[str]):
+        self.size = len(needles)
+        # Empty needle matches everything ("" in s is always True)
+        self._always: Optional[int] = next((i for i, n in enumerate(needles) if n == ""), None)
+
+        goto: list[dict[str, int]] = [{}]
+        best: list[Optional[int]] = [None]
+
+        for idx, needle in enumerate(needles):
+            if not needle:
+                continue
+            state = 0
+            for ch in needle:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    best.append(None)
+                state = nxt
+            if best[state] is None or idx < best[state]:
+                best[state] = idx
+
+        # BFS to set failure links and fold each suffix's best index into its node
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                if state:
+                    f = fail[state]
+                    while f and ch not in goto[f]:
+                        f = fail[f]
+                    fail[nxt] = goto[f].get(ch, 0)
+                fb = best[fail[nxt]]
+                if fb is not None and (best[nxt] is None or fb < best[nxt]):
+                    best[nxt] = fb
+                queue.append(nxt)
+
+        self._goto = goto
+        self._fail = fail
+        self._best = best
+
+    def first_match(self, text: str) -> Optional[int]:
+        goto, fail, best = self._goto, self._fail, self._best
+        found = self._always
+        if found == 0:
+            return 0
+
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            b = best[state]
+            if b is not None and (found is None or b < found):
+                found = b
+                if found == 0:
+                    break
+        return found
@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from hashlib import sha1
+from typing import Any, Optional, Sequence
+
+from models.transaction import to_cents
+
+# Conditions a review rule may use; every condition in a rule must hold.
+#   min_abs_amount  abs(amount) >= value (a number, or "REVIEW_AMOUNT_THRESHOLD")
+#   max_abs_amount  abs(amount) <  value
+#   missing         these text fields are empty: name, memo, type, checknum
+#   name_in         upper-cased, trimmed name is one of these
+#   name_contains   name contains any of these (case-insensitive)
+#   memo_contains   memo contains any of these (case-insensitive)
+#   type_in         TRNTYPE is one of these
+#   direction       "credit" (amount > 0) or "debit"
+CONDITIONS = (
+    "min_abs_amount", "max_abs_amount", "missing", "name_in",
+    "name_contains", "memo_contains", "type_in", "direction",
+)
+
+_TEXT_FIELDS = ("name", "memo", "type", "checknum")
+
+# Matches Python's str.strip() for the whitespace QFX text actually contains
+_WS = "' ' || char(9, 10, 13)"
+
+
+@dataclass(frozen=True)
+class ReviewRule:
+    id: str
+    reason: str
+    conditions: dict = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class CompiledReviewRules:
+    rules: tuple[ReviewRule, ...]
+    case_sql: str          # CASE ... END -> index into rules (NULL: no rule matched)
+    params: tuple
+    fingerprint: str
+
+
+def _upper_list(values: Any, rule_id: str, cond: str) -> list[str]:
+    if isinstance(values, str) or not isinstance(values, (list, tuple)):
+        raise ValueError(f"Review rule {rule_id!r}: {cond} must be a list")
+    return [str(v).strip().upper() for v in values]
+
+
+def load_review_rules(cfg: Optional[dict] = None) -> list[ReviewRule]:
+    """
+    Validated REVIEW_RULES from the config, in order (first match wins),
+    with "REVIEW_AMOUNT_THRESHOLD" amounts resolved.
+    """
+    if cfg is None:
+        from config.runtime_config import get_config
+
+        cfg = get_config()
+
+    out: list[ReviewRule] = []
+    seen: set[str] = set()
+    for i, spec in enumerate(cfg.get("REVIEW_RULES") or []):
+        if not isinstance(spec, dict) or not spec.get("id"):
+            raise ValueError(f"Review rule #{i + 1} must be an object with an 'id'")
+        rule_id = str(spec["id"])
+        if rule_id in seen:
+            raise ValueError(f"Duplicate review rule id {rule_id!r}")
+        seen.add(rule_id)
+
+        conds: dict[str, Any] = {}
+        for key, value in spec.items():
+            if key in ("id", "reason"):
+                continue
+            if key not in CONDITIONS:
+                raise ValueError(f"Review rule {rule_id!r}: unknown condition {key!r}")
+            if key in ("min_abs_amount", "max_abs_amount"):
+                if value == "REVIEW_AMOUNT_THRESHOLD":
+                    value = cfg["REVIEW_AMOUNT_THRESHOLD"]
+                value = float(value)
+            elif key == "missing":
+                value = [str(f) for f in value]
+                bad = [f for f in value if f not in _TEXT_FIELDS]
+                if bad:
+                    raise ValueError(f"Review rule {rule_id!r}: can't test missing {bad[0]!r}")
+            elif key == "direction":
+                if value not in ("credit", "debit"):
+                    raise ValueError(f"Review rule {rule_id!r}: direction must be 'credit' or 'debit'")
+            else:
+                value = _upper_list(value, rule_id, key)
+            conds[key] = value
+        if not conds:
+            raise ValueError(f"Review rule {rule_id!r} has no conditions")
+
+        out.append(ReviewRule(rule_id, str(spec.get("reason") or rule_id), conds))
+    return out
+
+
+def configured_review_rules(cfg: Optional[dict] = None) -> CompiledReviewRules:
+    """
+    Compiled rules from the config. A malformed REVIEW_RULES (or threshold)
+    is reported and replaced by the defaults instead of raising, like any
+    other bad setting.
+    """
+    if cfg is None:
+        from config.runtime_config import get_config
+
+        cfg = get_config()
+    try:
+        return compile_review_rules(load_review_rules(cfg))
+    except (ValueError, TypeError, KeyError) as e:
+        print(f"[config] Warning: ignoring REVIEW_RULES ({e}); using the defaults")
+
+    from config import defaults
+
+    return compile_review_rules(load_review_rules({
+        "REVIEW_RULES": defaults.REVIEW_RULES,
+        "REVIEW_AMOUNT_THRESHOLD": defaults.REVIEW_AMOUNT_THRESHOLD,
+    }))
+
+
+def _condition_sql(key: str, value: Any) -> tuple[str, list]:
+    if key == "min_abs_amount":
+        return "ABS(amount_cents) >= ?", [to_cents(value)]
+    if key == "max_abs_amount":
+        return "ABS(amount_cents) < ?", [to_cents(value)]
+    if key == "missing":
+        return " AND ".join(f"TRIM(COALESCE({f}, ''), {_WS}) = ''" for f in value), []
+    if key == "name_in":
+        marks = ", ".join("?" for _ in value)
+        return f"UPPER(TRIM(COALESCE(name, ''), {_WS})) IN ({marks})", list(value)
+    if key in ("name_contains", "memo_contains"):
+        col = key.split("_")[0]
+        return "(" + " OR ".join(f"INSTR(UPPER(COALESCE({col}, '')), ?) > 0" for _ in value) + ")", list(value)
+    if key == "type_in":
+        marks = ", ".join("?" for _ in value)
+        return f"UPPER(COALESCE(type, '')) IN ({marks})", list(value)
+    if key == "direction":
+        return ("amount_cents > 0" if value == "credit" else "amount_cents <= 0"), []
+    raise ValueError(f"Unknown review condition {key!r}")
+
+
+def compile_review_rules(rules: Sequence[ReviewRule]) -> CompiledReviewRules:
+    """
+    Turns the rules into one SQL CASE over a transactions row, so flags can
+    be computed inside the insert transaction for just the new rows.
+    """
+    whens: list[str] = []
+    params: list = []
+    for idx, rule in enumerate(rules):
+        parts: list[str] = []
+        for key, value in rule.conditions.items():
+            sql, p = _condition_sql(key, value)
+            parts.append(f"({sql})")
+            params += p
+        whens.append(f"WHEN {' AND '.join(parts)} THEN {idx}")
+
+    case_sql = f"CASE {' '.join(whens)} END" if whens else "NULL"
+    basis = json.dumps(
+        [[r.id, r.reason, r.conditions] for r in rules], sort_keys=True, ensure_ascii=False
+    )
+    return CompiledReviewRules(tuple(rules), case_sql, tuple(params), sha1(basis.encode("utf-8")).hexdigest())
+
+
+def _matches(key: str, value: Any, t: Any) -> bool:
+    cents = abs(to_cents(float(getattr(t, "amount", 0) or 0)))
+    if key == "min_abs_amount":
+        return cents >= to_cents(value)
+    if key == "max_abs_amount":
+        return cents < to_cents(value)
+    if key == "missing":
+        return all(not (getattr(t, f, None) or "").strip() for f in value)
+    if key == "name_in":
+        return (getattr(t, "name", None) or "").strip().upper() in value
+    if key in ("name_contains", "memo_contains"):
+        text = (getattr(t, key.split("_")[0], None) or "").upper()
+        return any(n in text for n in value)
+    if key == "type_in":
+        return (getattr(t, "type", None) or "").upper() in value
+    if key == "direction":
+        positive = float(getattr(t, "amount", 0) or 0) > 0
+        return positive == (value == "credit")
+    raise ValueError(f"Unknown review condition {key!r}")
+
+
+def match_review_rule(rules: Sequence[ReviewRule], t: Any) -> Optional[ReviewRule]:
+    """
+    Python twin of the compiled CASE: the first rule t satisfies, if any.
+    """
+    for rule in rules:
+        if all(_matches(k, v, t) for k, v in rule.conditions.items()):
+            return rule
+    return None
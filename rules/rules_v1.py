@@ -1,8 +1,14 @@
 from __future__ import annotations
 from dataclasses import dataclass
+from functools import lru_cache
+from hashlib import sha1
 import html
+import json
+from typing import Iterable, List
 
-from config.runtime_config import CFG
+import instrument
+from config.runtime_config import get_config
+from rules.matcher import NeedleMatcher
 
 
 @dataclass
@@ -12,36 +18,115 @@ class RuleResult:
     note: str | None = None
 
 
+# Bump when the classification logic below changes, so cached results go stale
+RULES_VERSION = 1
+
+PAYMENT_APPS = ("CASH APP", "VENMO", "PAYPAL", "ZELLE", "APPLE CASH", "META PAY")
+
+
 def _clean(s: str | None) -> str:
     # Handles AT&amp;T -> AT&T, etc.
     return html.unescape(s or "").strip()
 
 
-def classify_tx(t) -> RuleResult:
+@lru_cache(maxsize=65536)
+def _normalize_name(s: str | None) -> str:
+    return _clean(s).upper()
+
+
+# (rules list, its length, compiled matcher) for the currently loaded VENDOR_RULES
+_compiled: tuple[object, int, NeedleMatcher] | None = None
+
+
+def _vendor_matcher(rules: list) -> NeedleMatcher:
     """
-    Lightweight rule-based classifier for SimpleBook v0.1.
-    t is a Transaction object (your models/transaction.py).
+    Compiles VENDOR_RULES needles once per config load (keyed on the list
+    object, so a reloaded or replaced config recompiles).
     """
-    name = _clean(getattr(t, "name", "")).upper()
-    memo = _clean(getattr(t, "memo", ""))
-    amt = float(getattr(t, "amount", 0) or 0)
+    global _compiled
+    if _compiled is None or _compiled[0] is not rules or _compiled[1] != len(rules):
+        _compiled = (rules, len(rules), NeedleMatcher([r[0] for r in rules]))
+    return _compiled[2]
+
+
+def warm_up() -> None:
+    """
+    Loads the config and compiles the vendor rules now, so the first
+    classification doesn't pay for it (e.g. in a long-running server).
+    """
+    _vendor_matcher(get_config()["VENDOR_RULES"])
+
+
+def _classify(name: str, is_income: bool, has_checknum: bool) -> RuleResult:
+    cfg = get_config()
+
     # Payment apps are high-risk: never auto-assume rental income
-    if amt > 0 and any(x in name for x in {"CASH APP", "VENMO", "PAYPAL", "ZELLE", "APPLE CASH", "META PAY"}):
+    if is_income and any(x in name for x in PAYMENT_APPS):
         return RuleResult(category=None, confidence="guess", note="payment app income - classify manually")
 
     # --- INCOME (config-driven)
-    if amt > 0 and CFG["ASSUME_ALL_INCOME_IS_RENTAL"]:
+    if is_income and cfg["ASSUME_ALL_INCOME_IS_RENTAL"]:
         return RuleResult(category="Rental Income", confidence="guess")
 
-    # --- VENDOR RULES (config-driven contains match)
-    for needle, cat, conf, note in CFG["VENDOR_RULES"]:
-        if needle in name:
-            return RuleResult(category=cat, confidence=conf, note=note)
+    # --- VENDOR RULES (config-driven contains match, first rule wins)
+    rules = cfg["VENDOR_RULES"]
+    hit = _vendor_matcher(rules).first_match(name)
+    if hit is not None:
+        _needle, cat, conf, note = rules[hit]
+        return RuleResult(category=cat, confidence=conf, note=note)
 
     # Checks with unknown payee
-    if "CHECK #" in name or (getattr(t, "checknum", None) is not None):
+    if "CHECK #" in name or has_checknum:
         return RuleResult(category=None, confidence="guess", note="unknown check payee")
 
     # Default: unknown
     return RuleResult(category=None, confidence="guess")
 
+
+def classify_tx(t) -> RuleResult:
+    """
+    Lightweight rule-based classifier for SimpleBook v0.1.
+    t is a Transaction object (your models/transaction.py).
+    """
+    name = _normalize_name(getattr(t, "name", ""))
+    amt = float(getattr(t, "amount", 0) or 0)
+    return _classify(name, amt > 0, getattr(t, "checknum", None) is not None)
+
+
+def classify_many(txs: Iterable[object]) -> List[RuleResult]:
+    """
+    Classifies a batch, in order. Identical inputs (normalised name, income
+    vs spend, has checknum) are classified once and share the same
+    RuleResult instance, so treat results as read-only.
+    """
+    memo: dict[tuple[str, bool, bool], RuleResult] = {}
+    out: List[RuleResult] = []
+    with instrument.span("classify") as sp:
+        for t in txs:
+            name = _normalize_name(getattr(t, "name", ""))
+            amt = float(getattr(t, "amount", 0) or 0)
+            key = (name, amt > 0, getattr(t, "checknum", None) is not None)
+            r = memo.get(key)
+            if r is None:
+                r = memo[key] = _classify(*key)
+            out.append(r)
+        sp.rows = len(out)
+    return out
+
+
+def rules_fingerprint(cfg: dict | None = None) -> str:
+    """
+    Hash of everything that decides a RuleResult: the rule code version and
+    the effective config rules. Cached classifications are keyed on it.
+    """
+    cfg = get_config() if cfg is None else cfg
+    basis = json.dumps(
+        {
+            "version": RULES_VERSION,
+            "ASSUME_ALL_INCOME_IS_RENTAL": cfg["ASSUME_ALL_INCOME_IS_RENTAL"],
+            "VENDOR_RULES": [list(r) for r in cfg["VENDOR_RULES"]],
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return sha1(basis.encode("utf-8")).hexdigest()
@@ -3,77 +3,159 @@ from __future__ import annotations
 
 import sys
 import os
+from typing import Callable
 
 DEBUG = os.getenv("SB_DEBUG") == "1"
 
-from ingest.qfx.qfx_ingest import ingest_qfx
-from ledger.sqlite_store import SQLiteStore
-from reports.basic_summary import summarize
+import instrument
+
+# Commands import what they need when they run, so e.g. `sb months` never
+# loads the parser, the process pool or the report modules.
 
 DB_PATH = "data/simplebook.db"
 
+# Where `sb serve` listens and clients look for it: a socket path or host:port
+SERVER = os.getenv("SB_SERVER", "data/sb.sock")
+
+_store = None
+
+
+def open_store():
+    """
+    The process-wide store, opened and migrated on first use (kept warm
+    for the life of `sb serve`).
+    """
+    global _store
+    if _store is None:
+        from ledger.sqlite_store import SQLiteStore
+
+        _store = SQLiteStore(DB_PATH)
+        _store.init_db()
+    return _store
+
 def cmd_import(args: list[str]) -> None:
-    if len(args) != 1:
-        print("Usage: sb import <qfx_file>")
+    from ingest.batch_import import FileImportStats, expand_import_paths, import_files
+    usage = "Usage: sb import [-j N] [--force] <qfx_file|dir|glob> ..."
+
+    workers = None
+    force = False
+    paths_args: list[str] = []
+    it = iter(args)
+    for a in it:
+        if a == "--force":
+            force = True
+        elif a in ("-j", "--workers"):
+            try:
+                workers = int(next(it))
+            except (StopIteration, ValueError):
+                print(usage)
+                sys.exit(1)
+        else:
+            paths_args.append(a)
+
+    if not paths_args:
+        print(usage)
         sys.exit(1)
 
-    qfx_path = args[0]
-
-    store = SQLiteStore(DB_PATH)
-    store.init_db()
+    paths = expand_import_paths(paths_args)
+    if not paths:
+        print("No QFX files found.")
+        sys.exit(1)
 
-    txs = ingest_qfx(qfx_path)
-    inserted = store.upsert_transactions(txs)
+    store = open_store()
+
+    if len(paths) == 1 and workers is None:
+        workers = 1
+
+    def show(fs: FileImportStats) -> None:
+        if fs.skipped:
+            print(f"  skipped {fs.path} (same content already imported; --force to re-import)")
+            return
+        if fs.error:
+            print(f"  FAILED  {fs.path}: {fs.error}")
+            return
+        print(
+            f"  {fs.path}: {fs.rows} rows, {fs.inserted} new, "
+            f"parse {fs.parse_seconds:.2f}s, write {fs.write_seconds:.2f}s "
+            f"({fs.rows_per_sec:,.0f} rows/s)"
+        )
 
-    print(f"Imported: {len(txs)}")
-    print(f"Inserted (new): {inserted}")
+    print(f"Importing {len(paths)} file(s)...")
+    stats = import_files(paths, store, workers=workers, on_file=show, force=force)
+
+    print(f"\nFiles: {len(stats.files)}  (skipped: {stats.skipped}, failed: {stats.failed})")
+    print(f"Imported: {stats.rows}")
+    print(f"Inserted (new): {stats.inserted}")
+    print(f"Elapsed: {stats.wall_seconds:.2f}s  ({stats.rows_per_sec:,.0f} rows/s)")
+    if stats.known_ids is not None:
+        k = stats.known_ids
+        print(
+            f"Known-ID filter: {stats.known_ids_loaded} ids loaded in {stats.known_ids_load_seconds:.2f}s; "
+            f"{k.checked} checked, {k.hits} hits ({k.hit_rate:.0%}), {k.misses} misses, "
+            f"{k.false_positives} false positives, {k.skipped} skipped"
+        )
     print(f"DB total: {store.count_transactions()}")
 
-    print("\nMonths in DB (newest first):")
-    for ym, c in months[:limit]:
-        print(f"{ym}  ({c})")
+    if stats.failed:
+        sys.exit(1)
 
 
 def cmd_report(args: list[str]) -> None:
-    if len(args) != 1 or "-" not in args[0]:
-        print("Usage: sb report YYYY-MM")
+    from ledger.review_store import ReviewLog, feed_review_log, open_review_flags
+    from ledger.sqlite_store import month_bounds
+    from modules.module3_checks import detect_checks, print_check_debug_sample
+    from reports.basic_summary import summary_from_rollup, top_spend_categories
+    from reports.pivot import parse_period
+    from rules.cached import classify_with_cache
+
+    usage = "Usage: sb report YYYY-MM | YYYY | YYYY-MM..YYYY-MM [--parallel | --parallel=N]"
+
+    period: list[str] = []
+    parallel = False
+    workers = None
+    for a in args:
+        if a == "--parallel":
+            parallel = True
+        elif a.startswith("--parallel="):
+            # The count must be attached: `--parallel 2024` can't tell workers from a year
+            n = a.split("=", 1)[1]
+            if not n.isdigit() or int(n) < 1:
+                print(usage)
+                sys.exit(1)
+            parallel, workers = True, int(n)
+        else:
+            period.append(a)
+
+    if len(period) != 1:
+        print(usage)
+        sys.exit(1)
+
+    try:
+        first_ym, last_ym = parse_period(period[0])
+    except ValueError as e:
+        print(e)
+        print(usage)
         sys.exit(1)
 
-    year_s, month_s = args[0].split("-", 1)
+    if ".." in period[0] or "-" not in period[0] or parallel:
+        cmd_report_range(first_ym, last_ym, parallel, workers)
+        return
+
+    year_s, month_s = first_ym.split("-", 1)
     year = int(year_s)
     month = int(month_s)
 
-    store = SQLiteStore(DB_PATH)
-    store.init_db()
+    store = open_store()
 
-    txs = store.list_by_month(year, month, limit=10000)
+    bounds = month_bounds(year, month)
 
-    # Diagnostic: detect check-like txs
-    checks = [
-        t for t in txs
-        if (
-            t.checknum
-            or ((t.type or "").upper() == "CHECK")
-            or ("CHECK" in (t.name or "").upper())
-        )
-    ]
+    # Diagnostic: check-kind txs (indexed on transactions.kind)
+    checks = detect_checks(store, *bounds)
     print("Detected checks:", len(checks))
+    print_check_debug_sample(checks)
 
-    # Optional: show one sample check raw mapping
-    if checks:
-        sample = checks[0]
-        print("\nSample check transaction raw:")
-        print("name:", sample.name)
-        print("memo:", sample.memo)
-        print("type:", sample.type)
-        print("checknum:", sample.checknum)
-        if sample.raw:
-            print("raw keys:", list(sample.raw.keys()))
-            for k in ["checknum", "fitid", "trntype", "name", "memo", "posted_raw", "posted_date", "amount"]:
-                if k in sample.raw:
-                    print(f"raw[{k}]:", sample.raw[k])
-
-    s = summarize(txs)
+    ym = f"{year:04d}-{month:02d}"
+    s = summary_from_rollup(store.get_rollup(ym))
 
     print(f"\nMonth: {year}-{month:02d}")
     print("Count  :", s.count)
@@ -81,36 +163,65 @@ def cmd_report(args: list[str]) -> None:
     print("Debits :", s.debits_count, "Total:", s.debits_total)
     print("Net    :", s.net_total)
 
-    # Optional: Top spending (disabled for now)
-    # We’ll re-add once report output is stabilized.
-
-    print("\nTop spend breakdown: (disabled for now)")
-
-    # --- Needs Review (v0.1) ---
-    needs_review: list[tuple[object, str]] = []
-
-    for t in txs:
-        amt = abs(float(t.amount or 0))
-        name_u = (t.name or "").upper().strip()
-        memo_s = (t.memo or "").strip()
-
-        # Rule 1: large transaction with no memo
-        if amt >= 500 and not memo_s:
-            needs_review.append((t, "large amount, missing memo"))
-            continue
-
-        # Rule 2: generic or missing name
-        if not name_u or name_u in {"POS", "ONLINE", "PAYMENT"}:
-            needs_review.append((t, "generic or missing name"))
-            continue
-
+    # Classifications are cached per rules fingerprint, so only debits new
+    # since the last report (or after a rules change) hit the classifier
+    debits = [t for t in store.iter_transactions(*bounds, columns=("name", "checknum")) if t.amount < 0]
+    top = top_spend_categories(debits, classify_with_cache(store, debits))
+    print("\nTop spend by category:")
+    for cat, total in top:
+        print(f"  {total:10.2f}  {cat}")
+    if not top:
+        print("  none")
+
+    # --- Needs Review: flagged at ingest by REVIEW_RULES ---
+    flagged = store.list_review_flags(*bounds)
+    log = ReviewLog(ym)
+    feed_review_log(log, flagged)
+
+    needs_review = [(t, reason) for t, _rule, reason in open_review_flags(flagged, {ym: log.items})]
     if needs_review:
         print("\nNeeds Review:")
         for t, reason in needs_review[:15]:
             print(f"  {t.posted_date}  {t.amount:10.2f}  {t.name}  ({reason})")
+        if len(needs_review) > 15:
+            print(f"  ... {len(needs_review) - 15} more (sb review {ym})")
     else:
         print("\nNeeds Review: none")
 
+
+def cmd_report_range(first_ym: str, last_ym: str, parallel: bool = False, workers: int | None = None) -> None:
+    """
+    Month x (credit/debit/net, spend by kind, top vendors) pivot over a
+    period, printed as each month completes.
+    """
+    from reports.pivot import iter_month_pivots, iter_month_pivots_parallel, total_of
+
+    store = open_store()
+
+    if parallel:
+        pivots = iter_month_pivots_parallel(DB_PATH, first_ym, last_ym, workers=workers)
+    else:
+        pivots = iter_month_pivots(store, first_ym, last_ym)
+
+    print(f"\nPeriod: {first_ym}..{last_ym}")
+    print(f"{'Month':<8} {'Count':>7} {'Credits':>14} {'Debits':>14} {'Net':>14}")
+
+    done = []
+    for p in pivots:
+        done.append(p)
+        s = p.summary
+        print(f"{p.ym:<8} {s.count:>7} {s.credits_total:>14,.2f} {s.debits_total:>14,.2f} {s.net_total:>14,.2f}")
+        kinds = "  ".join(f"{k} {v:,.2f}" for k, v in p.spend_by_kind.items() if v)
+        if kinds:
+            print(f"{'':<8} spend: {kinds}")
+        if p.top_vendors:
+            top = "  |  ".join(f"{name} {total:,.2f}" for name, total in p.top_vendors)
+            print(f"{'':<8} top:   {top}")
+
+    t = total_of(done)
+    print(f"{'TOTAL':<8} {t.count:>7} {t.credits_total:>14,.2f} {t.debits_total:>14,.2f} {t.net_total:>14,.2f}")
+
+
 def cmd_months(args: list[str]) -> None:
     limit = 60
     if len(args) == 1:
@@ -123,8 +234,7 @@ def cmd_months(args: list[str]) -> None:
         print("Usage: sb months [limit]")
         sys.exit(1)
 
-    store = SQLiteStore("data/simplebook.db")
-    store.init_db()
+    store = open_store()
 
     months = store.list_months()
     if not months:
@@ -136,25 +246,379 @@ def cmd_months(args: list[str]) -> None:
         print(f"{ym}  ({c})")
 
 
-def main() -> None:
-    if len(sys.argv) < 2:
-        print("Usage: sb <command> [args]")
-        print("Commands: import, months, report")
+def cmd_imports(args: list[str]) -> None:
+    if args:
+        print("Usage: sb imports")
         sys.exit(1)
 
-    command = sys.argv[1]
-    args = sys.argv[2:]
+    store = open_store()
 
-    if command == "import":
-        cmd_import(args)
-    elif command == "months":
-        cmd_months(args)
-    elif command == "report":
-        cmd_report(args)
-    else:
-        print(f"Unknown command: {command}")
+    rows = store.list_imports()
+    if not rows:
+        print("No imports recorded.")
+        return
+
+    print("\nImported files (newest first):")
+    for r in rows:
+        print(
+            f"{r['imported_at']}  {r['row_count']:>7} rows  {r['inserted']:>7} new  "
+            f"{r['size']:>10} B  {r['content_hash'][:12]}  {r['path']}"
+        )
+
+
+def cmd_export(args: list[str]) -> None:
+    import time
+
+    from ledger.export import EXPORT_FORMATS, export_bounds, export_transactions, open_output
+    usage = (
+        "Usage: sb export [--format csv|jsonl] [--from DATE] [--to DATE] "
+        "[--columns c1,c2,...] [--gzip] [-o FILE]"
+    )
+
+    opts = {"--format": "csv", "--from": None, "--to": None, "--columns": None, "-o": None}
+    gz = False
+    it = iter(args)
+    for a in it:
+        if a == "--gzip":
+            gz = True
+        elif a in opts or a == "--output":
+            value = next(it, None)
+            if value is None:
+                print(usage)
+                sys.exit(1)
+            opts["-o" if a == "--output" else a] = value
+        else:
+            print(usage)
+            sys.exit(1)
+
+    fmt = opts["--format"]
+    out_path = opts["-o"]
+    columns = opts["--columns"].split(",") if opts["--columns"] else None
+    if fmt not in EXPORT_FORMATS:
+        print(f"Unknown format: {fmt}")
+        print(usage)
+        sys.exit(1)
+    if out_path and out_path.endswith(".gz"):
+        gz = True
+
+    try:
+        start, end = export_bounds(opts["--from"], opts["--to"])
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+
+    store = open_store()
+
+    t0 = time.perf_counter()
+    try:
+        with open_output(out_path, gz) as out:
+            n = export_transactions(store, out, fmt, start, end, columns)
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+    except BrokenPipeError:
+        # Reader went away (e.g. `| head`); silence the final stdout flush too
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
         sys.exit(1)
 
+    # Progress goes to stderr so stdout can carry the data
+    secs = time.perf_counter() - t0
+    print(f"Exported {n} rows to {out_path or 'stdout'} in {secs:.2f}s", file=sys.stderr)
+
+
+def cmd_search(args: list[str]) -> None:
+    import time
+
+    from ledger.export import export_bounds
+    usage = 'Usage: sb search "text" [--from DATE] [--to DATE] [--limit N]'
+
+    opts = {"--from": None, "--to": None, "--limit": "25"}
+    terms: list[str] = []
+    it = iter(args)
+    for a in it:
+        if a in opts:
+            value = next(it, None)
+            if value is None:
+                print(usage)
+                sys.exit(1)
+            opts[a] = value
+        else:
+            terms.append(a)
+
+    text = " ".join(terms).strip()
+    if not text or not opts["--limit"].isdigit():
+        print(usage)
+        sys.exit(1)
+
+    try:
+        start, end = export_bounds(opts["--from"], opts["--to"])
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+
+    store = open_store()
+
+    t0 = time.perf_counter()
+    hits = store.search_transactions(text, start, end, limit=int(opts["--limit"]))
+    ms = (time.perf_counter() - t0) * 1000
+
+    if not hits:
+        print(f"No matches for '{text}'.")
+        return
+
+    print(f"{len(hits)} match(es) for '{text}' ({ms:.1f} ms):")
+    for t in hits:
+        memo = f"  [{t.memo}]" if t.memo else ""
+        print(f"  {t.posted_date}  {t.amount:10.2f}  {t.name or ''}{memo}")
+
+
+def cmd_serve(args: list[str]) -> None:
+    import sb_server
+
+    usage = "Usage: sb serve [--socket PATH | --port N]"
+
+    target = SERVER
+    it = iter(args)
+    for a in it:
+        value = next(it, None)
+        if a == "--socket" and value:
+            target = value
+        elif a == "--port" and value and value.isdigit():
+            target = f"127.0.0.1:{value}"
+        else:
+            print(usage)
+            sys.exit(1)
+
+    def warm() -> None:
+        import reports.pivot  # noqa: F401  (pulls in the report modules)
+        from rules import rules_v1
+
+        open_store()
+        rules_v1.warm_up()
+
+    runner = sb_server.CommandRunner(lambda argv: run_command(argv[0], argv[1:]), lambda: open_store().change_token(), CACHED_COMMANDS)
+    sb_server.serve(target, runner, SERVED_COMMANDS, warm=warm)
+
+
+def cmd_watch(args: list[str]) -> None:
+    import time
+
+    from ingest.watch import watch_folder
+
+    usage = "Usage: sb watch <dir> [--settle SECONDS] [--interval SECONDS] [--queue N] [--poll]"
+
+    opts = {"--settle": "2", "--interval": "1", "--queue": "16"}
+    use_inotify = None
+    root = None
+    it = iter(args)
+    for a in it:
+        if a == "--poll":
+            use_inotify = False
+        elif a in opts:
+            opts[a] = next(it, "")
+        elif root is None:
+            root = a
+        else:
+            print(usage)
+            sys.exit(1)
+
+    try:
+        settle = float(opts["--settle"])
+        interval = float(opts["--interval"])
+        max_queue = int(opts["--queue"])
+    except ValueError:
+        print(usage)
+        sys.exit(1)
+    if root is None or not os.path.isdir(root):
+        print(usage)
+        sys.exit(1)
+
+    store = open_store()
+
+    def show(fs, item, finished: float) -> None:
+        stamp = time.strftime("%H:%M:%S")
+        latency = finished - item.first_seen
+        waited = finished - item.ready_at - fs.parse_seconds - fs.write_seconds
+        if fs.skipped:
+            print(f"{stamp}  skipped {fs.path} (already imported)", flush=True)
+        elif fs.error:
+            print(f"{stamp}  FAILED  {fs.path}: {fs.error}", flush=True)
+        else:
+            print(
+                f"{stamp}  {fs.path}: {fs.rows} rows, {fs.inserted} new; "
+                f"latency {latency:.2f}s (settle {item.ready_at - item.first_seen:.2f}s, "
+                f"queued {max(waited, 0.0):.2f}s, parse {fs.parse_seconds:.2f}s, write {fs.write_seconds:.2f}s)",
+                flush=True,
+            )
+
+    print(f"Watching {root} (settle {settle:g}s, queue {max_queue}); Ctrl-C to stop", flush=True)
+    try:
+        watch_folder(root, store, settle_seconds=settle, poll_interval=interval,
+                     max_queue=max_queue, use_inotify=use_inotify, on_file=show)
+    except KeyboardInterrupt:
+        pass
+    print("Stopped.")
+
+
+def cmd_review(args: list[str]) -> None:
+    from ledger.review_store import count_open_review_flags, open_review_flags
+    from ledger.sqlite_store import month_bounds
+
+    usage = "Usage: sb review [YYYY-MM | all] [--limit N]"
+    period = None
+    limit = 50
+    i = 0
+    while i < len(args):
+        a = args[i]
+        if a == "--limit" and i + 1 < len(args) and args[i + 1].isdigit():
+            limit = int(args[i + 1])
+            i += 1
+        elif period is None and not a.startswith("-"):
+            period = a
+        else:
+            print(usage)
+            sys.exit(1)
+        i += 1
+
+    store = open_store()
+
+    if period is None:
+        counts = count_open_review_flags(store)
+        if not counts:
+            print("Nothing needs review.")
+            return
+        print(f"{'Month':<8} {'Flagged':>8}")
+        for ym, n in counts:
+            print(f"{ym:<8} {n:>8}")
+        return
+
+    start = end = None
+    if period != "all":
+        try:
+            year_s, month_s = period.split("-", 1)
+            start, end = month_bounds(int(year_s), int(month_s))
+        except ValueError:
+            print(usage)
+            sys.exit(1)
+
+    # Same open/done state as sb report: items marked done drop out
+    flagged = open_review_flags(store.list_review_flags(start, end))[:limit]
+    if not flagged:
+        print("Nothing needs review.")
+        return
+    for t, rule_id, reason in flagged:
+        print(f"  {t.posted_date}  {t.amount:10.2f}  {t.name}  ({reason}) [{rule_id}]")
+
+
+def cmd_rebuild_review(args: list[str]) -> None:
+    if args:
+        print("Usage: sb rebuild-review")
+        sys.exit(1)
+
+    store = open_store()
+    n = store.rebuild_review_flags()
+    print(f"Re-evaluated review rules: {n} transactions flagged.")
+
+
+def cmd_rebuild_rollups(args: list[str]) -> None:
+    if args:
+        print("Usage: sb rebuild-rollups")
+        sys.exit(1)
+
+    store = open_store()
+
+    months = store.rebuild_rollups()
+    print(f"Rebuilt monthly rollups: {months} month(s)")
+
+
+def _pop_profile_flags(argv: list[str]) -> tuple[list[str], bool, str | None]:
+    """
+    Strips --profile / --metrics-json PATH (allowed anywhere on the line).
+    """
+    rest: list[str] = []
+    profile = False
+    metrics_path = None
+    it = iter(argv)
+    for a in it:
+        if a == "--profile":
+            profile = True
+        elif a == "--metrics-json":
+            metrics_path = next(it, None)
+            if metrics_path is None:
+                print("Usage: --metrics-json PATH")
+                sys.exit(1)
+        elif a.startswith("--metrics-json="):
+            metrics_path = a.split("=", 1)[1]
+        else:
+            rest.append(a)
+    return rest, profile, metrics_path
+
+
+def main() -> None:
+    argv, profile, metrics_path = _pop_profile_flags(sys.argv[1:])
+    profile = profile or DEBUG
+
+    if not argv:
+        print("Usage: sb <command> [args] [--profile] [--metrics-json PATH]")
+        print("Commands:")
+        for name, (_handler, summary) in COMMANDS.items():
+            print(f"  {name:<16} {summary}")
+        sys.exit(1)
+
+    command = argv[0]
+    args = argv[1:]
+
+    if profile or metrics_path:
+        instrument.enable(trace_memory=True)
+    elif command in SERVED_COMMANDS and not os.getenv("SB_NO_SERVER"):
+        # Thin client: let a running `sb serve` answer if there is one
+        import sb_server
+
+        resp = sb_server.request(SERVER, argv)
+        if resp is not None:
+            sys.stdout.write(resp["stdout"])
+            sys.stderr.write(resp["stderr"])
+            sys.exit(resp["code"])
+
+    try:
+        run_command(command, args)
+    finally:
+        if instrument.ENABLED:
+            if profile:
+                print(instrument.format_report(), file=sys.stderr)
+            if metrics_path:
+                instrument.write_json(metrics_path, {"command": command, "args": args})
+            instrument.disable()
+
+
+def run_command(command: str, args: list[str]) -> None:
+    entry = COMMANDS.get(command)
+    if entry is None:
+        print(f"Unknown command: {command}")
+        sys.exit(1)
+    entry[0](args)
+
+
+# name -> (handler, one-line help)
+COMMANDS: dict[str, tuple[Callable[[list[str]], None], str]] = {
+    "import": (cmd_import, "import QFX files, directories or globs"),
+    "imports": (cmd_imports, "list imported files"),
+    "export": (cmd_export, "stream transactions out as CSV or JSON lines"),
+    "search": (cmd_search, "full-text search over payee, memo and check number"),
+    "serve": (cmd_serve, "keep the ledger warm and answer other sb commands over a socket"),
+    "watch": (cmd_watch, "import QFX files as they land in a directory"),
+    "months": (cmd_months, "list months in the DB with row counts"),
+    "report": (cmd_report, "month, year or month-range report"),
+    "review": (cmd_review, "list transactions flagged for review"),
+    "rebuild-review": (cmd_rebuild_review, "re-evaluate review rules over all transactions"),
+    "rebuild-rollups": (cmd_rebuild_rollups, "recompute monthly rollups"),
+}
+
+# Commands a running `sb serve` answers for clients, and which of those it
+# may answer from cache until the DB changes (not review: it also reads the
+# done/open state in data/review_*.jsonl). The rest always run locally.
+SERVED_COMMANDS = ("months", "report", "search", "imports", "review", "rebuild-review", "rebuild-rollups")
+CACHED_COMMANDS = ("months", "search", "imports")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,186 @@
+"""
+`sb serve`: a long-running process that answers sb commands warm.
+
+The server keeps one SQLiteStore (and everything modules cache: config,
+compiled vendor rules, normalised names) alive and runs command handlers
+in-process, one at a time, capturing what they print. Answers are cached
+per argv until the database changes (see SQLiteStore.change_token).
+
+Protocol: newline-delimited JSON over a Unix socket (or 127.0.0.1 TCP).
+    -> {"argv": ["report", "2025-01"]}
+    <- {"code": 0, "stdout": "...", "stderr": "", "cached": false, "ms": 3.2}
+
+The client half only needs socket/json, so thin clients start fast;
+asyncio is imported by serve() alone.
+"""
+from __future__ import annotations
+
+import contextlib
+import io
+import json
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Callable, Hashable, Iterable, Optional
+
+MAX_CACHED = 256
+
+
+def _address(target: str):
+    """
+    'host:port' -> (AF_INET, (host, port)); anything else is a socket path.
+    """
+    host, sep, port = target.rpartition(":")
+    if sep and port.isdigit() and "/" not in target:
+        return socket.AF_INET, (host or "127.0.0.1", int(port))
+    return socket.AF_UNIX, target
+
+
+def request(target: str, argv: list[str], timeout: float = 300.0) -> Optional[dict]:
+    """
+    Sends one command to a running server. Returns its response, or None
+    if the server can't be reached or doesn't answer in time (so the
+    caller can run the command locally).
+    """
+    family, addr = _address(target)
+    if family == socket.AF_UNIX and not os.path.exists(addr):
+        return None
+    try:
+        with socket.socket(family, socket.SOCK_STREAM) as s:
+            s.settimeout(timeout)
+            s.connect(addr)
+            s.sendall(json.dumps({"argv": argv}).encode("utf-8") + b"\n")
+            buf = bytearray()
+            while not buf.endswith(b"\n"):
+                chunk = s.recv(1 << 16)
+                if not chunk:
+                    break
+                buf += chunk
+    except OSError:
+        return None      # stale socket file, server gone, no permission, or timed out
+    if not buf:
+        return None
+    return json.loads(buf)
+
+
+class CommandRunner:
+    """
+    Runs command handlers with stdout/stderr captured, caching output of
+    the cacheable ones until token() changes. Not thread-safe: the server
+    calls it from a single worker thread.
+    """
+
+    def __init__(
+        self,
+        run: Callable[[list[str]], None],
+        token: Callable[[], Hashable],
+        cacheable: Iterable[str],
+    ):
+        self._run = run
+        self._token = token
+        self._cacheable = frozenset(cacheable)
+        self._cache: dict[tuple, dict] = {}
+        self._cache_token: Hashable = None
+
+    def __call__(self, argv: list[str]) -> dict:
+        t0 = time.perf_counter()
+        key = tuple(argv)
+        cacheable = bool(argv) and argv[0] in self._cacheable
+
+        if cacheable:
+            tok = self._token()
+            if tok != self._cache_token:
+                self._cache.clear()
+                self._cache_token = tok
+            hit = self._cache.get(key)
+            if hit is not None:
+                return dict(hit, cached=True, ms=round((time.perf_counter() - t0) * 1000, 3))
+
+        out, err = io.StringIO(), io.StringIO()
+        code = 0
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+            try:
+                self._run(argv)
+            except SystemExit as e:
+                code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+                if isinstance(e.code, str):
+                    print(e.code, file=sys.stderr)
+            except Exception as e:
+                code = 1
+                print(f"{type(e).__name__}: {e}", file=sys.stderr)
+
+        resp = {"code": code, "stdout": out.getvalue(), "stderr": err.getvalue()}
+        if cacheable and code == 0:
+            if len(self._cache) >= MAX_CACHED:
+                self._cache.pop(next(iter(self._cache)))
+            # Token read after the run, so a command that wrote doesn't cache a stale answer
+            if self._token() == self._cache_token:
+                self._cache[key] = resp
+        return dict(resp, cached=False, ms=round((time.perf_counter() - t0) * 1000, 3))
+
+
+def serve(target: str, runner: CommandRunner, allowed: Iterable[str], warm: Optional[Callable[[], None]] = None) -> None:
+    """
+    Listens on target (socket path or host:port) until interrupted.
+    Commands not in `allowed` are refused (the client runs those itself).
+    """
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+
+    allowed = frozenset(allowed)
+    family, addr = _address(target)
+    # One worker: handlers share one store connection and swap sys.stdout
+    worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sb-serve")
+    if warm is not None:
+        worker.submit(warm).result()
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    argv = [str(a) for a in json.loads(line)["argv"]]
+                except (ValueError, KeyError, TypeError):
+                    resp = {"code": 2, "stdout": "", "stderr": "bad request\n"}
+                else:
+                    if not argv or argv[0] not in allowed:
+                        name = argv[0] if argv else ""
+                        resp = {"code": 2, "stdout": "", "stderr": f"not served: {name}\n"}
+                    else:
+                        resp = await loop.run_in_executor(worker, runner, argv)
+                writer.write(json.dumps(resp).encode("utf-8") + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def main() -> None:
+        if family == socket.AF_UNIX:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(addr)
+            server = await asyncio.start_unix_server(handle, path=addr)
+        else:
+            server = await asyncio.start_server(handle, host=addr[0], port=addr[1])
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+
+        print(f"sb serve: listening on {target} (Ctrl-C to stop)", flush=True)
+        async with server:
+            await stop.wait()
+
+    try:
+        asyncio.run(main())
+    finally:
+        worker.shutdown(wait=True)
+        if family == socket.AF_UNIX:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(addr)
+        print("sb serve: stopped")
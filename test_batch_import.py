@@ -0,0 +1,92 @@
+import shutil
+
+from ingest.batch_import import expand_import_paths, import_files
+from ledger.sqlite_store import SQLiteStore
+from test_qfx_reader import QFX
+
+
+def test_manifest_skips_repeat_imports(tmp_path):
+    src = tmp_path / "in"
+    (src / "sub").mkdir(parents=True)
+    (src / "a.qfx").write_text(QFX)
+    shutil.copy(src / "a.qfx", src / "sub" / "copy.QFX")
+    (src / "notes.txt").write_text("not a statement")
+
+    paths = expand_import_paths([str(src)])
+    assert [p.rsplit("/", 1)[-1] for p in paths] == ["a.qfx", "copy.QFX"]
+
+    with SQLiteStore(str(tmp_path / "sb.db")) as store:
+        store.init_db()
+
+        first = import_files(paths, store, workers=1)
+        assert (first.rows, first.inserted, first.skipped) == (2, 2, 1)
+
+        again = import_files(paths, store, workers=1)
+        assert (again.rows, again.skipped) == (0, 2)
+
+        forced = import_files(paths[:1], store, workers=1, force=True)
+        assert (forced.rows, forced.inserted) == (2, 0)
+
+        assert len(store.list_imports()) == 1
+        assert store.count_transactions() == 2
+
+
+def test_pool_import_streams_chunks_and_matches_in_process(tmp_path):
+    from bench.synth_qfx import write_synthetic_qfx
+
+    src = tmp_path / "in"
+    src.mkdir()
+    for i in range(3):
+        write_synthetic_qfx(str(src / f"s{i}.qfx"), rows=700, seed=i + 1)
+    (src / "bad.qfx").write_bytes(b"<STMTTRN><TRNAMT>-1.00</STMTTRN>")    # no DTPOSTED
+    paths = expand_import_paths([str(src)])
+
+    results = {}
+    for workers in (1, 3):
+        with SQLiteStore(str(tmp_path / f"w{workers}.db")) as store:
+            store.init_db()
+            stats = import_files(paths, store, workers=workers, batch_size=128)
+            by_name = {f.path.rsplit("/", 1)[-1]: f for f in stats.files}
+            assert by_name["bad.qfx"].error and by_name["bad.qfx"].inserted == 0
+            assert stats.failed == 1
+            assert len(store.list_imports()) == 3
+            ids = [t.id for t in store.list_transactions(limit=-1)]
+            # Synthetic files share FITIDs, so only totals are order-independent
+            results[workers] = ({n: f.rows for n, f in by_name.items()}, sorted(ids))
+            assert stats.inserted == len(ids)
+
+            again = import_files(paths, store, workers=workers, batch_size=128)
+            assert again.skipped == 3 and again.inserted == 0
+
+    assert results[1] == results[3]
+
+
+def test_pool_import_raises_when_the_writer_fails(tmp_path):
+    import sqlite3
+    import threading
+
+    import pytest
+    from bench.synth_qfx import write_synthetic_qfx
+
+    paths = [write_synthetic_qfx(str(tmp_path / f"s{i}.qfx"), rows=2000, seed=i + 1) for i in range(4)]
+
+    with SQLiteStore(str(tmp_path / "sb.db")) as store:
+        store.init_db()
+
+        def locked(*a, **kw):
+            raise sqlite3.OperationalError("database is locked")
+
+        store.upsert_batch = locked
+        outcome = []
+
+        def run():
+            with pytest.raises(sqlite3.OperationalError) as e:
+                import_files(paths, store, workers=2, batch_size=64)
+            outcome.append(e.value)
+
+        # Workers stuck on the full chunk queue used to hang the pool's exit
+        t = threading.Thread(target=run, daemon=True)
+        t.start()
+        t.join(timeout=60)
+        assert not t.is_alive() and outcome
+        assert store.list_imports() == []
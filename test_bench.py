@@ -0,0 +1,77 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from bench.run_bench import DEFAULT_MAX_SECONDS, DEFAULT_MIN_RATES, below_min_rate, compare, over_max_seconds
+from bench.startup import parse_importtime
+from bench.synth_qfx import write_synthetic_qfx
+from ingest.qfx.qfx_ingest import ingest_qfx
+
+
+def test_synthetic_qfx_is_deterministic_and_parses(tmp_path):
+    a = write_synthetic_qfx(str(tmp_path / "a.qfx"), 500, seed=7)
+    b = write_synthetic_qfx(str(tmp_path / "b.qfx"), 500, seed=7)
+    assert open(a).read() == open(b).read()
+
+    txs = ingest_qfx(a)
+    assert len(txs) == 500
+    assert len({t.id for t in txs}) == 500
+    types = {t.type for t in txs}
+    assert {"DEBIT", "CHECK", "CREDIT"} <= types
+    assert all(t.checknum for t in txs if t.type == "CHECK")
+
+
+def test_compare_flags_only_slowdowns_past_threshold():
+    base = {"results": {"a": {"seconds": 1.0}, "b": {"seconds": 1.0}, "gone": {"seconds": 1.0}}}
+    cur = {"results": {"a": {"seconds": 1.1}, "b": {"seconds": 1.5}, "new": {"seconds": 9.0}}}
+
+    assert [r.name for r in compare(cur, base, threshold=0.2)] == ["b"]
+    assert compare(cur, base, threshold=0.2, per_bench={"b": 0.6}) == []
+    assert [r.name for r in compare(cur, base, threshold=0.05)] == ["a", "b"]
+
+
+def test_min_rate_floors_apply_without_a_baseline():
+    cur = {"results": {"upsert_batch_bulk": {"rows_per_sec": 20_000.0}, "other": {"rows_per_sec": 1.0}}}
+
+    assert [r.name for r in below_min_rate(cur, DEFAULT_MIN_RATES)] == ["upsert_batch_bulk"]
+    assert below_min_rate(cur, {**DEFAULT_MIN_RATES, "upsert_batch_bulk": 0}) == []
+    assert [r.name for r in below_min_rate(cur, {"other": 5})] == ["other"]
+
+
+def test_parse_importtime_sums_top_level_imports():
+    stderr = "\n".join([
+        "import time: self [us] | cumulative | imported package",
+        "import time:       100 |        100 |   _abc",
+        "import time:       200 |       1500 | ledger.sqlite_store",
+        "import time:       300 |       2000 |   json",
+        "import time:       500 |        500 | instrument",
+    ])
+    total, top = parse_importtime(stderr)
+    assert top == [("ledger.sqlite_store", 0.0015), ("instrument", 0.0005)]
+    assert abs(total - 0.002) < 1e-9
+
+
+def test_startup_ceilings_apply_without_a_baseline():
+    cur = {"results": {"startup_months": {"seconds": 1.0}, "startup_months_imports": {"seconds": 0.01}}}
+
+    assert [r.name for r in over_max_seconds(cur, DEFAULT_MAX_SECONDS)] == ["startup_months"]
+    assert over_max_seconds(cur, {**DEFAULT_MAX_SECONDS, "startup_months": 0}) == []
+
+
+def test_sb_months_stays_lazy(tmp_path):
+    # Runs the command for real: config, review rules and the import/report
+    # stacks must stay unloaded, not just after `import sb`
+    code = (
+        "import sys, sb\n"
+        "sys.argv = ['sb', 'months']\n"
+        "sb.main()\n"
+        "heavy = {'ingest.batch_import', 'reports.pivot', 'config.runtime_config', 'rules.review_rules',\n"
+        "         'ledger.known_ids', 'ledger.review_store', 'decimal'}\n"
+        "print(sorted(heavy & set(sys.modules)))\n"
+    )
+    env = {**os.environ, "SB_NO_SERVER": "1", "PYTHONPATH": str(Path(__file__).parent)}
+    out = subprocess.run([sys.executable, "-c", code], cwd=tmp_path, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    assert out.strip().splitlines()[-1] == "[]"
+    assert (tmp_path / "data" / "simplebook.db").exists()
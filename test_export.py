@@ -0,0 +1,63 @@
+import csv
+import gzip
+import io
+import json
+
+import pytest
+
+from ledger.export import export_bounds, export_transactions, open_output
+from test_sqlite_store import make_store, make_tx
+
+
+def _seed(store):
+    store.upsert_transactions([
+        make_tx(1, "2025-01-31", -5.0, name='SAY "HI", BOB'),
+        make_tx(2, "2025-02-01", 10.0),
+        make_tx(3, "2025-02-28", -2.5),
+        make_tx(4, "2025-03-01", -1.0),
+    ])
+
+
+def test_export_bounds_are_inclusive():
+    assert export_bounds("2025-02", "2025-02") == ("2025-02-01", "2025-03-01")
+    assert export_bounds("2025-02-01", "2025-02-28") == ("2025-02-01", "2025-03-01")
+    assert export_bounds(None, "2024-12") == (None, "2025-01-01")
+    with pytest.raises(ValueError):
+        export_bounds("2025-13", None)
+    with pytest.raises(ValueError):
+        export_bounds("2025-03-01", "2025-02-01")
+
+
+def test_csv_export_streams_range_with_projection(tmp_path):
+    with make_store(tmp_path) as store:
+        _seed(store)
+        out = io.StringIO()
+        start, end = export_bounds("2025-01", "2025-02")
+        n = export_transactions(store, out, "csv", start, end, columns=["posted_date", "amount", "name"], batch_size=1)
+
+    rows = list(csv.reader(io.StringIO(out.getvalue())))
+    assert n == 3
+    assert rows[0] == ["posted_date", "amount", "name"]
+    assert rows[1] == ["2025-01-31", "-5.0", 'SAY "HI", BOB']
+    assert [r[0] for r in rows[1:]] == ["2025-01-31", "2025-02-01", "2025-02-28"]
+
+
+def test_jsonl_export_embeds_raw_and_tags(tmp_path):
+    with make_store(tmp_path) as store:
+        _seed(store)
+        path = tmp_path / "out.jsonl.gz"
+        with open_output(str(path), gz=True) as out:
+            assert export_transactions(store, out, "jsonl") == 4
+
+    docs = [json.loads(line) for line in gzip.open(path, "rt", encoding="utf-8")]
+    assert [d["id"] for d in docs] == ["T1", "T2", "T3", "T4"]
+    assert docs[0]["raw"]["fitid"] == "T1" and docs[0]["tags"] == []
+    assert docs[1]["amount_cents"] == 1000
+
+
+def test_export_rejects_unknown_columns_before_writing(tmp_path):
+    with make_store(tmp_path) as store:
+        out = io.StringIO()
+        with pytest.raises(ValueError):
+            export_transactions(store, out, "csv", columns=["id", "nope"])
+        assert out.getvalue() == ""
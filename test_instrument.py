@@ -0,0 +1,38 @@
+import json
+
+import instrument
+
+
+def test_disabled_is_a_no_op():
+    instrument.disable()
+    items = [1, 2, 3]
+    assert instrument.timed_iter("parse", items) is items
+    with instrument.span("db_read") as sp:
+        sp.rows = 5
+        sp.rows += 1
+    instrument.count("x")
+    assert instrument.snapshot()["stages"] == {}
+
+
+def test_nested_spans_report_self_time_and_rows(tmp_path):
+    instrument.enable()
+    try:
+        with instrument.span("model_build") as sp:
+            out = list(instrument.timed_iter("parse", iter(range(100))))
+            sp.rows = len(out)
+        instrument.record("parse", 0.5, rows=10)
+        instrument.count("db.inserted", 7)
+
+        snap = instrument.snapshot()
+        build, parse = snap["stages"]["model_build"], snap["stages"]["parse"]
+        assert build["rows"] == 100 and parse["rows"] == 110 and parse["calls"] == 2
+        assert build["self_seconds"] <= build["seconds"]
+        assert snap["counters"] == {"db.inserted": 7}
+
+        path = tmp_path / "m.json"
+        instrument.write_json(str(path), {"command": "import"})
+        doc = json.loads(path.read_text())
+        assert doc["command"] == "import" and "model_build" in doc["stages"]
+        assert "model_build" in instrument.format_report()
+    finally:
+        instrument.disable()
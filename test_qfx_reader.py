@@ -0,0 +1,49 @@
+from ingest.qfx.qfx_reader import parse_qfx_iter, parse_qfx_to_raw
+
+QFX = """OFXHEADER:100
+<OFX><BANKTRANLIST>
+<STMTTRN>
+<TRNTYPE>DEBIT
+<DTPOSTED>20240701120000.000[-5:EST]
+<TRNAMT>-42.19
+<FITID>ABC123
+<NAME>DEBIT CARD PURCHASE
+<MEMO>HOME DEPOT 1234
+</STMTTRN>
+<STMTTRN>
+<TRNTYPE>CHECK
+<DTPOSTED>20240702
+<TRNAMT>-100.00
+<CHECKNUM>1001
+<NAME>CHECK # 1001
+</STMTTRN>
+</BANKTRANLIST></OFX>
+"""
+
+
+def test_parse_qfx_iter(tmp_path):
+    path = tmp_path / "t.qfx"
+    path.write_text(QFX)
+
+    raws = list(parse_qfx_iter(str(path)))
+    assert raws == parse_qfx_to_raw(str(path))
+    assert len(raws) == 2
+
+    assert raws[0] == {
+        "type": "DEBIT",
+        "posted_raw": "20240701120000.000[-5:EST]",
+        "posted_date": "2024-07-01",
+        "amount": -42.19,
+        "fitid": "ABC123",
+        "checknum": None,
+        "name": "DEBIT CARD PURCHASE",
+        "memo": "HOME DEPOT 1234",
+    }
+    assert raws[1]["checknum"] == "1001"
+    assert raws[1]["memo"] is None
+
+
+def test_parse_qfx_iter_empty_file(tmp_path):
+    path = tmp_path / "empty.qfx"
+    path.write_text("")
+    assert parse_qfx_to_raw(str(path)) == []
@@ -0,0 +1,82 @@
+from ledger.sqlite_store import SQLiteStore, month_bounds
+from models.transaction import Transaction
+from reports.pushdown import summarize_range, top_spend_by_kind_range, top_spend_vendors_range
+
+NAMES = ["HOME DEPOT", "CHECK # 101", "ONLINE TRANSFER", "AMEX EPAYMENT", "  ", "KROGER"]
+MEMOS = [None, "", "HOME DEPOT 1234", "Transfer to savings", "SHELL OIL"]
+TYPES = ["DEBIT", "CHECK", "XFER", "CREDIT", None]
+
+
+def _seed(store: SQLiteStore) -> None:
+    txs = []
+    for i in range(400):
+        # Distinct cent offsets per row keep vendor totals free of ties
+        amount = ((-1) ** (i % 3)) * (3 * i + 1 + i / 1000)
+        txs.append(Transaction.from_qfx_dict({
+            "type": TYPES[i % len(TYPES)],
+            "posted_date": f"2025-{1 + i % 4:02d}-{1 + i % 27:02d}",
+            "amount": round(amount, 2),
+            "fitid": f"EQ{i}",
+            "checknum": str(1000 + i) if i % 11 == 0 else None,
+            "name": NAMES[i % len(NAMES)],
+            "memo": MEMOS[i % len(MEMOS)],
+        }))
+    store.upsert_transactions(txs)
+
+
+def test_sql_engine_matches_python_engine(tmp_path):
+    with SQLiteStore(str(tmp_path / "sb.db")) as store:
+        store.init_db()
+        _seed(store)
+
+        ranges = [
+            (None, None),
+            ("2025-02-01", "2025-04-01"),   # month-aligned -> rollups
+            ("2025-01-15", "2025-03-10"),   # arbitrary -> direct aggregate
+        ]
+        for start, end in ranges:
+            assert summarize_range(store, start, end, engine="sql") == \
+                summarize_range(store, start, end, engine="python")
+            assert top_spend_vendors_range(store, start, end, n=3, engine="sql") == \
+                top_spend_vendors_range(store, start, end, n=3, engine="python")
+            assert top_spend_by_kind_range(store, start, end, n=3, engine="sql") == \
+                top_spend_by_kind_range(store, start, end, n=3, engine="python")
+
+
+def test_month_pivot_matches_per_month_reports(tmp_path):
+    from reports.pivot import iter_month_pivots, iter_month_pivots_parallel, parse_period, total_of
+
+    db = str(tmp_path / "sb.db")
+    with SQLiteStore(db) as store:
+        store.init_db()
+        _seed(store)
+
+        first, last = parse_period("2024-12..2025-04")
+        pivots = list(iter_month_pivots(store, first, last, top_n=3))
+        assert [p.ym for p in pivots] == ["2024-12", "2025-01", "2025-02", "2025-03", "2025-04"]
+        assert pivots[0].summary.count == 0
+
+        for p in pivots[1:4]:
+            start, end = month_bounds(2025, int(p.ym[5:]))
+            assert p.summary == summarize_range(store, start, end)
+            assert p.top_vendors == top_spend_vendors_range(store, start, end, n=3)
+
+        assert total_of(pivots) == summarize_range(store)
+        assert list(iter_month_pivots_parallel(db, first, last, top_n=3, workers=2)) == pivots
+
+    assert parse_period("2025") == ("2025-01", "2025-12")
+
+
+def test_report_parallel_flag_never_eats_the_period(monkeypatch):
+    import pytest
+    import sb
+
+    calls = []
+    monkeypatch.setattr(sb, "cmd_report_range", lambda *a: calls.append(a))
+
+    sb.cmd_report(["--parallel", "2024"])
+    sb.cmd_report(["2024-01..2024-03", "--parallel=1000"])
+    assert calls == [("2024-01", "2024-12", True, None), ("2024-01", "2024-03", True, 1000)]
+
+    with pytest.raises(SystemExit):
+        sb.cmd_report(["2024", "--parallel=0"])
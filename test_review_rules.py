@@ -0,0 +1,166 @@
+import random
+
+import pytest
+
+from config import defaults
+from ledger.sqlite_store import SQLiteStore, month_bounds
+from models.transaction import Transaction
+from rules.review_rules import compile_review_rules, load_review_rules, match_review_rule
+
+
+def make_tx(i: int, amount: float, name=None, memo=None, type_="DEBIT", posted_date="2025-11-03") -> Transaction:
+    return Transaction.from_qfx_dict({
+        "type": type_,
+        "posted_date": posted_date,
+        "amount": amount,
+        "fitid": f"T{i}",
+        "name": name,
+        "memo": memo,
+    }, source_file="test.qfx")
+
+
+def rules_for(specs, threshold=500.0):
+    cfg = {"REVIEW_RULES": specs, "REVIEW_AMOUNT_THRESHOLD": threshold}
+    return compile_review_rules(load_review_rules(cfg))
+
+
+def test_defaults_reproduce_the_original_report_rules():
+    rules = load_review_rules({"REVIEW_RULES": defaults.REVIEW_RULES, "REVIEW_AMOUNT_THRESHOLD": 500.0})
+    assert match_review_rule(rules, make_tx(1, -500.0, name="ACME")).reason == "large amount, missing memo"
+    assert match_review_rule(rules, make_tx(2, -500.0, name="ACME", memo="invoice")) is None
+    assert match_review_rule(rules, make_tx(3, -499.99, name="ACME")) is None
+    assert match_review_rule(rules, make_tx(4, -5.0, name=" pos ")).reason == "generic or missing name"
+    assert match_review_rule(rules, make_tx(5, -5.0, name="")).id == "missing_name"
+
+
+def test_threshold_comes_from_config():
+    specs = [{"id": "big", "min_abs_amount": "REVIEW_AMOUNT_THRESHOLD"}]
+    rules = load_review_rules({"REVIEW_RULES": specs, "REVIEW_AMOUNT_THRESHOLD": 50})
+    assert rules[0].conditions["min_abs_amount"] == 50.0
+    assert rules_for(specs, 50).fingerprint != rules_for(specs, 60).fingerprint
+
+
+def test_bad_rules_are_rejected():
+    for specs in (
+        [{"id": "x", "colour": ["red"]}],
+        [{"id": "x"}],
+        [{"id": "x", "missing": ["amount"]}],
+        [{"id": "x", "name_in": "POS"}],
+        [{"id": "x", "missing": ["memo"]}, {"id": "x", "missing": ["name"]}],
+    ):
+        with pytest.raises(ValueError):
+            load_review_rules({"REVIEW_RULES": specs, "REVIEW_AMOUNT_THRESHOLD": 1})
+
+
+def test_sql_flags_match_python_rules(tmp_path):
+    specs = defaults.REVIEW_RULES + [
+        {"id": "atm", "reason": "cash", "type_in": ["atm"], "max_abs_amount": 300},
+        {"id": "refund", "reason": "refund", "direction": "credit", "memo_contains": ["refund"]},
+        {"id": "fee", "reason": "fee", "direction": "debit", "name_contains": ["fee", "interest"]},
+    ]
+    review = rules_for(specs, 250.0)
+
+    rnd = random.Random(7)
+    names = [None, "", "  ", "POS", "online", "ACME", "Bank Fee", "INTEREST CHG"]
+    memos = [None, "", " \t", "Refund #12", "note"]
+    txs = [
+        make_tx(
+            i,
+            round(rnd.uniform(-600, 600), 2),
+            name=rnd.choice(names),
+            memo=rnd.choice(memos),
+            type_=rnd.choice(["DEBIT", "CREDIT", "ATM", "CHECK"]),
+            posted_date=f"2025-{rnd.randint(10, 12)}-{rnd.randint(1, 28):02d}",
+        )
+        for i in range(400)
+    ]
+
+    store = SQLiteStore(str(tmp_path / "sb.db"), review_rules=review)
+    store.init_db()
+    store.upsert_transactions(txs, chunk_size=64)
+
+    got = {t.id: (rule_id, reason) for t, rule_id, reason in store.list_review_flags()}
+    want = {}
+    for t in txs:
+        rule = match_review_rule(review.rules, t)
+        if rule is not None:
+            want[t.id] = (rule.id, rule.reason)
+    assert got and got == want
+
+    nov = store.list_review_flags(*month_bounds(2025, 11))
+    assert {t.id for t, _, _ in nov} == {t.id for t in txs if t.id in want and t.posted_date.startswith("2025-11")}
+    dates = [t.posted_date for t, _, _ in nov]
+    assert dates == sorted(dates, reverse=True)
+    store.close()
+
+
+def test_changed_rules_rebuild_flags_on_open(tmp_path):
+    path = str(tmp_path / "sb.db")
+    txs = [make_tx(1, -800.0, name="ACME"), make_tx(2, -80.0, name="ACME")]
+
+    store = SQLiteStore(path, review_rules=rules_for([{"id": "big", "min_abs_amount": "REVIEW_AMOUNT_THRESHOLD"}]))
+    store.init_db()
+    store.upsert_transactions(txs)
+    assert [t.id for t, _, _ in store.list_review_flags()] == [txs[0].id]
+    store.close()
+
+    # Lowering the threshold re-evaluates every stored row, not just new ones
+    store = SQLiteStore(path, review_rules=rules_for([{"id": "big", "min_abs_amount": "REVIEW_AMOUNT_THRESHOLD"}], 50))
+    store.init_db()
+    assert {t.id for t, _, _ in store.list_review_flags()} == {txs[0].id, txs[1].id}
+    assert store.count_review_flags() == [("2025-11", 2)]
+    store.close()
+
+
+def test_review_counts_leave_out_done_items(tmp_path, monkeypatch):
+    import sb
+    from ledger.review_store import ReviewLog, count_open_review_flags, feed_review_log
+
+    monkeypatch.chdir(tmp_path)
+    txs = [make_tx(1, -800.0, name="ACME"), make_tx(2, -900.0, name="ACME", posted_date="2025-10-02")]
+    store = SQLiteStore(str(tmp_path / "sb.db"), review_rules=rules_for([{"id": "big", "min_abs_amount": "REVIEW_AMOUNT_THRESHOLD"}]))
+    store.init_db()
+    store.upsert_transactions(txs)
+    assert count_open_review_flags(store) == [("2025-11", 1), ("2025-10", 1)]
+
+    log = ReviewLog("2025-11")
+    feed_review_log(log, store.list_review_flags(*month_bounds(2025, 11)))
+    log.update("T1", status="done")
+    assert store.count_review_flags() == [("2025-11", 1), ("2025-10", 1)]
+    assert count_open_review_flags(store) == [("2025-10", 1)]
+    store.close()
+
+    # The done state lives outside the DB, so a server can't cache review output
+    assert "review" not in sb.CACHED_COMMANDS
+
+
+def test_malformed_config_falls_back_to_default_rules(tmp_path, capsys):
+    from rules.review_rules import configured_review_rules
+
+    bad = {"REVIEW_RULES": [{"id": "x", "name_in": "POS"}], "REVIEW_AMOUNT_THRESHOLD": 500.0}
+    review = configured_review_rules(bad)
+    assert "Warning" in capsys.readouterr().out
+    assert [r.id for r in review.rules] == [r["id"] for r in defaults.REVIEW_RULES]
+
+    # The store still writes (and flags) normally
+    store = SQLiteStore(str(tmp_path / "sb.db"), review_rules=review)
+    store.init_db()
+    assert store.upsert_transactions([make_tx(1, -900.0, name="ACME")], bulk=True) == 1
+    assert [rule_id for _, rule_id, _ in store.list_review_flags()] == ["large_no_memo"]
+    store.close()
+
+
+def test_store_checks_configured_rules_on_first_write(tmp_path, monkeypatch, capsys):
+    from config import runtime_config
+
+    monkeypatch.setattr(runtime_config, "_cfg", {
+        "REVIEW_RULES": [{"id": "x", "colour": ["red"]}], "REVIEW_AMOUNT_THRESHOLD": 500.0,
+    })
+    store = SQLiteStore(str(tmp_path / "sb.db"))
+    store.init_db()
+    # Opening the store leaves the config alone (read-only commands never load it)
+    assert capsys.readouterr().out == ""
+    assert store.upsert_transactions([make_tx(1, -5.0, name="POS")]) == 1
+    assert "REVIEW_RULES" in capsys.readouterr().out
+    assert [rule_id for _, rule_id, _ in store.list_review_flags()] == ["generic_name"]
+    store.close()
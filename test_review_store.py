@@ -0,0 +1,105 @@
+from ledger import review_store
+from ledger.review_store import ReviewLog, load_review_items
+
+
+def test_review_log_appends_compacts_and_tracks_open(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    ym = "2025-11"
+
+    log = ReviewLog(ym, compact_ratio=1.0, min_compact_lines=8)
+    for i in range(5):
+        log.upsert(f"id{i}", {"id": f"id{i}", "amount": -i})
+    assert log.next_open()["id"] == "id0"
+
+    log.update("id0", status="done")
+    log.update("id1", status="done", category="Repairs")
+    assert log.next_open()["id"] == "id2"
+
+    # Re-importing an item keeps the user's status/category
+    log.upsert("id1", {"id": "id1", "amount": -99})
+    assert log.items["id1"]["status"] == "done"
+    assert log.items["id1"]["category"] == "Repairs"
+
+    # 8 journal lines so far -> the 9th write compacts back to one line per item
+    log.update("id2", note="call bank")
+    path = review_store.review_path_for_month(ym)
+    assert len(path.read_text().splitlines()) == 5
+
+    reopened = ReviewLog(ym)
+    assert reopened.items == load_review_items(ym) == log.items
+    assert reopened.next_open()["id"] == "id2"
+
+
+def test_torn_last_line_is_ignored(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    ReviewLog("2025-12").upsert("a", {"id": "a"})
+    path = review_store.review_path_for_month("2025-12")
+    with path.open("a") as f:
+        f.write('{"id": "b", "sta')
+    assert list(load_review_items("2025-12")) == ["a"]
+
+
+def test_append_after_torn_write_keeps_journal_readable(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    ym = "2025-12"
+    path = review_store.review_path_for_month(ym)
+
+    log = ReviewLog(ym)
+    log.upsert("a", {"id": "a"})
+    with path.open("a") as f:
+        f.write('{"id": "b", "sta')
+
+    log = ReviewLog(ym)
+    log.upsert("c", {"id": "c"})
+    log.upsert("d", {"id": "d"})
+    assert sorted(load_review_items(ym)) == ["a", "c", "d"]
+
+    # A complete entry that only lost its newline is kept
+    with path.open("a") as f:
+        f.write('{"id": "e"}')
+    review_store.append_review_item(ym, {"id": "f"})
+    assert sorted(ReviewLog(ym).items) == ["a", "c", "d", "e", "f"]
+
+
+def test_feed_review_log_only_writes_new_or_changed_flags(tmp_path, monkeypatch):
+    from models.transaction import Transaction
+
+    monkeypatch.chdir(tmp_path)
+    t = Transaction.from_qfx_dict({
+        "type": "DEBIT", "posted_date": "2025-11-03", "amount": -900.0, "fitid": "F1", "name": "ACME",
+    }, source_file="test.qfx")
+
+    log = ReviewLog("2025-11")
+    assert review_store.feed_review_log(log, [(t, "big", "large amount")]) == 1
+    log.update("F1", status="done")
+    assert review_store.feed_review_log(log, [(t, "big", "large amount")]) == 0
+
+    assert review_store.feed_review_log(log, [(t, "other", "something else")]) == 1
+    assert log.items["F1"]["reason"] == "something else"
+    assert log.items["F1"]["status"] == "done"
+
+
+def test_feed_review_log_appends_a_batch_with_one_fsync(tmp_path, monkeypatch):
+    from models.transaction import Transaction
+
+    monkeypatch.chdir(tmp_path)
+    txs = [
+        Transaction.from_qfx_dict({
+            "type": "DEBIT", "posted_date": "2025-11-03", "amount": -900.0 - i, "fitid": f"F{i}",
+        }, source_file="test.qfx")
+        for i in range(20)
+    ]
+    syncs = []
+    monkeypatch.setattr(review_store.os, "fsync", syncs.append)
+
+    log = ReviewLog("2025-11")
+    assert review_store.feed_review_log(log, [(t, "big", "large amount") for t in txs]) == 20
+    assert len(syncs) == 1
+    assert len(load_review_items("2025-11")) == 20
+
+    # Done items are hidden the same way for report and review
+    log.update("F3", status="done")
+    flagged = [(t, "big", "large amount") for t in txs]
+    shown = review_store.open_review_flags(flagged)
+    assert len(shown) == 19 and all(t.id != "F3" for t, _, _ in shown)
+    assert review_store.open_review_flags(flagged, {"2025-11": log.items}) == shown
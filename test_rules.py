@@ -0,0 +1,102 @@
+from config.runtime_config import CFG
+from models.transaction import Transaction
+from rules.rules_v1 import classify_many, classify_tx
+
+
+def _tx(i: int, name: str, amount: float, checknum=None) -> Transaction:
+    return Transaction(
+        id=f"R{i}", posted_date="2025-01-01", amount=amount,
+        direction="credit" if amount > 0 else "debit", name=name, checknum=checknum,
+    )
+
+
+def test_first_rule_wins_and_batch_matches_single(monkeypatch):
+    monkeypatch.setitem(CFG, "ASSUME_ALL_INCOME_IS_RENTAL", False)
+    monkeypatch.setitem(CFG, "VENDOR_RULES", [
+        ("TRANSFER TO CASH APP", "Personal Transfer", "guess", None),
+        ("CASH APP", "Cash App", "guess", None),
+        ("TRANSFER TO", "Transfer", "guess", None),
+        ("AT&T", "Phone Expense", "hard", None),
+    ])
+
+    txs = [
+        _tx(1, "ONLINE TRANSFER TO CASH APP", -20.0),
+        _tx(2, "TRANSFER TO SAVINGS", -5.0),
+        _tx(3, "AT&amp;T BILL", -80.0),
+        _tx(4, "ZELLE FROM BOB", 100.0),
+        _tx(5, "CHECK # 12", -40.0),
+        _tx(6, None, -1.0, checknum="12"),
+        _tx(7, "AT&amp;T BILL", -81.0),
+    ]
+
+    cats = [r.category for r in classify_many(txs)]
+    assert cats == ["Personal Transfer", "Transfer", "Phone Expense", None, None, None, "Phone Expense"]
+    assert classify_many(txs) == [classify_tx(t) for t in txs]
+    assert classify_tx(txs[4]).note == "unknown check payee"
+
+
+def test_cached_classification_only_redoes_stale_rows(tmp_path, monkeypatch):
+    from ledger.sqlite_store import SQLiteStore
+    from rules import cached
+
+    monkeypatch.setitem(CFG, "ASSUME_ALL_INCOME_IS_RENTAL", False)
+    monkeypatch.setitem(CFG, "VENDOR_RULES", [("AT&T", "Phone Expense", "hard", None)])
+    txs = [_tx(1, "AT&amp;T BILL", -80.0), _tx(2, "KROGER", -12.0)]
+
+    seen = []
+    real = cached.classify_many
+    monkeypatch.setattr(cached, "classify_many", lambda ts: seen.append(len(ts)) or real(ts))
+
+    with SQLiteStore(str(tmp_path / "sb.db")) as store:
+        store.init_db()
+        first = cached.classify_with_cache(store, txs)
+        assert cached.classify_with_cache(store, txs) == first
+        assert seen == [2]
+
+        # A rule change invalidates every cached entry
+        monkeypatch.setitem(CFG, "VENDOR_RULES", [("KROGER", "Groceries", "hard", None)])
+        assert [r.category for r in cached.classify_with_cache(store, txs)] == [None, "Groceries"]
+        assert seen == [2, 2]
+
+
+def test_config_loads_lazily_and_caches(monkeypatch, tmp_path):
+    import config.runtime_config as rc
+
+    monkeypatch.setattr(rc, "CONFIG_PATH", tmp_path / "config.json")
+    monkeypatch.setattr(rc, "_cfg", None)
+    (tmp_path / "config.json").write_text('{"REVIEW_AMOUNT_THRESHOLD": 42}', encoding="utf-8")
+
+    cfg = rc.get_config()
+    assert cfg["REVIEW_AMOUNT_THRESHOLD"] == 42
+    assert rc.get_config() is cfg and rc.CFG is cfg
+
+    (tmp_path / "config.json").write_text('{"REVIEW_AMOUNT_THRESHOLD": 7}', encoding="utf-8")
+    assert rc.get_config()["REVIEW_AMOUNT_THRESHOLD"] == 42
+    assert rc.reload_config()["REVIEW_AMOUNT_THRESHOLD"] == 7
+
+
+def test_month_report_classifies_each_debit_once(tmp_path, monkeypatch, capsys):
+    import sb
+    from ledger.sqlite_store import SQLiteStore
+    from rules import cached
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setitem(CFG, "VENDOR_RULES", [("AT&T", "Phone Expense", "hard", None)])
+    txs = [_tx(1, "AT&amp;T BILL", -80.0), _tx(2, "KROGER", -12.0), _tx(3, "RENT", 900.0)]
+
+    seen = []
+    real = cached.classify_many
+    monkeypatch.setattr(cached, "classify_many", lambda ts: seen.append(len(ts)) or real(ts))
+
+    with SQLiteStore(str(tmp_path / "sb.db")) as store:
+        store.init_db()
+        store.upsert_transactions(txs)
+        monkeypatch.setattr(sb, "open_store", lambda: store)
+
+        sb.cmd_report(["2025-01"])
+        out = capsys.readouterr().out
+        assert "80.00  Phone Expense" in out and "12.00  Uncategorized" in out
+
+        # A rerun reads every result back from the store
+        sb.cmd_report(["2025-01"])
+        assert seen == [2]
@@ -0,0 +1,63 @@
+import sys
+
+from sb_server import CommandRunner, request
+from test_sqlite_store import make_store, make_tx
+
+
+def test_runner_captures_output_and_caches_until_db_changes(tmp_path):
+    with make_store(tmp_path) as store:
+        calls = []
+
+        def run(argv):
+            calls.append(argv)
+            if argv[0] == "fail":
+                print("bad usage")
+                sys.exit(1)
+            print(f"{argv[0]}: {store.count_transactions()}")
+
+        runner = CommandRunner(run, store.change_token, cacheable=("months",))
+
+        first = runner(["months"])
+        assert first == dict(first, code=0, stdout="months: 0\n", stderr="", cached=False)
+        assert runner(["months"])["cached"] is True
+        assert len(calls) == 1
+
+        # This connection's own writes invalidate...
+        store.upsert_transactions([make_tx(1)])
+        assert runner(["months"])["stdout"] == "months: 1\n"
+
+        # ...and so do commits from another connection
+        with make_store(tmp_path) as other:
+            other.upsert_transactions([make_tx(2)])
+        assert runner(["months"])["stdout"] == "months: 2\n"
+        assert len(calls) == 3
+
+        failed = runner(["fail"])
+        assert failed["code"] == 1 and failed["stdout"] == "bad usage\n"
+        runner(["fail"])
+        assert len(calls) == 5     # errors and uncached commands always run
+
+
+def test_request_without_server_returns_none(tmp_path):
+    assert request(str(tmp_path / "missing.sock"), ["months"]) is None
+    (tmp_path / "stale.sock").write_text("")
+    assert request(str(tmp_path / "stale.sock"), ["months"]) is None
+
+
+def test_request_falls_back_when_server_is_unusable(tmp_path, monkeypatch):
+    import socket
+    import sb_server
+
+    # Listening but never answering: times out
+    path = str(tmp_path / "slow.sock")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as srv:
+        srv.bind(path)
+        srv.listen(1)
+        assert request(path, ["months"], timeout=0.1) is None
+
+    class NoAccess(socket.socket):
+        def connect(self, addr):
+            raise PermissionError(13, "Permission denied")
+
+    monkeypatch.setattr(sb_server.socket, "socket", NoAccess)
+    assert request(path, ["months"]) is None
@@ -0,0 +1,345 @@
+import dataclasses
+
+from ledger.known_ids import KnownIdFilter
+from ledger.sqlite_store import SCHEMA_VERSION, SQLiteStore, month_bounds
+from models.transaction import Transaction
+from models.transaction_batch import TransactionBatch
+
+
+def make_tx(i: int, posted_date: str = "2025-11-03", amount: float = -12.5, **kw) -> Transaction:
+    return Transaction.from_qfx_dict({
+        "type": kw.get("type", "DEBIT"),
+        "posted_date": posted_date,
+        "amount": amount,
+        "fitid": f"T{i}",
+        "checknum": kw.get("checknum"),
+        "name": kw.get("name", f"VENDOR {i % 5}"),
+        "memo": kw.get("memo"),
+    }, source_file="test.qfx")
+
+
+def make_store(tmp_path) -> SQLiteStore:
+    store = SQLiteStore(str(tmp_path / "sb.db"))
+    store.init_db()
+    return store
+
+
+def test_upsert_counts_only_new_rows(tmp_path):
+    with make_store(tmp_path) as store:
+        txs = [make_tx(i) for i in range(10)]
+        assert store.upsert_transactions(txs[:6], chunk_size=4) == 6
+        assert store.upsert_transactions(txs, bulk=True, chunk_size=4) == 4
+        assert store.count_transactions() == 10
+
+
+def test_init_db_is_versioned_and_reuses_connection(tmp_path):
+    with make_store(tmp_path) as store:
+        assert store.schema_version() == SCHEMA_VERSION
+        conn = store.connect()
+        store.init_db()
+        store.count_transactions()
+        assert store.connect() is conn
+
+    # Re-opening an up-to-date DB keeps working
+    with make_store(tmp_path) as store:
+        assert store.count_transactions() == 0
+
+
+def test_month_queries_use_half_open_ranges(tmp_path):
+    with make_store(tmp_path) as store:
+        store.upsert_transactions([
+            make_tx(1, "2024-12-31", -5.0),
+            make_tx(2, "2025-12-01", -1.0),
+            make_tx(3, "2025-12-01", -90.0),
+            make_tx(4, "2025-12-31", 20.0),
+            make_tx(5, "2026-01-01", -3.0),
+        ])
+
+        dec = store.list_by_month(2025, 12)
+        assert [t.id for t in dec] == ["T4", "T3", "T2"]
+
+        assert store.list_months() == [("2026-01", 1), ("2025-12", 3), ("2024-12", 1)]
+        assert month_bounds(2025, 12) == ("2025-12-01", "2026-01-01")
+
+        ranged = store.list_transactions(start="2025-01-01", end="2026-01-01", limit=10)
+        assert {t.id for t in ranged} == {"T2", "T3", "T4"}
+
+
+def test_projected_reads_decode_raw_lazily(tmp_path):
+    with make_store(tmp_path) as store:
+        store.upsert_transactions([make_tx(1, memo="HOME DEPOT")])
+
+        full = store.list_transactions(limit=1)[0]
+        assert full.raw["fitid"] == "T1"
+        assert full.memo == "HOME DEPOT"
+
+        slim = store.list_transactions(limit=1, columns=["memo"])[0]
+        assert slim.memo == "HOME DEPOT"
+        assert slim.source_file is None
+        assert slim.raw == {}
+
+
+def test_rollups_track_inserts_and_match_rebuild(tmp_path):
+    with make_store(tmp_path) as store:
+        txs = [make_tx(i, f"2025-{1 + i % 3:02d}-1{i % 9}", (-1) ** i * (i + 0.25)) for i in range(30)]
+        store.upsert_transactions(txs[:20], chunk_size=7)
+        # bulk: several chunks in one transaction, derived tables updated once
+        store.upsert_transactions(txs, bulk=True, chunk_size=7)
+
+        jan = [t for t in txs if t.posted_date.startswith("2025-01")]
+        r = store.get_rollup("2025-01")
+        assert r["count"] == len(jan)
+        assert r["credits_count"] == sum(1 for t in jan if t.amount > 0)
+        assert round(r["debits_total"], 2) == round(sum(t.amount for t in jan if t.amount <= 0), 2)
+
+        incremental = [store.get_rollup(ym) for ym, _ in store.list_months()]
+        store.rebuild_rollups()
+        assert [store.get_rollup(ym) for ym, _ in store.list_months()] == incremental
+
+
+def test_known_id_filter_skips_stored_rows_and_confirms_hits(tmp_path):
+    with make_store(tmp_path) as store:
+        store.upsert_transactions([make_tx(i) for i in range(5)])
+
+        known = store.load_known_ids()
+        assert len(known) == 5
+        assert store.upsert_transactions([make_tx(i) for i in range(8)], known=known) == 3
+        assert (known.stats.checked, known.stats.hits, known.stats.misses) == (8, 5, 3)
+
+        # A filter that claims everything is known must still let new rows through
+        known.might_contain = lambda tx_id: True
+        assert store.upsert_transactions([make_tx(i) for i in range(10)], known=known) == 2
+        assert known.stats.false_positives == 2
+        assert store.count_transactions() == 10
+
+
+def test_stored_rows_equal_the_transactions_they_came_from(tmp_path):
+    with make_store(tmp_path) as store:
+        txs = [dataclasses.replace(make_tx(i, memo="M"), tags=("a",)) for i in range(3)]
+        store.upsert_transactions(txs)
+        stored = sorted(store.list_by_month(2025, 11), key=lambda t: t.id)
+
+        assert stored == txs and txs == stored
+        assert txs[0] in stored and stored[0] != txs[1]
+        assert stored[0] != dataclasses.replace(txs[0], notes="changed")
+
+
+def test_half_cents_round_away_from_zero_in_python_and_migration(tmp_path):
+    import sqlite3
+
+    from ledger.sqlite_store import _MIGRATIONS
+    from models.transaction import to_cents
+
+    assert [to_cents(a) for a in (0.125, -0.125, 1.005, -2.675, 42.19)] == [13, -13, 101, -268, 4219]
+
+    # A database from before v6 added amount_cents
+    path = str(tmp_path / "sb.db")
+    conn = sqlite3.connect(path)
+    with conn:
+        for version, migrate in _MIGRATIONS:
+            if version < 6:
+                migrate(conn)
+        conn.executemany(
+            "INSERT INTO transactions (id, posted_date, amount, direction) VALUES (?, '2025-11-03', ?, ?)",
+            [("T1", 1.005, "credit"), ("T2", -0.125, "debit")],
+        )
+        conn.execute("PRAGMA user_version = 5")
+    conn.close()
+
+    with SQLiteStore(path) as store:
+        store.init_db()
+        cents = store.connect().execute("SELECT amount_cents FROM transactions").fetchall()
+        assert sorted(r[0] for r in cents) == [-13, 101]
+        assert store.get_rollup("2025-11")["credits_cents"] == 101
+
+
+def test_known_id_filter_is_cached_and_learns_inserts(tmp_path):
+    with make_store(tmp_path) as store:
+        store.upsert_transactions([make_tx(i) for i in range(5)])
+        known = store.load_known_ids()
+
+        # Inserted without the filter: the store's cached one still learns them
+        later = [make_tx(i) for i in range(5, 8)]
+        store.upsert_transactions(later, bulk=True)
+        assert store.load_known_ids() is known
+        assert len(known) == 8 and known.stats.checked == 0
+        assert all(known.might_contain(t.id) for t in later)
+
+
+def test_known_id_filter_merges_added_ids():
+    f = KnownIdFilter(f"A{i}" for i in range(100))
+    for i in range(10_000):      # past the pending set's limit: merged into the array
+        f.add(f"B{i}")
+    f.add("A1")
+
+    assert len(f) == 10_100
+    assert all(f.might_contain(f"A{i}") for i in range(100))
+    assert all(f.might_contain(f"B{i}") for i in range(10_000))
+    assert not any(f.might_contain(f"C{i}") for i in range(1000))
+    assert not KnownIdFilter().might_contain("A1")
+
+
+def test_amounts_aggregate_as_exact_cents(tmp_path):
+    with make_store(tmp_path) as store:
+        store.upsert_transactions([make_tx(i, "2025-03-01", 0.1) for i in range(1000)])
+        store.upsert_transactions([make_tx(1000, "2025-03-02", -0.3)])
+
+        r = store.get_rollup("2025-03")
+        assert (r["credits_cents"], r["debits_cents"]) == (10000, -30)
+        assert r["credits_total"] == 100.0
+        assert store.aggregate_totals("2025-03-01", "2025-03-02")["credits_cents"] == 10000
+        assert make_tx(1, amount=-42.19).amount_cents == -4219
+
+
+def test_search_uses_fts_ranked_and_stays_in_sync(tmp_path):
+    with make_store(tmp_path) as store:
+        store.upsert_transactions([
+            make_tx(1, "2025-01-05", name="POS HOME DEPOT", memo="HOME DEPOT #4411"),
+            make_tx(2, "2025-02-05", name="HOME GOODS"),
+            make_tx(3, "2025-03-05", name="POS AT&amp;T"),
+            make_tx(4, "2025-03-06", name="CHECK # 1204", checknum="1204"),
+        ])
+        # Rows inserted later are indexed too
+        store.upsert_transactions([make_tx(5, "2025-04-05", name="THE HOME DEPOT")])
+
+        assert [t.id for t in store.search_transactions("home depot")][0] == "T1"
+        assert {t.id for t in store.search_transactions("home depot")} == {"T1", "T5"}
+        assert [t.id for t in store.search_transactions("depot", "2025-04-01", "2025-05-01")] == ["T5"]
+        assert [t.id for t in store.search_transactions("AT&T")] == ["T3"]
+        assert [t.id for t in store.search_transactions("1204")] == ["T4"]
+        assert store.search_transactions('"unbalanced') == []
+
+
+def test_search_falls_back_to_like_without_fts(tmp_path):
+    with make_store(tmp_path) as store:
+        store.upsert_transactions([make_tx(1, name="POS HOME DEPOT"), make_tx(2, name="100%_OFF")])
+        with store.connect() as conn:
+            conn.execute("DROP TABLE tx_fts")
+        store.upsert_transactions([make_tx(3, name="HOME DEPOT #2")])
+
+        assert {t.id for t in store.search_transactions("home depot")} == {"T1", "T3"}
+        assert [t.id for t in store.search_transactions("100%_")] == ["T2"]
+        assert store.search_transactions("0%x") == []
+
+        assert store.rebuild_search_index()
+        assert {t.id for t in store.search_transactions("depot")} == {"T1", "T3"}
+
+
+def test_kind_is_classified_on_insert_and_matches_backfill(tmp_path):
+    from ledger.sqlite_store import _migrate_v9
+    from models.transaction import classify_kind
+
+    # CHECK wins for either sign, then CREDIT, TRANSFER, CARD_PAYMENT
+    assert classify_kind(250.0, "DEPOSIT", None, "CREDIT", "1001") == "CHECK"
+    assert classify_kind(80.0, "TRANSFER FROM SAV", None, "XFER", None) == "CREDIT"
+    assert classify_kind(-80.0, "ONLINE", "transfer to sav", "DEBIT", None) == "TRANSFER"
+    assert classify_kind(-300.0, "CITI CARD", "EPAYMENT", "DEBIT", None) == "CARD_PAYMENT"
+    assert classify_kind(-12.0, "POS COFFEE", None, "POS", None) == "OTHER_DEBIT"
+
+    specs = [
+        dict(amount=-50.0, name="CHECK # 12", type="DEBIT"),
+        dict(amount=-50.0, name="ACME", checknum="77"),
+        dict(amount=90.0, name="REFUND", type="CHECK"),
+        dict(amount=90.0, name="PAYROLL", type="DIRECTDEP"),
+        dict(amount=-20.0, name="TRANSFER TO SAV", type="XFER"),
+        dict(amount=-20.0, name="ACME", memo="Online Transfer"),
+        dict(amount=-400.0, name="AMEX", memo="EPAYMENT", type="DEBIT"),
+        dict(amount=-400.0, name="BILL PAY", type="PAYMENT"),
+        dict(amount=-5.0, name="POS COFFEE", type="POS"),
+        dict(amount=0.0, name=None, type=None),
+    ]
+    txs = [make_tx(i, posted_date=f"2025-11-{i + 1:02d}", **spec) for i, spec in enumerate(specs)]
+
+    with make_store(tmp_path) as store:
+        store.upsert_transactions(txs[:5])
+        store.upsert_transactions(TransactionBatch.from_transactions(txs[5:]))
+
+        stored = {t.id: t.kind for t in store.list_transactions(limit=-1, columns=("kind",))}
+        assert stored == {t.id: t.kind for t in txs}
+
+        # The migration's frozen SQL backfill agrees with the Python classifier
+        conn = store.connect()
+        with conn:
+            conn.execute("DROP INDEX idx_tx_kind")
+            conn.execute("ALTER TABLE transactions DROP COLUMN kind")
+            _migrate_v9(conn)
+        assert {t.id: t.kind for t in store.list_transactions(limit=-1, columns=("kind",))} == stored
+
+        checks = store.list_transactions(start="2025-11-02", end="2025-12-01", limit=-1, kind="CHECK")
+        assert [t.id for t in checks] == [txs[2].id, txs[1].id]
+
+        # replace() drops the stored kind; it's re-derived from the new fields
+        stored_check = checks[0]
+        assert dataclasses.replace(stored_check, checknum=None, type="DEBIT", name="REFUND").kind == "CREDIT"
+
+
+def test_tx_kind_accepts_plain_objects():
+    from types import SimpleNamespace
+
+    from reports.basic_summary import tx_kind
+
+    assert tx_kind(SimpleNamespace(amount=-5.0, name="CHECK # 3", memo=None, type=None, checknum=None)) == "CHECK"
+    assert tx_kind(SimpleNamespace(amount=-5.0, name="ACME")) == "OTHER_DEBIT"
+
+
+def test_process_killed_mid_bulk_write_leaves_db_intact(tmp_path):
+    import subprocess
+    import sys
+    from pathlib import Path
+
+    db = tmp_path / "sb.db"
+    with make_store(tmp_path) as store:
+        store.upsert_transactions([make_tx(i) for i in range(10)])
+
+    # A tiny page cache makes SQLite spill uncommitted pages into the db file
+    code = (
+        "import os\n"
+        "from ledger.sqlite_store import SQLiteStore\n"
+        "from test_sqlite_store import make_tx\n"
+        "store = SQLiteStore(os.environ['SB_DB'])\n"
+        "store.init_db()\n"
+        "store.connect().execute('PRAGMA cache_size = 2')\n"
+        "def rows():\n"
+        "    for i in range(100, 20000):\n"
+        "        if i == 15000:\n"
+        "            os._exit(9)\n"
+        "        yield make_tx(i, memo='x' * 200)\n"
+        "store.upsert_transactions(rows(), bulk=True, chunk_size=1000)\n"
+    )
+    proc = subprocess.run([sys.executable, "-c", code], cwd=Path(__file__).parent,
+                          env={"SB_DB": str(db), "PATH": ""}, capture_output=True)
+    assert proc.returncode == 9, proc.stderr
+
+    with SQLiteStore(str(db)) as store:
+        conn = store.connect()
+        assert conn.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+        assert store.count_transactions() == 10
+        assert store.get_rollup("2025-11")["count"] == 10
+
+
+def test_bulk_failure_rolls_back_and_restores_pragmas(tmp_path):
+    import pytest
+    import sqlite3
+
+    with make_store(tmp_path) as store:
+        conn = store.connect()
+        before = (
+            conn.execute("PRAGMA journal_mode").fetchone()[0],
+            conn.execute("PRAGMA synchronous").fetchone()[0],
+        )
+        good = [make_tx(i) for i in range(4)]
+        # Fails inside the chunk's write transaction: SQLite can't bind it
+        bad = Transaction("BAD", "2025-11-03", -1.0, "debit", checknum=object())
+
+        with pytest.raises(sqlite3.Error):
+            store.upsert_transactions(good + [bad], bulk=True, chunk_size=2)
+
+        assert not conn.in_transaction
+        assert (
+            conn.execute("PRAGMA journal_mode").fetchone()[0],
+            conn.execute("PRAGMA synchronous").fetchone()[0],
+        ) == before
+        # A bulk call is one transaction: nothing from it is kept
+        assert store.count_transactions() == 0
+        assert store.get_rollup("2025-11") is None
+        assert store.upsert_transactions([make_tx(9)]) == 1
@@ -0,0 +1,22 @@
+import copy
+
+from ingest.qfx.qfx_reader import parse_qfx_to_raw
+from models.transaction import Transaction
+from models.transaction_batch import TransactionBatch
+from test_qfx_reader import QFX
+
+
+def test_trusted_paths_match_validating_constructor(tmp_path):
+    path = tmp_path / "t.qfx"
+    path.write_text(QFX)
+    raws = parse_qfx_to_raw(str(path))
+    raws.append(dict(raws[0], fitid=None, memo=""))   # exercises the fallback id
+
+    expected = [Transaction.from_qfx_dict(r, source_file="t.qfx") for r in copy.deepcopy(raws)]
+    fast = [Transaction.from_parser(r, source_file="t.qfx") for r in copy.deepcopy(raws)]
+    batch = TransactionBatch.from_parser(copy.deepcopy(raws), source_file="t.qfx")
+
+    assert fast == expected
+    assert list(batch) == expected
+    assert batch.ids() == [t.id for t in expected]
+    assert TransactionBatch.from_transactions(expected).rows == batch.rows
@@ -0,0 +1,155 @@
+import os
+import threading
+import time
+
+from ingest.watch import FolderWatcher, watch_folder
+from ledger.sqlite_store import SQLiteStore
+from test_qfx_reader import QFX
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_watcher_debounces_and_reports_each_version_once(tmp_path):
+    clock = FakeClock()
+    (tmp_path / "old.qfx").write_text(QFX)
+    (tmp_path / "notes.txt").write_text("ignore me")
+    w = FolderWatcher(str(tmp_path), settle_seconds=2.0, use_inotify=False, clock=clock)
+
+    assert w.ready() == []                      # not settled yet
+    clock.now += 2.5
+    assert [os.path.basename(r.path) for r in w.ready()] == ["old.qfx"]
+    assert w.ready() == []                      # reported once
+
+    # A file still being written keeps restarting its settle timer
+    part = tmp_path / "new.qfx"
+    part.write_text(QFX[:50])
+    w._scan()
+    clock.now += 1.5
+    part.write_text(QFX)
+    os.utime(part, ns=(1, 1))
+    assert w.ready() == []
+    clock.now += 1.5
+    assert w.ready() == []
+    clock.now += 1.0
+    (ready,) = w.ready()
+    assert ready.path.endswith("new.qfx") and ready.ready_at - ready.first_seen == 4.0
+
+    # Unchanged on rescan: nothing; changed: reported again
+    w._scan()
+    clock.now += 5
+    assert w.ready() == []
+    part.write_text(QFX + "\n")
+    w._scan()
+    clock.now += 5
+    assert len(w.ready()) == 1
+
+
+def test_watch_folder_imports_new_files_once(tmp_path):
+    inbox = tmp_path / "inbox"
+    inbox.mkdir()
+    seen = []
+    stop = threading.Event()
+
+    with SQLiteStore(str(tmp_path / "sb.db")) as store:
+        store.init_db()
+
+        def on_file(fs, item, finished):
+            seen.append(fs)
+            if len(seen) == 2:
+                stop.set()
+
+        t = threading.Thread(target=watch_folder, args=(str(inbox), store), kwargs=dict(
+            settle_seconds=0.05, poll_interval=0.02, max_queue=1, use_inotify=False,
+            on_file=on_file, stop=stop,
+        ))
+        t.start()
+        (inbox / "a.qfx").write_text(QFX)
+        time.sleep(0.3)
+        (inbox / "copy.qfx").write_text(QFX)
+        t.join(timeout=10)
+
+        assert not t.is_alive()
+        assert [os.path.basename(f.path) for f in seen] == ["a.qfx", "copy.qfx"]
+        assert seen[0].inserted == 2 and not seen[0].skipped
+        assert seen[1].skipped
+        assert store.count_transactions() == 2
+
+
+def test_watch_folder_keeps_one_known_id_filter(tmp_path):
+    inbox = tmp_path / "inbox"
+    inbox.mkdir()
+    seen = []
+    stop = threading.Event()
+
+    with SQLiteStore(str(tmp_path / "sb.db")) as store:
+        store.init_db()
+        loads = []
+        load_known_ids = store.load_known_ids
+        store.load_known_ids = lambda: loads.append(1) or load_known_ids()
+
+        def on_file(fs, item, finished):
+            seen.append(fs)
+            if len(seen) == 2:
+                stop.set()
+
+        t = threading.Thread(target=watch_folder, args=(str(inbox), store), kwargs=dict(
+            settle_seconds=0.05, poll_interval=0.02, use_inotify=False, on_file=on_file, stop=stop,
+        ))
+        t.start()
+        (inbox / "a.qfx").write_text(QFX)
+        time.sleep(0.3)
+        # Same check, new debit: the filter already knows the check from a.qfx
+        (inbox / "b.qfx").write_text(QFX.replace("ABC123", "XYZ999"))
+        t.join(timeout=10)
+
+        assert not t.is_alive()
+        assert [(f.rows, f.inserted) for f in seen] == [(2, 2), (2, 1)]
+        assert len(loads) == 1
+        assert store.count_transactions() == 3
+
+
+def test_watch_folder_retries_a_file_after_a_db_error(tmp_path):
+    import sqlite3
+
+    inbox = tmp_path / "inbox"
+    inbox.mkdir()
+    seen = []
+    stop = threading.Event()
+
+    with SQLiteStore(str(tmp_path / "sb.db")) as store:
+        store.init_db()
+        upsert_batch = store.upsert_batch
+        calls = []
+
+        def flaky_upsert(*args, **kwargs):
+            calls.append(1)
+            if len(calls) == 1:
+                raise sqlite3.OperationalError("database is locked")
+            return upsert_batch(*args, **kwargs)
+
+        store.upsert_batch = flaky_upsert
+
+        def on_file(fs, item, finished):
+            seen.append(fs)
+            if len(seen) == 2:
+                stop.set()
+
+        t = threading.Thread(target=watch_folder, args=(str(inbox), store), kwargs=dict(
+            settle_seconds=0.05, poll_interval=0.02, use_inotify=False,
+            on_file=on_file, stop=stop, retry_seconds=0.1,
+        ))
+        t.start()
+        (inbox / "a.qfx").write_text(QFX)
+        t.join(timeout=10)
+
+        assert not t.is_alive()
+        assert [os.path.basename(f.path) for f in seen] == ["a.qfx", "a.qfx"]
+        assert "database is locked" in seen[0].error
+        assert seen[1].error is None and seen[1].inserted == 2
+        assert store.count_transactions() == 2